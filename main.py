@@ -1,21 +1,96 @@
+import argparse
+import logging
 import sys
-from task_manager.interfaz_grafica import iniciar_interfaz_grafica
 from task_manager.demo_datos import ejecutar_demo, cargar_datos_demo
 
 def main():
-    # Verificar si hay argumentos de línea de comandos
-    if len(sys.argv) > 1 and sys.argv[1] == "--demo":
+    if "--bench" in sys.argv[1:]:
+        # Todas las demás opciones (incluida --help) son las del benchmark
+        from task_manager.benchmark import main as benchmark
+        sys.exit(benchmark([arg for arg in sys.argv[1:] if arg != "--bench"]))
+
+    parser = argparse.ArgumentParser(description="Gestor de Tareas")
+    parser.add_argument("--demo", action="store_true",
+                        help="Ejecutar solo la demostración en consola")
+    parser.add_argument("--demo-gui", action="store_true",
+                        help="Iniciar la interfaz gráfica con datos de demostración precargados")
+    parser.add_argument("--datos", metavar="DIRECTORIO",
+                        help="Guardar las tareas en este directorio y restaurarlas al iniciar")
+    parser.add_argument("--sqlite", metavar="ARCHIVO",
+                        help="Usar una base de datos SQLite como almacenamiento de tareas y categorías")
+    parser.add_argument("--instantanea", metavar="ARCHIVO",
+                        help="Abrir las tareas desde una instantánea binaria (se lee de forma perezosa y se guarda al salir)")
+    parser.add_argument("--historial", metavar="N", type=int,
+                        help="Mantener en memoria como máximo N acciones de deshacer; las más antiguas pasan a disco")
+    parser.add_argument("--horizonte", metavar="N", type=int,
+                        help="Descartar las acciones de deshacer más antiguas que las últimas N")
+    parser.add_argument("--stats", action="store_true",
+                        help="Mostrar al salir las métricas de operaciones (llamadas y latencias)")
+    parser.add_argument("--log", metavar="NIVEL", default="WARNING",
+                        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                        help="Nivel de los mensajes de registro (por defecto WARNING)")
+    parser.add_argument("--serve", action="store_true",
+                        help="Atender una API HTTP/JSON en lugar de abrir la interfaz gráfica")
+    parser.add_argument("--host", default="127.0.0.1", help="Dirección de escucha de --serve (por defecto 127.0.0.1)")
+    parser.add_argument("--puerto", type=int, default=8765, help="Puerto de --serve (por defecto 8765)")
+    parser.add_argument("--bench", action="store_true",
+                        help="Ejecutar el benchmark de carga sintética (las demás opciones se pasan a "
+                             "task_manager.benchmark; ver --bench --help)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    try:
+        ejecutar(args)
+    finally:
+        if args.stats:
+            from task_manager.metricas import metricas, formatear_metricas
+            print(formatear_metricas(metricas.instantanea()))
+
+def ejecutar(args):
+    if args.demo:
         # Ejecutar solo la demostración en consola
         ejecutar_demo()
-    elif len(sys.argv) > 1 and sys.argv[1] == "--demo-gui":
+        return
+
+    from task_manager.gestor_tareas import GestorTareas
+
+    from task_manager.historial_acciones import HistorialAcciones
+    historial = HistorialAcciones(maximo_acciones=args.historial, horizonte=args.horizonte)
+
+    persistencia = None
+    if args.datos:
+        # Restaurar la instantánea y el diario guardados en el directorio
+        from task_manager.persistencia import Persistencia
+        persistencia = Persistencia(args.datos)
+    almacen = None
+    if args.sqlite:
+        # Almacenamiento alternativo: tareas y categorías en tablas SQLite indexadas
+        from task_manager.almacen_sqlite import AlmacenSQLite
+        almacen = AlmacenSQLite(args.sqlite)
+    # La interfaz gráfica consulta desde un hilo de trabajo mientras Tk modifica el gestor
+    concurrente = not args.serve
+    if args.instantanea:
+        # Las tareas se leen del archivo mapeado a medida que se muestran
+        from task_manager.instantanea_binaria import cargar_instantanea_binaria
+        gestor = cargar_instantanea_binaria(args.instantanea, historial, concurrente=concurrente)
+    else:
+        gestor = GestorTareas(persistencia=persistencia, almacen=almacen, historial=historial,
+                              concurrente=concurrente)
+
+    if args.demo_gui:
         # Iniciar la interfaz gráfica con datos de demostración precargados
-        from task_manager.gestor_tareas import GestorTareas
-        gestor = GestorTareas()
         gestor = cargar_datos_demo(gestor)
-        iniciar_interfaz_grafica(gestor)
-    else:
-        # Iniciar normalmente la interfaz gráfica
-        iniciar_interfaz_grafica()
+
+    if args.serve:
+        # Un solo gestor compartido por todos los clientes de la API
+        from task_manager.servidor import servir
+        servir(gestor, args.host, args.puerto)
+        return
+
+    # Tkinter solo se carga cuando realmente se abre la interfaz
+    from task_manager.interfaz_grafica import iniciar_interfaz_grafica
+    iniciar_interfaz_grafica(gestor)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
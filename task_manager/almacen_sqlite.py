@@ -0,0 +1,525 @@
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+from datetime import datetime
+from .models import Tarea, Prioridad, fecha_a_entero
+from .metricas import medido
+from .lista_tareas import combinar_avisos
+
+"""
+Almacenamiento opcional en SQLite
+---------------------------------
+Alternativa a ListaTareas/ArbolCategorias en memoria con la misma interfaz, respaldada
+por el módulo sqlite3 de la biblioteca estándar. Es conveniente cuando las tareas no
+caben cómodamente en memoria o deben sobrevivir entre ejecuciones porque:
+1. La tabla de tareas tiene índices por prioridad, fecha, estado y ruta de categoría,
+   así los ordenamientos y filtros se resuelven con SQL indexado y no recorriendo objetos.
+2. La jerarquía de categorías se guarda también como tabla de cierre (closure table):
+   una fila por cada par ancestro/descendiente, de modo que contar o filtrar las tareas
+   de una categoría y todas sus subcategorías es una sola consulta con JOIN, sin recursión.
+   Los listados de un subárbol salen en el mismo orden que en memoria: categoría por
+   categoría en preorden y, dentro de cada una, en el orden en que llegaron a ella
+   (columna llegada, indexada junto con la categoría).
+3. Las escrituras masivas se agrupan en una única transacción (lote()).
+
+Las tareas se materializan como objetos Tarea al leerlas; un mapa de identidad con
+referencias débiles garantiza que mientras alguien use una tarea, cada fila tenga un
+único objeto y que sus cambios se escriban en la base de datos.
+"""
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS tareas (
+    id INTEGER PRIMARY KEY,
+    titulo TEXT NOT NULL,
+    descripcion TEXT NOT NULL,
+    prioridad INTEGER NOT NULL,
+    vencimiento INTEGER,
+    categoria TEXT,
+    completada INTEGER NOT NULL DEFAULT 0,
+    orden INTEGER NOT NULL,
+    llegada INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_tareas_prioridad ON tareas (prioridad DESC, vencimiento DESC, id);
+CREATE INDEX IF NOT EXISTS idx_tareas_vencimiento ON tareas (vencimiento, id);
+CREATE INDEX IF NOT EXISTS idx_tareas_completada ON tareas (completada);
+CREATE INDEX IF NOT EXISTS idx_tareas_categoria ON tareas (categoria);
+CREATE INDEX IF NOT EXISTS idx_tareas_orden ON tareas (orden);
+
+CREATE TABLE IF NOT EXISTS categorias (
+    ruta TEXT PRIMARY KEY,
+    nombre TEXT NOT NULL,
+    padre TEXT,
+    profundidad INTEGER NOT NULL,
+    orden INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_categorias_padre ON categorias (padre, orden);
+
+CREATE TABLE IF NOT EXISTS cierre_categorias (
+    ancestro TEXT NOT NULL,
+    descendiente TEXT NOT NULL,
+    distancia INTEGER NOT NULL,
+    PRIMARY KEY (ancestro, descendiente)
+);
+CREATE INDEX IF NOT EXISTS idx_cierre_descendiente ON cierre_categorias (descendiente);
+"""
+
+_COLUMNAS = "id, titulo, descripcion, prioridad, vencimiento, categoria, completada"
+
+# Columna de la tabla para cada campo de Tarea
+_COLUMNA_DE_CAMPO = {
+    'titulo': 'titulo',
+    'descripcion': 'descripcion',
+    'prioridad': 'prioridad',
+    'fecha_vencimiento': 'vencimiento',
+    'categoria': 'categoria',
+    'completada': 'completada',
+}
+
+
+_ANTES_DE_TODO = -2**63  # Lugar de NULL al comparar vencimientos como lo hace SQLite
+
+
+def _rango_pendientes(desde, hasta):
+    """Condición SQL (y parámetros) de las tareas pendientes que vencen en [desde, hasta)"""
+    condicion = "tareas.completada = 0 AND tareas.vencimiento IS NOT NULL"
+    parametros = []
+    if desde is not None:
+        condicion += " AND tareas.vencimiento >= ?"
+        parametros.append(fecha_a_entero(desde))
+    if hasta is not None:
+        condicion += " AND tareas.vencimiento < ?"
+        parametros.append(fecha_a_entero(hasta))
+    return condicion, parametros
+
+
+def _estadisticas(almacen, desde, parametros, ahora):
+    """Equivalente en SQL de EstadisticasTareas.como_diccionario(): una sola consulta agregada"""
+    por_prioridad = ", ".join(f"COALESCE(SUM(tareas.prioridad = {p.value}), 0)" for p in Prioridad)
+    fila = almacen.ejecutar(
+        f"SELECT COUNT(*), COALESCE(SUM(tareas.completada), 0), {por_prioridad}, "
+        f"COALESCE(SUM(tareas.completada = 0 AND tareas.vencimiento < ?), 0) FROM tareas {desde}",
+        (fecha_a_entero(ahora or datetime.now()),) + tuple(parametros)).fetchone()
+    total, completadas = fila[0], fila[1]
+    return {
+        'total': total,
+        'pendientes': total - completadas,
+        'completadas': completadas,
+        'por_prioridad': dict(zip(Prioridad, fila[2:-1])),
+        'vencidas': fila[-1],
+    }
+
+
+class AlmacenSQLite:
+    """Conexión compartida por la lista de tareas y el árbol de categorías"""
+    def __init__(self, ruta=":memory:"):
+        # isolation_level=None: cada sentencia suelta se confirma sola y lote()
+        # abre transacciones explícitas para las escrituras masivas
+        self.conexion = sqlite3.connect(ruta, isolation_level=None, check_same_thread=False)
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        self.conexion.execute("PRAGMA synchronous=NORMAL")
+        self.conexion.executescript(_ESQUEMA)
+        columnas = {fila[1] for fila in self.conexion.execute("PRAGMA table_info(tareas)")}
+        if "llegada" not in columnas:
+            # Base creada antes de la columna: las tareas llegaron a su categoría al crearse
+            self.conexion.execute("ALTER TABLE tareas ADD COLUMN llegada INTEGER NOT NULL DEFAULT 0")
+            self.conexion.execute("UPDATE tareas SET llegada = orden")
+        self.conexion.execute("CREATE INDEX IF NOT EXISTS idx_tareas_categoria_llegada ON tareas (categoria, llegada)")
+        self.cerrojo = threading.RLock()
+        self._profundidad_lote = 0
+
+        self.lista_tareas = ListaTareasSQLite(self)
+        self.arbol_categorias = ArbolCategoriasSQLite(self)
+
+    def ejecutar(self, sql, parametros=()):
+        with self.cerrojo:
+            return self.conexion.execute(sql, parametros)
+
+    def consultar(self, sql, parametros=(), tamano_bloque=256):
+        """Recorre perezosamente las filas de una consulta, de a bloques"""
+        with self.cerrojo:
+            cursor = self.conexion.execute(sql, parametros)
+            filas = cursor.fetchmany(tamano_bloque)
+        while filas:
+            yield from filas
+            with self.cerrojo:
+                filas = cursor.fetchmany(tamano_bloque)
+
+    @contextmanager
+    def lote(self):
+        """Agrupa todas las escrituras del bloque en una sola transacción (admite anidamiento)"""
+        with self.cerrojo:
+            if self._profundidad_lote == 0:
+                self.conexion.execute("BEGIN")
+            self._profundidad_lote += 1
+            try:
+                yield
+            except BaseException:
+                self._profundidad_lote -= 1
+                if self._profundidad_lote == 0:
+                    self.conexion.execute("ROLLBACK")
+                raise
+            else:
+                self._profundidad_lote -= 1
+                if self._profundidad_lote == 0:
+                    self.conexion.execute("COMMIT")
+
+    def cerrar(self):
+        with self.cerrojo:
+            self.conexion.close()
+
+
+class ListaTareasSQLite:
+    def __init__(self, almacen):
+        self._almacen = almacen
+        self._identidad = weakref.WeakValueDictionary()  # id -> Tarea materializada
+        self._oyentes = []
+        self._diferido = 0
+        self._avisos = []
+        # Un solo contador numera el orden de creación y la llegada a cada categoría
+        fila = almacen.ejecutar("SELECT MAX(COALESCE(MAX(orden), 0), COALESCE(MAX(llegada), 0)) FROM tareas").fetchone()
+        self._siguiente_orden = fila[0] + 1
+
+    def __len__(self):
+        return self._almacen.ejecutar("SELECT COUNT(*) FROM tareas").fetchone()[0]
+
+    def __iter__(self):
+        return self._consultar_tareas("ORDER BY orden")
+
+    def __contains__(self, tarea_id):
+        return self._almacen.ejecutar("SELECT 1 FROM tareas WHERE id = ?", (tarea_id,)).fetchone() is not None
+
+    def suscribir(self, oyente):
+        self._oyentes.append(oyente)
+
+    def desuscribir(self, oyente):
+        if oyente in self._oyentes:
+            self._oyentes.remove(oyente)
+
+    def _avisar(self, evento, tarea, campo=None, valor_anterior=None):
+        if self._diferido:
+            self._avisos.append((evento, tarea, campo, valor_anterior))
+            return
+        for oyente in self._oyentes:
+            oyente(evento, tarea, campo, valor_anterior)
+
+    def diferir(self):
+        """Como ListaTareas.diferir(); los índices los mantiene SQLite, solo se posponen los avisos"""
+        self._diferido += 1
+
+    def reanudar(self):
+        """Como ListaTareas.reanudar(); no devuelve tareas porque el árbol no guarda contadores"""
+        self._diferido -= 1
+        if self._diferido:
+            return []
+        avisos, self._avisos = self._avisos, []
+        for aviso in combinar_avisos(avisos):
+            for oyente in self._oyentes:
+                oyente(*aviso)
+        return []
+
+    def _materializar(self, fila):
+        tarea = self._identidad.get(fila[0])
+        if tarea is None:
+            # Con el cerrojo: dos lectores que materializan la misma fila comparten la tarea
+            with self._almacen.cerrojo:
+                tarea = self._identidad.get(fila[0])
+                if tarea is None:
+                    tarea = Tarea.desde_diccionario({
+                        'id': fila[0], 'titulo': fila[1], 'descripcion': fila[2], 'prioridad': fila[3],
+                        'vencimiento': fila[4], 'categoria': fila[5], 'completada': bool(fila[6]),
+                    })
+                    tarea._observador = self
+                    self._identidad[tarea.id] = tarea
+        return tarea
+
+    def _consultar_tareas(self, condicion="", parametros=()):
+        for fila in self._almacen.consultar(f"SELECT {_COLUMNAS} FROM tareas {condicion}", parametros):
+            yield self._materializar(fila)
+
+    def _fila_de(self, tarea):
+        datos = tarea.a_diccionario()
+        fila = (datos['id'], datos['titulo'], datos['descripcion'], datos['prioridad'],
+                datos['vencimiento'], datos['categoria'], int(datos['completada']),
+                self._siguiente_orden, self._siguiente_orden)
+        self._siguiente_orden += 1
+        return fila
+
+    def agregar_tarea(self, tarea):
+        if tarea.id in self:
+            return tarea
+        self._almacen.ejecutar(f"INSERT INTO tareas ({_COLUMNAS}, orden, llegada) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                               self._fila_de(tarea))
+        tarea._observador = self
+        self._identidad[tarea.id] = tarea
+        self._avisar("agregada", tarea)
+        return tarea
+
+    def agregar_tareas(self, tareas):
+        """Inserción masiva en una sola transacción con executemany"""
+        tareas = list(tareas)
+        with self._almacen.lote():
+            self._almacen.conexion.executemany(
+                f"INSERT OR IGNORE INTO tareas ({_COLUMNAS}, orden, llegada) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (self._fila_de(tarea) for tarea in tareas))
+        for tarea in tareas:
+            tarea._observador = self
+            self._identidad[tarea.id] = tarea
+            self._avisar("agregada", tarea)
+        return tareas
+
+    def eliminar_tarea(self, tarea_id):
+        tarea = self.obtener_tarea(tarea_id)
+        if tarea:
+            self._almacen.ejecutar("DELETE FROM tareas WHERE id = ?", (tarea_id,))
+            tarea._observador = None
+            self._identidad.pop(tarea_id, None)
+            self._avisar("eliminada", tarea)
+        return tarea
+
+    def obtener_tarea(self, tarea_id):
+        tarea = self._identidad.get(tarea_id)
+        if tarea is not None:
+            return tarea
+        return next(self._consultar_tareas("WHERE id = ?", (tarea_id,)), None)
+
+    def actualizar_tarea(self, tarea_id, **kwargs):
+        tarea = self.obtener_tarea(tarea_id)
+        if tarea:
+            tarea.actualizar(**kwargs)
+            return tarea
+        return None
+
+    def tarea_modificada(self, tarea, campo, valor_anterior):
+        """Llamado por la tarea al cambiar un campo: escribe el nuevo valor en su fila"""
+        columna = _COLUMNA_DE_CAMPO[campo]
+        valor = tarea.a_diccionario()['vencimiento' if campo == 'fecha_vencimiento' else campo]
+        if campo == 'completada':
+            valor = int(valor)
+        if campo == 'categoria':
+            # Como en NodoCategoria, la tarea queda última entre las de su nueva categoría
+            cursor = self._almacen.ejecutar("UPDATE tareas SET categoria = ?, llegada = ? WHERE id = ?",
+                                            (valor, self._siguiente_orden, tarea.id))
+            self._siguiente_orden += 1
+        else:
+            cursor = self._almacen.ejecutar(f"UPDATE tareas SET {columna} = ? WHERE id = ?", (valor, tarea.id))
+        if cursor.rowcount:
+            self._avisar("modificada", tarea, campo, valor_anterior)
+
+    def obtener_estadisticas(self, ahora=None):
+        return _estadisticas(self._almacen, "", (), ahora)
+
+    def contar_pendientes_entre(self, desde=None, hasta=None):
+        condicion, parametros = _rango_pendientes(desde, hasta)
+        return self._almacen.ejecutar(f"SELECT COUNT(*) FROM tareas WHERE {condicion}", parametros).fetchone()[0]
+
+    def iter_pendientes_entre(self, desde=None, hasta=None):
+        """Rango sobre el índice por vencimiento, igual que ListaTareas.iter_pendientes_entre()"""
+        condicion, parametros = _rango_pendientes(desde, hasta)
+        return self._consultar_tareas(f"WHERE {condicion} ORDER BY vencimiento, id", parametros)
+
+    def obtener_todas_tareas(self):
+        return list(self)
+
+    def iter_por_prioridad(self):
+        return self._consultar_tareas("ORDER BY prioridad DESC, vencimiento DESC, id")
+
+    # Como ListaTareas.clave_prioridad/clave_fecha, pero SQLite ordena NULL antes que
+    # cualquier fecha: las tareas sin fecha van al final de su prioridad y al principio por fecha
+    @staticmethod
+    def clave_prioridad(tarea):
+        vencimiento = tarea._vencimiento if tarea._vencimiento is not None else _ANTES_DE_TODO
+        return (tarea._prioridad, vencimiento, -tarea.id)
+
+    @staticmethod
+    def clave_fecha(tarea):
+        vencimiento = tarea._vencimiento if tarea._vencimiento is not None else _ANTES_DE_TODO
+        return (vencimiento, tarea.id)
+
+    def iter_por_fecha(self):
+        return self._consultar_tareas("ORDER BY vencimiento, id")
+
+    def ordenar_por_prioridad(self):
+        return list(self.iter_por_prioridad())
+
+    def ordenar_por_fecha(self):
+        return list(self.iter_por_fecha())
+
+
+class NodoCategoriaSQLite:
+    """Nodo de categoría con la interfaz de NodoCategoria; sus hijos y tareas se consultan a la base"""
+    def __init__(self, arbol, ruta, nombre):
+        self._arbol = arbol
+        self.ruta = ruta
+        self.nombre = nombre
+
+    @property
+    def hijos(self):
+        # Diccionario nombre -> nodo, igual que NodoCategoria.hijos
+        return {nombre: NodoCategoriaSQLite(self._arbol, ruta, nombre) for ruta, nombre in
+                self._arbol._almacen.ejecutar(
+                    "SELECT ruta, nombre FROM categorias WHERE padre IS ? ORDER BY orden", (self.ruta or None,))}
+
+    @property
+    def padre(self):
+        if not self.ruta:
+            return None
+        ruta_padre = self.ruta.rpartition('/')[0]
+        return self._arbol.buscar_categoria(ruta_padre) if ruta_padre else self._arbol.raiz
+
+    @property
+    def tareas(self):
+        return list(self._arbol._almacen.lista_tareas._consultar_tareas(
+            "WHERE categoria = ? ORDER BY llegada", (self.ruta,)))
+
+    def agregar_tarea(self, tarea):
+        # En SQLite la pertenencia a la categoría es la propia columna categoria de la tarea
+        tarea.categoria = self.ruta
+
+    def eliminar_tarea(self, tarea):
+        # La tarea sale de la categoría al asignarle otra (o al eliminarla de la lista)
+        return tarea.categoria == self.ruta
+
+    def eliminar_tareas(self, tareas):
+        pass
+
+    def buscar_hijo(self, nombre):
+        ruta = f"{self.ruta}/{nombre}" if self.ruta else nombre
+        return self._arbol.buscar_categoria(ruta)
+
+    def __str__(self):
+        return self.nombre
+
+
+class ArbolCategoriasSQLite:
+    def __init__(self, almacen):
+        self._almacen = almacen
+        self.raiz = NodoCategoriaSQLite(self, "", "Raíz")
+        fila = almacen.ejecutar("SELECT COALESCE(MAX(orden), 0) FROM categorias").fetchone()
+        self._siguiente_orden = fila[0] + 1
+
+    @staticmethod
+    def _normalizar(ruta):
+        return "/".join(parte for parte in ruta.split('/') if parte)
+
+    def agregar_categoria(self, ruta):
+        """Agrega una categoría (y las intermedias que falten) junto con sus filas de cierre"""
+        partes = self._normalizar(ruta).split('/')
+        padre = None
+        with self._almacen.lote():
+            for i in range(len(partes)):
+                actual = "/".join(partes[:i + 1])
+                existe = self._almacen.ejecutar("SELECT 1 FROM categorias WHERE ruta = ?", (actual,)).fetchone()
+                if not existe:
+                    self._almacen.ejecutar(
+                        "INSERT INTO categorias (ruta, nombre, padre, profundidad, orden) VALUES (?, ?, ?, ?, ?)",
+                        (actual, partes[i], padre, i + 1, self._siguiente_orden))
+                    self._siguiente_orden += 1
+                    # La nueva categoría desciende de todos los ancestros de su padre y de sí misma
+                    self._almacen.ejecutar(
+                        "INSERT INTO cierre_categorias (ancestro, descendiente, distancia) "
+                        "SELECT ancestro, ?, distancia + 1 FROM cierre_categorias WHERE descendiente = ? "
+                        "UNION ALL SELECT ?, ?, 0",
+                        (actual, padre, actual, actual))
+                padre = actual
+        return NodoCategoriaSQLite(self, padre, partes[-1])
+
+    @medido("arbol.buscar_categoria")
+    def buscar_categoria(self, ruta):
+        if not ruta or ruta == "todas":
+            return None
+        ruta = self._normalizar(ruta)
+        fila = self._almacen.ejecutar("SELECT ruta, nombre FROM categorias WHERE ruta = ?", (ruta,)).fetchone()
+        return NodoCategoriaSQLite(self, fila[0], fila[1]) if fila else None
+
+    def agregar_tarea_a_categoria(self, tarea, ruta):
+        categoria = self.buscar_categoria(ruta)
+        if categoria:
+            categoria.agregar_tarea(tarea)
+            tarea.categoria = ruta
+            return True
+        return False
+
+    def obtener_todas_categorias(self):
+        """Devuelve (ruta, nodo, profundidad) en preorden, igual que ArbolCategorias"""
+        hijos = {}
+        for ruta, nombre, padre, profundidad in self._almacen.ejecutar(
+                "SELECT ruta, nombre, padre, profundidad FROM categorias ORDER BY orden"):
+            hijos.setdefault(padre, []).append((ruta, nombre, profundidad))
+
+        resultado = []
+        pendientes = list(reversed(hijos.get(None, [])))
+        while pendientes:
+            ruta, nombre, profundidad = pendientes.pop()
+            resultado.append((ruta, NodoCategoriaSQLite(self, ruta, nombre), profundidad))
+            pendientes.extend(reversed(hijos.get(ruta, [])))
+        return resultado
+
+    def actualizar_estadisticas(self, tarea):
+        # Los totales se calculan con SQL al consultarlos: no hay contadores que mantener
+        pass
+
+    def obtener_estadisticas(self, ruta, ahora=None):
+        """Totales de la categoría y sus subcategorías con una consulta agregada sobre la tabla de cierre"""
+        if not self.buscar_categoria(ruta):
+            return None
+        return _estadisticas(self._almacen,
+                             "JOIN cierre_categorias c ON tareas.categoria = c.descendiente WHERE c.ancestro = ?",
+                             (self._normalizar(ruta),), ahora)
+
+    def contar_pendientes_entre(self, ruta, desde=None, hasta=None):
+        if not self.buscar_categoria(ruta):
+            return None
+        condicion, parametros = _rango_pendientes(desde, hasta)
+        return self._almacen.ejecutar(
+            "SELECT COUNT(*) FROM tareas JOIN cierre_categorias c ON tareas.categoria = c.descendiente "
+            f"WHERE c.ancestro = ? AND {condicion}", [self._normalizar(ruta)] + parametros).fetchone()[0]
+
+    def iter_ids_pendientes_entre(self, ruta, desde=None, hasta=None):
+        if not self.buscar_categoria(ruta):
+            return iter(())
+        condicion, parametros = _rango_pendientes(desde, hasta)
+        filas = self._almacen.consultar(
+            "SELECT tareas.id FROM tareas JOIN cierre_categorias c ON tareas.categoria = c.descendiente "
+            f"WHERE c.ancestro = ? AND {condicion} ORDER BY tareas.vencimiento, tareas.id",
+            [self._normalizar(ruta)] + parametros)
+        return (fila[0] for fila in filas)
+
+    def _subarbol_en_preorden(self, ruta):
+        """Rutas de la categoría y de sus descendientes (tabla de cierre) en preorden"""
+        hijos = {}
+        for descendiente, padre in self._almacen.ejecutar(
+                "SELECT categorias.ruta, categorias.padre FROM categorias "
+                "JOIN cierre_categorias c ON categorias.ruta = c.descendiente "
+                "WHERE c.ancestro = ? ORDER BY categorias.orden", (ruta,)):
+            hijos.setdefault(padre, []).append(descendiente)
+        resultado = []
+        pendientes = [ruta]
+        while pendientes:
+            actual = pendientes.pop()
+            resultado.append(actual)
+            pendientes.extend(reversed(hijos.get(actual, [])))
+        return resultado
+
+    def iter_tareas_categoria(self, ruta, solo_pendientes=False, prioridad_minima=None):
+        """
+        Tareas de la categoría y sus subcategorías en el orden de ArbolCategorias: cada
+        categoría del subárbol en preorden es un recorrido del índice (categoria, llegada)
+        leído por bloques, así el llamador puede detenerse en cualquier momento.
+        """
+        if not self.buscar_categoria(ruta):
+            return iter(())
+        condicion = "WHERE categoria = ?"
+        filtros = []
+        if solo_pendientes:
+            condicion += " AND completada = 0"
+        if prioridad_minima:
+            condicion += " AND prioridad >= ?"
+            filtros.append(prioridad_minima.value)
+        condicion += " ORDER BY llegada"
+        lista = self._almacen.lista_tareas
+        return (tarea for categoria in self._subarbol_en_preorden(self._normalizar(ruta))
+                for tarea in lista._consultar_tareas(condicion, [categoria] + filtros))
+
+    def obtener_todas_tareas_categoria(self, ruta):
+        return list(self.iter_tareas_categoria(ruta))
@@ -0,0 +1,191 @@
+from array import array
+from bisect import bisect_left
+from .models import (generador_ids, fecha_a_entero, entero_a_fecha,
+                     prioridad_desde_valor, internar_categoria)
+
+"""
+Estructura de datos: Almacén columnar (struct of arrays)
+--------------------------------------------------------
+En lugar de un objeto por tarea, el almacén guarda cada campo en su propia columna:
+arreglos tipados (array) para los campos numéricos y listas para los textos.
+Es conveniente para conjuntos muy grandes de tareas porque:
+1. Un entero dentro de un array ocupa 8 bytes (o 1 byte) en lugar de un objeto completo.
+2. No hay encabezado de objeto ni diccionario de atributos por tarea.
+3. Las rutas de categoría se internan, así que cada ruta distinta se guarda una sola vez.
+4. Las vistas (VistaTarea) conservan la misma interfaz de atributos que Tarea, de modo
+   que el código que lee tareas puede usarlas sin cambios.
+"""
+
+_SIN_FECHA = -2**63  # Marca para tareas sin fecha de vencimiento
+_PENDIENTE, _COMPLETADA, _ELIMINADA = 0, 1, -1
+
+class VistaTarea:
+    """
+    Vista liviana sobre una fila del almacén con la misma interfaz que Tarea.
+    La vista guarda el número de fila, que es estable hasta que se llama a compactar().
+    """
+    __slots__ = ('_almacen', '_fila')
+
+    def __init__(self, almacen, fila):
+        self._almacen = almacen
+        self._fila = fila
+
+    @property
+    def id(self):
+        return self._almacen._ids[self._fila]
+
+    @property
+    def titulo(self):
+        return self._almacen._titulos[self._fila]
+
+    @titulo.setter
+    def titulo(self, valor):
+        self._almacen._titulos[self._fila] = valor
+
+    @property
+    def descripcion(self):
+        return self._almacen._descripciones[self._fila]
+
+    @descripcion.setter
+    def descripcion(self, valor):
+        self._almacen._descripciones[self._fila] = valor
+
+    @property
+    def prioridad(self):
+        return prioridad_desde_valor(self._almacen._prioridades[self._fila])
+
+    @prioridad.setter
+    def prioridad(self, valor):
+        self._almacen._prioridades[self._fila] = valor.value
+
+    @property
+    def fecha_vencimiento(self):
+        valor = self._almacen._fechas[self._fila]
+        return None if valor == _SIN_FECHA else entero_a_fecha(valor)
+
+    @fecha_vencimiento.setter
+    def fecha_vencimiento(self, valor):
+        entero = fecha_a_entero(valor)
+        self._almacen._fechas[self._fila] = _SIN_FECHA if entero is None else entero
+
+    @property
+    def categoria(self):
+        return self._almacen._categorias[self._fila]
+
+    @categoria.setter
+    def categoria(self, valor):
+        self._almacen._categorias[self._fila] = internar_categoria(valor)
+
+    @property
+    def completada(self):
+        return self._almacen._estados[self._fila] == _COMPLETADA
+
+    @completada.setter
+    def completada(self, valor):
+        self._almacen._estados[self._fila] = _COMPLETADA if valor else _PENDIENTE
+
+    def __str__(self):
+        estado = "Completada" if self.completada else "Pendiente"
+        return f"[{self.prioridad}] {self.titulo} - Vence: {self.fecha_vencimiento.strftime('%d/%m/%Y')} - {estado}"
+
+    def __eq__(self, otra):
+        return isinstance(otra, VistaTarea) and otra._almacen is self._almacen and otra._fila == self._fila
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def marcar_completada(self):
+        self.completada = True
+
+    def marcar_pendiente(self):
+        self.completada = False
+
+    def actualizar(self, titulo=None, descripcion=None, prioridad=None, fecha_vencimiento=None, categoria=None):
+        if titulo is not None:
+            self.titulo = titulo
+        if descripcion is not None:
+            self.descripcion = descripcion
+        if prioridad is not None:
+            self.prioridad = prioridad
+        if fecha_vencimiento is not None:
+            self.fecha_vencimiento = fecha_vencimiento
+        if categoria is not None:
+            self.categoria = categoria
+
+
+class AlmacenTareas:
+    """
+    Los ids los entrega el generador monotónico del proceso, así que las filas quedan
+    ordenadas por id y se buscan con bisect, sin un diccionario id -> fila que
+    costaría más memoria que la propia fila. Las filas eliminadas se marcan y se
+    descartan al compactar.
+    """
+    def __init__(self):
+        self._ids = array('q')
+        self._prioridades = array('b')
+        self._fechas = array('q')
+        self._estados = array('b')
+        self._titulos = []
+        self._descripciones = []
+        self._categorias = []
+        self._eliminadas = 0
+
+    def __len__(self):
+        return len(self._ids) - self._eliminadas
+
+    def __iter__(self):
+        estados = self._estados
+        for fila in range(len(self._ids)):
+            if estados[fila] != _ELIMINADA:
+                yield VistaTarea(self, fila)
+
+    def __contains__(self, tarea_id):
+        return self._buscar_fila(tarea_id) is not None
+
+    def _columnas(self):
+        return (self._ids, self._prioridades, self._fechas, self._estados,
+                self._titulos, self._descripciones, self._categorias)
+
+    def _buscar_fila(self, tarea_id):
+        fila = bisect_left(self._ids, tarea_id)
+        if fila < len(self._ids) and self._ids[fila] == tarea_id and self._estados[fila] != _ELIMINADA:
+            return fila
+        return None
+
+    def agregar(self, titulo, descripcion, prioridad, fecha_vencimiento, categoria=None):
+        """Agrega una tarea y devuelve su vista"""
+        fecha = fecha_a_entero(fecha_vencimiento)
+
+        self._ids.append(generador_ids.siguiente())
+        self._prioridades.append(prioridad.value)
+        self._fechas.append(_SIN_FECHA if fecha is None else fecha)
+        self._estados.append(_PENDIENTE)
+        self._titulos.append(titulo)
+        self._descripciones.append(descripcion)
+        self._categorias.append(internar_categoria(categoria))
+        return VistaTarea(self, len(self._ids) - 1)
+
+    def obtener(self, tarea_id):
+        fila = self._buscar_fila(tarea_id)
+        return VistaTarea(self, fila) if fila is not None else None
+
+    def eliminar(self, tarea_id):
+        fila = self._buscar_fila(tarea_id)
+        if fila is None:
+            return False
+        self._estados[fila] = _ELIMINADA
+        self._titulos[fila] = self._descripciones[fila] = self._categorias[fila] = None
+        self._eliminadas += 1
+        return True
+
+    def compactar(self):
+        """Descarta las filas eliminadas. Invalida las vistas obtenidas antes de compactar."""
+        if not self._eliminadas:
+            return
+        vivas = [fila for fila, estado in enumerate(self._estados) if estado != _ELIMINADA]
+        for columna in self._columnas():
+            nueva = [columna[fila] for fila in vivas]
+            if isinstance(columna, array):
+                nueva = array(columna.typecode, nueva)
+            columna[:] = nueva
+        self._eliminadas = 0
@@ -1,3 +1,8 @@
+import logging
+from .estadisticas import EstadisticasTareas
+from .models import fecha_a_entero
+from .metricas import medido
+
 """
 Estructura de datos: Árbol (Tree)
 ---------------------------------
@@ -9,32 +14,79 @@ Es conveniente usar árboles para organizar categorías porque:
 4. La estructura refleja la organización mental que los usuarios tienen de sus tareas.
 5. Las operaciones de búsqueda son eficientes, especialmente cuando el árbol está bien balanceado.
 6. Permite agregar nuevas categorías en cualquier nivel sin reestructurar todo el sistema.
+
+Cada nodo guarda sus hijos en un diccionario nombre -> nodo y una referencia a su padre,
+y el árbol mantiene además un índice ruta completa -> nodo. Así buscar una categoría por
+su ruta cuesta O(1) (una sola consulta al índice) sin importar la profundidad ni cuántas
+categorías hermanas haya.
+
+Cada nodo mantiene también los contadores agregados de todo su subárbol (total,
+pendientes, completadas, por prioridad y vencidas). Al agregar, quitar o modificar
+una tarea solo se actualizan su nodo y los ancestros (O(profundidad)), de modo que
+mostrar los totales de una categoría no recorre sus tareas.
 """
 
+logger = logging.getLogger(__name__)
+
 class NodoCategoria:
-    def __init__(self, nombre):
+    def __init__(self, nombre, ruta=""):
         self.nombre = nombre
-        self.hijos = []
-        self.tareas = []
+        self.ruta = ruta  # Ruta completa, p. ej. 'Trabajo/Proyecto A' ("" para la raíz)
+        self.padre = None
+        self.hijos = {}  # nombre -> NodoCategoria, en orden de creación
+        self._tareas = {}  # id -> (tarea, estado con que se sumó a las estadísticas)
+        self.estadisticas = EstadisticasTareas()  # Contadores de todo el subárbol
+    
+    @property
+    def tareas(self):
+        """Tareas asignadas directamente a esta categoría, en orden de llegada"""
+        return [tarea for tarea, _ in self._tareas.values()]
         
     def agregar_hijo(self, nodo_hijo):
-        self.hijos.append(nodo_hijo)
+        nodo_hijo.padre = self
+        self.hijos[nodo_hijo.nombre] = nodo_hijo
         return nodo_hijo
         
+    def _propagar(self, quitar=None, poner=None):
+        """Actualiza los contadores de este nodo y de todos sus ancestros"""
+        nodo = self
+        while nodo is not None:
+            if quitar is not None:
+                nodo.estadisticas.restar(quitar)
+            if poner is not None:
+                nodo.estadisticas.sumar(poner)
+            nodo = nodo.padre
+        
     def agregar_tarea(self, tarea):
-        self.tareas.append(tarea)
+        if tarea.id in self._tareas:
+            return
+        estado = EstadisticasTareas.estado(tarea)
+        self._tareas[tarea.id] = (tarea, estado)
+        self._propagar(poner=estado)
         
     def eliminar_tarea(self, tarea):
-        if tarea in self.tareas:
-            self.tareas.remove(tarea)
-            return True
-        return False
+        entrada = self._tareas.pop(tarea.id, None)
+        if entrada is None:
+            return False
+        self._propagar(quitar=entrada[1])
+        return True
+    
+    def eliminar_tareas(self, tareas):
+        for tarea in tareas:
+            self.eliminar_tarea(tarea)
+    
+    def actualizar_tarea(self, tarea):
+        """Vuelve a contar una tarea de esta categoría cuyo estado cambió"""
+        entrada = self._tareas.get(tarea.id)
+        if entrada is None:
+            return
+        estado = EstadisticasTareas.estado(tarea)
+        if estado != entrada[1]:
+            self._tareas[tarea.id] = (tarea, estado)
+            self._propagar(quitar=entrada[1], poner=estado)
         
     def buscar_hijo(self, nombre):
-        for hijo in self.hijos:
-            if hijo.nombre == nombre:
-                return hijo
-        return None
+        return self.hijos.get(nombre)
         
     def __str__(self):
         return self.nombre
@@ -42,99 +94,148 @@ class NodoCategoria:
 class ArbolCategorias:
     def __init__(self):
         self.raiz = NodoCategoria("Raíz")
+        self._por_ruta = {}  # ruta completa -> NodoCategoria
+    
+    @staticmethod
+    def _normalizar(ruta):
+        """Quita las barras sobrantes: '/Trabajo//Proyecto A/' -> 'Trabajo/Proyecto A'"""
+        return "/".join(parte for parte in ruta.split('/') if parte)
         
     def agregar_categoria(self, ruta):
         """Agrega una categoría siguiendo una ruta como 'Trabajo/Proyecto A/Fase 1'"""
-        partes = ruta.split('/')
-        actual = self.raiz
+        nodo = self._por_ruta.get(ruta)
+        if nodo:
+            return nodo
         
-        for parte in partes:
+        # Solo se recorre la ruta cuando falta crear algún nivel
+        actual = self.raiz
+        for parte in self._normalizar(ruta).split('/'):
             hijo = actual.buscar_hijo(parte)
             if not hijo:
-                hijo = actual.agregar_hijo(NodoCategoria(parte))
+                ruta_hijo = f"{actual.ruta}/{parte}" if actual.ruta else parte
+                hijo = actual.agregar_hijo(NodoCategoria(parte, ruta_hijo))
+                self._por_ruta[ruta_hijo] = hijo
             actual = hijo
             
         return actual
         
+    @medido("arbol.buscar_categoria")
     def buscar_categoria(self, ruta):
-        """Encuentra una categoría siguiendo una ruta"""
-        print(f"Buscando categoría con ruta: '{ruta}'")  # Depuración
-        
-        # Si la ruta es vacía, None o "todas", manejarlo adecuadamente
-        if not ruta:
+        """Encuentra una categoría por su ruta completa en O(1)"""
+        # Si la ruta es vacía, None o "todas" (caso especial) no hay categoría
+        if not ruta or ruta == "todas":
             return None
         
-        if ruta == "todas":
-            return None  # Caso especial para "todas"
-        
-        # Dividir la ruta en partes y comenzar desde la raíz
-        partes = ruta.split('/')
-        actual = self.raiz
-        
-        # Si la primera parte es vacía, es porque la ruta comienza con '/'
-        if partes and partes[0] == '':
-            partes = partes[1:]  # Omitir la primera parte vacía
-        
-        for parte in partes:
-            if not parte:  # Saltar partes vacías
-                continue
-            
-            print(f"  Buscando parte: '{parte}'")  # Depuración
-            hijo = actual.buscar_hijo(parte)
-            if not hijo:
-                print(f"  No se encontró hijo '{parte}'")  # Depuración
-                return None
-            actual = hijo
+        nodo = self._por_ruta.get(ruta)
+        if nodo is None and '/' in ruta:
+            # Rutas con barras al principio, al final o repetidas
+            nodo = self._por_ruta.get(self._normalizar(ruta))
+        return nodo
+        
+    def actualizar_estadisticas(self, tarea):
+        """Avisa que cambió la prioridad, fecha o estado de una tarea de alguna categoría"""
+        nodo = self.buscar_categoria(tarea.categoria)
+        if nodo:
+            nodo.actualizar_tarea(tarea)
+    
+    def obtener_estadisticas(self, ruta, ahora=None):
+        """
+        Contadores de una categoría y todas sus subcategorías, sin recorrer tareas.
         
-        print(f"  Encontrada categoría: {actual.nombre}")  # Depuración
-        return actual
+        Returns:
+            Diccionario con total, pendientes, completadas, por_prioridad y vencidas,
+            o None si la categoría no existe
+        """
+        nodo = self.buscar_categoria(ruta)
+        return nodo.estadisticas.como_diccionario(ahora) if nodo else None
+    
+    def contar_pendientes_entre(self, ruta, desde=None, hasta=None):
+        """Tareas pendientes de la categoría (y subcategorías) que vencen en [desde, hasta); None si no existe"""
+        nodo = self.buscar_categoria(ruta)
+        return nodo.estadisticas.contar_entre(fecha_a_entero(desde), fecha_a_entero(hasta)) if nodo else None
+    
+    def iter_ids_pendientes_entre(self, ruta, desde=None, hasta=None):
+        """
+        Ids de las tareas pendientes de la categoría (y subcategorías) que vencen en
+        [desde, hasta), en orden de fecha, leídos de las fechas que guarda el contador del nodo
+        """
+        nodo = self.buscar_categoria(ruta)
+        if nodo is None:
+            return iter(())
+        return nodo.estadisticas.ids_entre(fecha_a_entero(desde), fecha_a_entero(hasta))
         
     def agregar_tarea_a_categoria(self, tarea, ruta):
-        print(f"Intentando agregar tarea '{tarea.titulo}' a categoría '{ruta}'")  # Depuración
+        logger.debug("Agregando tarea '%s' a categoría '%s'", tarea.titulo, ruta)
         categoria = self.buscar_categoria(ruta)
         if categoria:
-            print(f"Categoría encontrada: {categoria.nombre}")  # Depuración
             # Primero verificamos si la tarea ya estaba en otra categoría
             if tarea.categoria and tarea.categoria != ruta:
                 # Intentar eliminar de la categoría anterior
                 cat_anterior = self.buscar_categoria(tarea.categoria)
                 if cat_anterior:
-                    print(f"Eliminando tarea de categoría anterior: {tarea.categoria}")  # Depuración
+                    logger.debug("Eliminando tarea de categoría anterior: '%s'", tarea.categoria)
                     cat_anterior.eliminar_tarea(tarea)
             
             # Agregar a la nueva categoría
             categoria.agregar_tarea(tarea)
             tarea.categoria = ruta  # Asegurarse de establecer la ruta completa como categoría
-            print(f"Tarea añadida a categoría '{ruta}', tarea.categoria = '{tarea.categoria}'")  # Depuración
             return True
         
-        print(f"Categoría no encontrada: '{ruta}'")  # Depuración
+        logger.debug("Categoría no encontrada: '%s'", ruta)
         return False
         
     def obtener_todas_categorias(self):
+        """Todas las categorías en preorden como (ruta, nodo, profundidad), sin recursión"""
         resultado = []
+        pendientes = [(hijo, 1) for hijo in reversed(self.raiz.hijos.values())]
+        while pendientes:
+            nodo, profundidad = pendientes.pop()
+            resultado.append((nodo.ruta, nodo, profundidad))
+            pendientes.extend((hijo, profundidad + 1) for hijo in reversed(nodo.hijos.values()))
+        return resultado
+
+    def iter_tareas_categoria(self, ruta, solo_pendientes=False, prioridad_minima=None):
+        """
+        Recorre las tareas de una categoría y de todas sus subcategorías (en preorden)
+        sin construir la lista completa: el llamador puede detenerse en cuanto tenga
+        las que necesita. Usa una pila explícita, así la profundidad del árbol no
+        está limitada por el límite de recursión de Python.
         
-        def recorrer(nodo, profundidad=0, ruta=""):
-            # Determinar la ruta actual
-            if nodo == self.raiz:
-                ruta_actual = ""  # La raíz no tiene ruta
-            else:
-                ruta_actual = ruta + "/" + nodo.nombre if ruta else nodo.nombre
+        Args:
+            ruta: Ruta de la categoría
+            solo_pendientes: Omitir las tareas completadas
+            prioridad_minima: Omitir las tareas con prioridad menor a esta
             
-            # Agregar nodo actual al resultado, excepto la raíz
-            if nodo != self.raiz:
-                resultado.append((ruta_actual, nodo, profundidad))
+        Yields:
+            Tareas de la categoría y sus subcategorías
+        """
+        categoria = self.buscar_categoria(ruta)
+        if not categoria:
+            return
+        minimo = prioridad_minima.value if prioridad_minima else 0
+        
+        pendientes = [categoria]
+        while pendientes:
+            nodo = pendientes.pop()
+            # Los contadores del subárbol permiten saltar ramas sin tareas que cumplan el filtro
+            estadisticas = nodo.estadisticas
+            if solo_pendientes and not estadisticas.pendientes:
+                continue
+            if minimo and not sum(estadisticas.por_prioridad[minimo:]):
+                continue
             
-            # Recorrer hijos
-            for hijo in nodo.hijos:
-                recorrer(hijo, profundidad + 1, ruta_actual)
-                
-        recorrer(self.raiz)
-        return resultado 
+            # Se copia la lista del nodo: el recorrido puede pausarse mientras cambian las tareas
+            for tarea in nodo.tareas:
+                if solo_pendientes and tarea.completada:
+                    continue
+                if tarea._prioridad < minimo:
+                    continue
+                yield tarea
+            pendientes.extend(reversed(nodo.hijos.values()))
 
     def obtener_todas_tareas_categoria(self, ruta):
         """
-        Obtiene todas las tareas de una categoría y sus subcategorías recursivamente.
+        Obtiene todas las tareas de una categoría y sus subcategorías.
         
         Args:
             ruta: Ruta de la categoría
@@ -142,25 +243,4 @@ class ArbolCategorias:
         Returns:
             Lista de tareas de la categoría y todas sus subcategorías
         """
-        print(f"Obteniendo todas las tareas para categoría: '{ruta}'")
-        categoria = self.buscar_categoria(ruta)
-        if not categoria:
-            print(f"  Categoría '{ruta}' no encontrada")
-            return []
-            
-        # Recolectar todas las tareas recursivamente
-        todas_tareas = []
-        
-        def recolectar_tareas(nodo):
-            # Agregar tareas de este nodo
-            todas_tareas.extend(nodo.tareas)
-            print(f"  Agregadas {len(nodo.tareas)} tareas de '{nodo.nombre}'")
-            
-            # Recursivamente agregar tareas de los hijos
-            for hijo in nodo.hijos:
-                recolectar_tareas(hijo)
-                
-        # Comenzar recolección
-        recolectar_tareas(categoria)
-        print(f"  Total de tareas encontradas: {len(todas_tareas)}")
-        return todas_tareas 
\ No newline at end of file
+        return list(self.iter_tareas_categoria(ruta))
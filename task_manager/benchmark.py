@@ -0,0 +1,814 @@
+import argparse
+import asyncio
+import gc
+import json
+import platform
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from .models import Prioridad, Tarea, fecha_a_entero
+from .almacen_tareas import AlmacenTareas
+from .metricas import metricas
+
+"""
+Benchmarks del gestor de tareas.
+
+Uso:
+    python -m task_manager.benchmark --memoria -n 100000
+    python -m task_manager.benchmark -n 20000 --profundidad 3 --ramas 4 --salida resultados.json
+    python -m task_manager.benchmark --base resultados.json   (marca las regresiones)
+    python -m task_manager.benchmark --estres --hilos 1,2,4,8  (lectores concurrentes)
+    python -m task_manager.benchmark --http --clientes 8 --pipeline 8  (API de main.py --serve)
+
+También se puede ejecutar como: python main.py --bench [opciones]
+"""
+
+# Peso de cada operación en la fase mixta si no se indica otra mezcla
+MEZCLA_PREDETERMINADA = {"crear": 3, "buscar": 4, "actualizar": 3, "eliminar": 1, "deshacer": 1, "rehacer": 1}
+
+# Peso de cada solicitud en la carga HTTP (--http)
+MEZCLA_HTTP = {"leer": 5, "consultar": 2, "actualizar": 2, "crear": 1, "estadisticas": 1, "lote": 0.2}
+
+class _TareaConDiccionario:
+    """Réplica de la Tarea original (atributos en __dict__, datetime y enum por tarea) usada como referencia"""
+    def __init__(self, titulo, descripcion, prioridad, fecha_vencimiento, categoria=None):
+        self.id = id(self)
+        self.titulo = titulo
+        self.descripcion = descripcion
+        self.prioridad = prioridad
+        self.fecha_vencimiento = fecha_vencimiento
+        self.categoria = categoria
+        self.completada = False
+
+
+def _medir_bytes(n, crear):
+    """Devuelve los bytes asignados por tarea al crear n tareas con la función dada"""
+    prioridades = list(Prioridad)
+    base = datetime(2025, 1, 1)
+    # Los textos se generan antes de medir: son iguales en todas las representaciones
+    titulos = [f"Tarea {i}" for i in range(n)]
+    descripciones = [f"Descripción de la tarea {i}" for i in range(n)]
+
+    gc.collect()
+    tracemalloc.start()
+    inicio = tracemalloc.get_traced_memory()[0]
+
+    contenedor = []
+    for i in range(n):
+        # La fecha y la ruta se construyen por tarea, como ocurriría al leerlas de un archivo
+        fecha = base + timedelta(hours=i % 5000)
+        categoria = "/".join(("Trabajo", f"Proyecto {i % 10}"))
+        contenedor.append(crear(titulos[i], descripciones[i], prioridades[i % 4], fecha, categoria))
+
+    usado = tracemalloc.get_traced_memory()[0] - inicio
+    tracemalloc.stop()
+    del contenedor
+    return usado / n
+
+
+def medir_memoria_por_tarea(n=100000):
+    """
+    Compara los bytes por tarea de la representación original, la Tarea compacta
+    con __slots__ y el almacén columnar.
+
+    Returns:
+        Diccionario {representación: bytes por tarea}
+    """
+    almacen = AlmacenTareas()
+    resultados = {
+        "original (__dict__)": _medir_bytes(n, _TareaConDiccionario),
+        "Tarea compacta (__slots__)": _medir_bytes(n, Tarea),
+        # El almacén guarda las filas por sí mismo; la vista devuelta se descarta
+        "AlmacenTareas (columnar)": _medir_bytes(n, lambda *campos: almacen.agregar(*campos) and None),
+    }
+    return resultados
+
+
+class GeneradorCarga:
+    """
+    Genera de forma reproducible (con semilla) las categorías y tareas de una carga sintética.
+
+    Args:
+        semilla: Semilla del generador aleatorio; la misma semilla produce la misma carga
+        tareas: Cantidad de tareas a crear
+        profundidad: Niveles del árbol de categorías
+        ramas: Subcategorías por categoría (fan-out)
+        proporcion_urgentes: Fracción de tareas con prioridad URGENTE
+    """
+    def __init__(self, semilla=42, tareas=10000, profundidad=3, ramas=4, proporcion_urgentes=0.1):
+        self.azar = random.Random(semilla)
+        self.tareas = tareas
+        self.proporcion_urgentes = proporcion_urgentes
+        self.base = datetime(2025, 1, 1)
+
+        # Árbol completo de categorías, nivel por nivel
+        self.categorias = []
+        nivel = [""]
+        for _ in range(profundidad):
+            nivel = [f"{padre}/C{i}" if padre else f"C{i}" for padre in nivel for i in range(ramas)]
+            self.categorias.extend(nivel)
+
+    def prioridad(self):
+        if self.azar.random() < self.proporcion_urgentes:
+            return Prioridad.URGENTE
+        return self.azar.choice((Prioridad.BAJA, Prioridad.MEDIA, Prioridad.ALTA))
+
+    def fecha(self):
+        return self.base + timedelta(hours=self.azar.randrange(24 * 365))
+
+    def tarea(self, i):
+        """Argumentos de GestorTareas.crear_tarea para la tarea número i"""
+        categoria = self.azar.choice(self.categorias) if self.categorias else None
+        return (f"Tarea {i}", f"Descripción de la tarea {i}", self.prioridad(), self.fecha(), categoria)
+
+    def iter_tareas(self):
+        return (self.tarea(i) for i in range(self.tareas))
+
+    def operaciones(self, cantidad, mezcla):
+        """Secuencia de nombres de operación según los pesos de la mezcla"""
+        nombres = list(mezcla)
+        return self.azar.choices(nombres, weights=[mezcla[nombre] for nombre in nombres], k=cantidad)
+
+
+def _cronometrar(resultados, nombre, funcion, repeticiones):
+    """Ejecuta funcion(i) para i en range(repeticiones) y guarda el tiempo por operación"""
+    inicio = time.perf_counter()
+    for i in range(repeticiones):
+        funcion(i)
+    _anotar(resultados, nombre, repeticiones, time.perf_counter() - inicio)
+
+
+def _anotar(resultados, nombre, repeticiones, segundos):
+    resultados[nombre] = {
+        'operaciones': repeticiones,
+        'segundos': segundos,
+        'us_por_operacion': segundos / repeticiones * 1e6 if repeticiones else 0.0,
+        'operaciones_por_segundo': repeticiones / segundos if segundos > 0 else 0.0,
+    }
+
+
+def ejecutar_carga(tareas=10000, profundidad=3, ramas=4, proporcion_urgentes=0.1, mezcla=None,
+                   operaciones=None, semilla=42, almacen="memoria"):
+    """
+    Mide cada operación del gestor sobre una carga sintética reproducible.
+
+    Args:
+        tareas: Tareas creadas en la fase inicial
+        profundidad, ramas: Forma del árbol de categorías
+        proporcion_urgentes: Fracción de tareas urgentes
+        mezcla: Pesos {operación: peso} de la fase mixta (ver MEZCLA_PREDETERMINADA)
+        operaciones: Operaciones de cada fase de consulta/modificación (por defecto tareas // 4)
+        semilla: Semilla de la carga
+        almacen: "memoria" o "sqlite"
+
+    Returns:
+        Diccionario {fase: {'operaciones', 'segundos', 'us_por_operacion', 'operaciones_por_segundo'}}
+    """
+    from .gestor_tareas import GestorTareas
+
+    mezcla = mezcla or MEZCLA_PREDETERMINADA
+    operaciones = operaciones or max(1, tareas // 4)
+    carga = GeneradorCarga(semilla, tareas, profundidad, ramas, proporcion_urgentes)
+    azar = carga.azar
+
+    if almacen == "sqlite":
+        from .almacen_sqlite import AlmacenSQLite
+        gestor = GestorTareas(almacen=AlmacenSQLite())
+    else:
+        gestor = GestorTareas()
+    for ruta in carga.categorias:
+        gestor.agregar_categoria(ruta)
+
+    # Las métricas propias se apagan para medir solo el costo de las operaciones
+    habilitadas = metricas.habilitado
+    metricas.habilitado = False
+    resultados = {}
+    try:
+        especificaciones = list(carga.iter_tareas())
+        creadas = []
+        _cronometrar(resultados, "crear", lambda i: creadas.append(gestor.crear_tarea(*especificaciones[i])), tareas)
+        ids = [tarea.id for tarea in creadas]
+
+        muestra = [azar.choice(ids) for _ in range(operaciones)]
+        _cronometrar(resultados, "buscar", lambda i: gestor.lista_tareas.obtener_tarea(muestra[i]), operaciones)
+
+        cambios = [{'prioridad': carga.prioridad(), 'fecha_vencimiento': carga.fecha()} for _ in range(operaciones)]
+        _cronometrar(resultados, "actualizar", lambda i: gestor.actualizar_tarea(muestra[i], **cambios[i]), operaciones)
+
+        # Las mismas modificaciones agrupadas en una transacción (incluye el costo de confirmarla)
+        cambios_lote = [{'prioridad': carga.prioridad(), 'completada': azar.random() < 0.5} for _ in range(operaciones)]
+        inicio = time.perf_counter()
+        with gestor.transaccion("benchmark"):
+            for i in range(operaciones):
+                gestor.actualizar_tarea(muestra[i], **cambios_lote[i])
+        _anotar(resultados, "actualizar_transaccion", operaciones, time.perf_counter() - inicio)
+
+        repeticiones_orden = max(1, min(20, 200000 // max(tareas, 1)))
+        _cronometrar(resultados, "ordenar", lambda i: (gestor.lista_tareas.ordenar_por_prioridad(),
+                                                       gestor.lista_tareas.ordenar_por_fecha()), repeticiones_orden)
+
+        consultas = min(operaciones, 200)
+        rutas = [azar.choice(carga.categorias) for _ in range(consultas)] if carga.categorias else []
+        _cronometrar(resultados, "consultar_categoria",
+                     lambda i: gestor.obtener_tareas_por_categoria(rutas[i]), len(rutas))
+        _cronometrar(resultados, "estadisticas_categoria",
+                     lambda i: gestor.obtener_estadisticas_categoria(rutas[i]), len(rutas))
+
+        # Fase mixta: la secuencia de operaciones también sale de la semilla
+        secuencia = carga.operaciones(operaciones, mezcla)
+        vivas = list(ids)
+
+        def operacion_mixta(i):
+            nombre = secuencia[i]
+            if nombre == "crear":
+                vivas.append(gestor.crear_tarea(*carga.tarea(tareas + i)).id)
+            elif nombre == "buscar" and vivas:
+                gestor.lista_tareas.obtener_tarea(azar.choice(vivas))
+            elif nombre == "actualizar" and vivas:
+                gestor.actualizar_tarea(azar.choice(vivas), prioridad=carga.prioridad())
+            elif nombre == "eliminar" and vivas:
+                posicion = azar.randrange(len(vivas))
+                vivas[posicion], vivas[-1] = vivas[-1], vivas[posicion]
+                gestor.eliminar_tarea(vivas.pop())
+            elif nombre == "deshacer":
+                gestor.deshacer()
+            elif nombre == "rehacer":
+                gestor.rehacer()
+        _cronometrar(resultados, "mixta", operacion_mixta, operaciones)
+
+        pasos = min(operaciones, gestor.historial_acciones.cantidad_deshacer())
+        _cronometrar(resultados, "deshacer", lambda i: gestor.deshacer(), pasos)
+        _cronometrar(resultados, "rehacer", lambda i: gestor.rehacer(), pasos)
+
+        urgentes = min(operaciones, gestor.cola_urgentes.tamaño())
+        _cronometrar(resultados, "procesar_urgente", lambda i: gestor.procesar_siguiente_urgente(), urgentes)
+
+        presentes = [tarea.id for tarea in gestor.lista_tareas]
+        azar.shuffle(presentes)
+        a_eliminar = presentes[:operaciones]
+        _cronometrar(resultados, "eliminar", lambda i: gestor.eliminar_tarea(a_eliminar[i]), len(a_eliminar))
+    finally:
+        metricas.habilitado = habilitadas
+        gestor.cerrar()
+    return resultados
+
+
+def verificar_invariantes(gestor):
+    """
+    Comprueba que la lista, sus índices, el árbol de categorías y la cola de urgentes
+    describen el mismo conjunto de tareas, y que los contadores de cada categoría
+    coinciden con un recuento directo de sus tareas. Toma el cerrojo de lectura del gestor.
+
+    Returns:
+        Lista de textos con las inconsistencias encontradas (vacía si no hay)
+    """
+    problemas = []
+    with gestor.lectura():
+        lista = gestor.lista_tareas
+        tareas = list(lista)
+        estadisticas = gestor.obtener_estadisticas_categoria(None)
+        if estadisticas['total'] != len(tareas):
+            problemas.append(f"total {estadisticas['total']} != {len(tareas)} tareas en la lista")
+        pendientes = sum(1 for tarea in tareas if not tarea.completada)
+        if estadisticas['pendientes'] != pendientes:
+            problemas.append(f"pendientes {estadisticas['pendientes']} != {pendientes}")
+        if sum(estadisticas['por_prioridad'].values()) != len(tareas):
+            problemas.append("la suma por prioridad no coincide con el total")
+
+        por_prioridad = list(lista.iter_por_prioridad())
+        if len(por_prioridad) != len(tareas):
+            problemas.append(f"el índice por prioridad tiene {len(por_prioridad)} tareas, la lista {len(tareas)}")
+        claves = [lista.clave_prioridad(tarea) for tarea in por_prioridad]
+        if any(anterior < siguiente for anterior, siguiente in zip(claves, claves[1:])):
+            problemas.append("el índice por prioridad está desordenado")
+
+        en_categorias = sum(gestor.obtener_estadisticas_categoria(ruta)['total']
+                            for ruta, _, nivel in gestor.obtener_todas_categorias() if nivel == 1)
+        sin_categoria = sum(1 for tarea in tareas if not tarea.categoria)
+        if en_categorias + sin_categoria != len(tareas):
+            problemas.append(f"las categorías suman {en_categorias} + {sin_categoria} sin categoría, "
+                             f"hay {len(tareas)} tareas")
+        problemas.extend(_verificar_categorias(gestor, tareas))
+
+        urgentes = {tarea.id for tarea in tareas if tarea.prioridad == Prioridad.URGENTE and not tarea.completada}
+        en_cola = {tarea.id for tarea in gestor.cola_urgentes.obtener_todas()}
+        if urgentes != en_cola:
+            problemas.append(f"la cola tiene {len(en_cola)} tareas, hay {len(urgentes)} urgentes pendientes")
+    return problemas
+
+
+def _verificar_categorias(gestor, tareas):
+    """Contadores de cada categoría contra un recuento directo de las tareas de su subárbol"""
+    ahora = datetime.now()
+    limite = fecha_a_entero(ahora)
+    recuentos = {}  # ruta -> contadores de la categoría y sus subcategorías
+    for tarea in tareas:
+        if not tarea.categoria:
+            continue
+        partes = tarea.categoria.split("/")
+        vencida = (not tarea.completada and tarea.fecha_vencimiento is not None
+                   and fecha_a_entero(tarea.fecha_vencimiento) < limite)
+        for i in range(1, len(partes) + 1):
+            ruta = "/".join(partes[:i])
+            recuento = recuentos.get(ruta)
+            if recuento is None:
+                recuento = recuentos[ruta] = {'total': 0, 'pendientes': 0, 'completadas': 0,
+                                              'por_prioridad': {prioridad: 0 for prioridad in Prioridad},
+                                              'vencidas': 0}
+            recuento['total'] += 1
+            recuento['completadas' if tarea.completada else 'pendientes'] += 1
+            recuento['por_prioridad'][tarea.prioridad] += 1
+            recuento['vencidas'] += vencida
+
+    problemas = []
+    vacio = {'total': 0, 'pendientes': 0, 'completadas': 0,
+             'por_prioridad': {prioridad: 0 for prioridad in Prioridad}, 'vencidas': 0}
+    for ruta, _, _ in gestor.obtener_todas_categorias():
+        esperado = recuentos.get(ruta, vacio)
+        obtenido = gestor.obtener_estadisticas_categoria(ruta, ahora)
+        for clave, valor in esperado.items():
+            if obtenido[clave] != valor:
+                problemas.append(f"categoría '{ruta}': {clave} {obtenido[clave]} != {valor} contadas")
+    return problemas
+
+
+class _Revertir(Exception):
+    """Lanzada dentro de una transacción de la prueba de estrés para revertirla"""
+
+
+def ejecutar_estres(tareas=5000, hilos=(1, 2, 4, 8), segundos=1.0, escritores=1, profundidad=2, ramas=4,
+                    semilla=42, almacen="memoria"):
+    """
+    Varios hilos lectores y escritores sobre un mismo GestorTareas concurrente. Para cada
+    cantidad de lectores se mide cuántas lecturas por segundo completan entre todos
+    mientras los escritores crean, modifican, eliminan, mueven tareas dentro de
+    transacciones (confirmadas o revertidas) y deshacen; los lectores comprueban de vez
+    en cuando las invariantes y al final de cada ronda se comprueban otra vez.
+
+    Args:
+        tareas: Tareas iniciales
+        hilos: Cantidades de hilos lectores a probar
+        segundos: Duración de cada ronda
+        escritores: Hilos escritores que corren junto a los lectores (0 = solo lecturas)
+        profundidad, ramas: Forma del árbol de categorías
+        semilla: Semilla de la carga
+        almacen: "memoria" o "sqlite"
+
+    Returns:
+        Lista de {'lectores', 'lecturas', 'lecturas_por_segundo', 'escrituras',
+        'escrituras_por_segundo', 'problemas'}, una por cantidad de lectores
+    """
+    from .gestor_tareas import GestorTareas
+
+    carga = GeneradorCarga(semilla, tareas, profundidad, ramas)
+    if almacen == "sqlite":
+        from .almacen_sqlite import AlmacenSQLite
+        gestor = GestorTareas(almacen=AlmacenSQLite(), concurrente=True)
+    else:
+        gestor = GestorTareas(concurrente=True)
+    for ruta in carga.categorias:
+        gestor.agregar_categoria(ruta)
+    for especificacion in carga.iter_tareas():
+        gestor.crear_tarea(*especificacion)
+
+    def leer(azar, contador, detener):
+        rutas = carga.categorias or [None]
+        while not detener.is_set():
+            operacion = azar.randrange(4)
+            ruta = azar.choice(rutas)
+            if operacion == 0:
+                gestor.obtener_estadisticas_categoria(ruta)
+            elif operacion == 1:
+                gestor.consultar(ruta_categoria=ruta, completada=False, orden='vencimiento', limite=20)
+            elif operacion == 2:
+                desde = carga.base + timedelta(days=azar.randrange(365))
+                gestor.contar_por_vencimiento(desde, desde + timedelta(days=7), ruta)
+            else:
+                with gestor.lectura():
+                    for _ in zip(range(20), gestor.buscar_tareas(f"tarea {azar.randrange(tareas)}", ruta)):
+                        pass
+            contador[0] += 1
+            if contador[0] % 500 == 0:
+                problemas.extend(verificar_invariantes(gestor))
+
+    def registrar_errores(trabajo):
+        """Un error dentro de un hilo (p. ej. un índice corrompido) cuenta como inconsistencia"""
+        def envoltura(*args):
+            try:
+                trabajo(*args)
+            except Exception as e:
+                problemas.append(f"{trabajo.__name__}: {e!r}")
+                detener.set()
+        return envoltura
+
+    def escribir(azar, contador, detener):
+        vivas = [tarea.id for tarea in gestor.lista_tareas]
+        siguiente = tareas
+        while not detener.is_set():
+            operacion = azar.randrange(7)
+            if operacion <= 1 or not vivas:
+                vivas.append(gestor.crear_tarea(*carga.tarea(siguiente)).id)
+                siguiente += 1
+            elif operacion == 2:
+                gestor.actualizar_tarea(azar.choice(vivas), prioridad=carga.prioridad(),
+                                        completada=azar.random() < 0.3)
+            elif operacion == 3:
+                posicion = azar.randrange(len(vivas))
+                vivas[posicion], vivas[-1] = vivas[-1], vivas[posicion]
+                gestor.eliminar_tarea(vivas.pop())
+            elif operacion == 4:
+                with gestor.transaccion("estrés"):
+                    for tarea_id in azar.sample(vivas, min(5, len(vivas))):
+                        gestor.completar_tarea(tarea_id)
+            elif operacion == 5:
+                # Mover una tarea y devolverle su estado en la misma transacción: ningún
+                # aviso de estado llega al final, la categoría nueva debe contarla igual
+                tarea_id = azar.choice(vivas)
+                categoria = azar.choice(carga.categorias) if carga.categorias else ""
+                try:
+                    with gestor.transaccion("estrés"):
+                        tarea = gestor.lista_tareas.obtener_tarea(tarea_id)  # Otro escritor pudo eliminarla
+                        if tarea is not None:
+                            completada = tarea.completada
+                            gestor.completar_tarea(tarea_id, not completada)
+                            gestor.actualizar_tarea(tarea_id, categoria=categoria)
+                            gestor.completar_tarea(tarea_id, completada)
+                        if azar.random() < 0.5:
+                            raise _Revertir()
+                except _Revertir:
+                    pass
+            else:
+                # Deshacer puede devolver o quitar tareas: se vuelve a leer cuáles quedan
+                gestor.deshacer()
+                with gestor.lectura():
+                    vivas = [tarea.id for tarea in gestor.lista_tareas]
+            contador[0] += 1
+
+    habilitadas = metricas.habilitado
+    metricas.habilitado = False
+    resultados = []
+    try:
+        for cantidad in hilos:
+            detener = threading.Event()
+            lecturas = [[0] for _ in range(cantidad)]
+            escrituras = [[0] for _ in range(escritores)]
+            problemas = []
+            trabajadores = [threading.Thread(target=registrar_errores(leer),
+                                             args=(random.Random(semilla + i), lecturas[i], detener))
+                            for i in range(cantidad)]
+            trabajadores += [threading.Thread(target=registrar_errores(escribir),
+                                              args=(random.Random(-semilla - i), escrituras[i], detener))
+                             for i in range(escritores)]
+            inicio = time.perf_counter()
+            for trabajador in trabajadores:
+                trabajador.start()
+            detener.wait(segundos)
+            detener.set()
+            for trabajador in trabajadores:
+                trabajador.join()
+            transcurrido = time.perf_counter() - inicio
+            problemas.extend(verificar_invariantes(gestor))
+
+            total_lecturas = sum(contador[0] for contador in lecturas)
+            total_escrituras = sum(contador[0] for contador in escrituras)
+            resultados.append({
+                'lectores': cantidad,
+                'lecturas': total_lecturas,
+                'lecturas_por_segundo': total_lecturas / transcurrido,
+                'escrituras': total_escrituras,
+                'escrituras_por_segundo': total_escrituras / transcurrido,
+                'problemas': problemas,
+            })
+    finally:
+        metricas.habilitado = habilitadas
+        gestor.cerrar()
+    return resultados
+
+
+def _solicitud_http(metodo, ruta, datos=None):
+    cuerpo = json.dumps(datos).encode("utf-8") if datos is not None else b""
+    cabecera = f"{metodo} {ruta} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(cuerpo)}\r\n"
+    if cuerpo:
+        cabecera += "Content-Type: application/json\r\n"
+    return (cabecera + "\r\n").encode("latin-1") + cuerpo
+
+
+async def _leer_respuesta_http(lector):
+    """Lee una respuesta completa (con Content-Length o en bloques); devuelve (estado, cuerpo)"""
+    lineas = (await lector.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+    estado = int(lineas[0].split(" ", 2)[1])
+    cabeceras = {}
+    for linea in lineas[1:]:
+        nombre, _, valor = linea.partition(":")
+        if nombre:
+            cabeceras[nombre.strip().lower()] = valor.strip()
+    if cabeceras.get("transfer-encoding") == "chunked":
+        partes = []
+        while True:
+            tamano = int((await lector.readline()).strip(), 16)
+            if not tamano:
+                await lector.readline()
+                break
+            partes.append(await lector.readexactly(tamano))
+            await lector.readline()
+        return estado, b"".join(partes)
+    return estado, await lector.readexactly(int(cabeceras.get("content-length") or 0))
+
+
+async def _carga_http(host, puerto, tareas, clientes, solicitudes, profundidad, mezcla, semilla):
+    carga = GeneradorCarga(semilla, tareas, profundidad=1, ramas=4)
+
+    def como_json(especificacion):
+        titulo, descripcion, prioridad, fecha, categoria = especificacion
+        return {'titulo': titulo, 'descripcion': descripcion, 'prioridad': prioridad.name,
+                'vencimiento': fecha.isoformat(), 'categoria': categoria}
+
+    # Tareas iniciales, creadas por lotes
+    lector, escritor = await asyncio.open_connection(host, puerto)
+    ids = []
+    especificaciones = [como_json(especificacion) for especificacion in carga.iter_tareas()]
+    for inicio in range(0, len(especificaciones), 500):
+        escritor.write(_solicitud_http("POST", "/tareas/lote", {'crear': especificaciones[inicio:inicio + 500]}))
+        estado, cuerpo = await _leer_respuesta_http(lector)
+        if estado != 200:
+            raise RuntimeError(f"No se pudo cargar el servidor: {estado} {cuerpo[:200]!r}")
+        ids.extend(tarea['id'] for tarea in json.loads(cuerpo)['creadas'])
+    escritor.close()
+
+    azar = carga.azar
+
+    def solicitud(nombre, i):
+        if nombre == "leer":
+            return _solicitud_http("GET", f"/tareas/{azar.choice(ids)}")
+        if nombre == "consultar":
+            return _solicitud_http("GET", "/tareas?completada=false&orden=vencimiento&limite=20")
+        if nombre == "actualizar":
+            return _solicitud_http("PATCH", f"/tareas/{azar.choice(ids)}", {'prioridad': carga.prioridad().name})
+        if nombre == "crear":
+            return _solicitud_http("POST", "/tareas", como_json(carga.tarea(tareas + i)))
+        if nombre == "estadisticas":
+            return _solicitud_http("GET", "/estadisticas")
+        return _solicitud_http("POST", "/tareas/lote", {'actualizar': [
+            {'id': azar.choice(ids), 'completada': azar.random() < 0.5} for _ in range(20)]})
+
+    nombres = carga.operaciones(solicitudes, mezcla)
+    por_cliente = [[(nombre, solicitud(nombre, i)) for i, nombre in enumerate(nombres[c::clientes])]
+                   for c in range(clientes)]
+    latencias = {}
+    estados = {}
+
+    async def cliente(pendientes):
+        lector, escritor = await asyncio.open_connection(host, puerto)
+        en_vuelo = asyncio.Semaphore(profundidad)
+        enviadas = []
+
+        async def enviar():
+            # Hasta `profundidad` solicitudes sin respuesta en la misma conexión (pipelining)
+            for nombre, datos in pendientes:
+                await en_vuelo.acquire()
+                enviadas.append((nombre, time.perf_counter()))
+                escritor.write(datos)
+                await escritor.drain()
+        envio = asyncio.create_task(enviar())
+        for i in range(len(pendientes)):
+            estado, _ = await _leer_respuesta_http(lector)
+            nombre, inicio = enviadas[i]
+            latencias.setdefault(nombre, []).append(time.perf_counter() - inicio)
+            estados[estado] = estados.get(estado, 0) + 1
+            en_vuelo.release()
+        await envio
+        escritor.close()
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(cliente(pendientes) for pendientes in por_cliente if pendientes))
+    return latencias, estados, time.perf_counter() - inicio
+
+
+def _percentil(ordenadas, p):
+    return ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * p / 100))] if ordenadas else 0.0
+
+
+def ejecutar_carga_http(direccion=None, tareas=1000, clientes=8, solicitudes=5000, profundidad=8, mezcla=None,
+                        semilla=42):
+    """
+    Generador de carga para la API HTTP (main.py --serve): varios clientes con conexiones
+    persistentes envían solicitudes con pipelining y se mide el tiempo de cada una desde
+    que se envía hasta que se recibe la respuesta completa.
+
+    Args:
+        direccion: "host:puerto" de un servidor en marcha; None inicia uno en un hilo
+            de este proceso (compite por el intérprete con los clientes: para medir el
+            servidor solo, iniciarlo aparte con main.py --serve)
+        tareas: Tareas que se crean antes de medir (por lotes)
+        clientes: Conexiones simultáneas
+        solicitudes: Solicitudes en total, repartidas entre los clientes
+        profundidad: Solicitudes sin respuesta que admite cada conexión
+        mezcla: Pesos {solicitud: peso} (ver MEZCLA_HTTP)
+        semilla: Semilla de la carga
+
+    Returns:
+        {'solicitudes', 'segundos', 'solicitudes_por_segundo', 'p50_ms', 'p99_ms', 'estados',
+         'por_solicitud': {nombre: {'cantidad', 'p50_ms', 'p99_ms'}}}
+    """
+    detener = None
+    if direccion is None:
+        from .gestor_tareas import GestorTareas
+        from .servidor import iniciar_en_hilo
+        servidor, detener = iniciar_en_hilo(GestorTareas())
+        host, puerto = servidor.host, servidor.puerto
+    else:
+        host, _, puerto = direccion.rpartition(":")
+        host, puerto = host or "127.0.0.1", int(puerto)
+
+    habilitadas = metricas.habilitado
+    metricas.habilitado = False
+    try:
+        latencias, estados, segundos = asyncio.run(_carga_http(
+            host, puerto, tareas, clientes, solicitudes, profundidad, mezcla or MEZCLA_HTTP, semilla))
+    finally:
+        metricas.habilitado = habilitadas
+        if detener is not None:
+            detener()
+
+    todas = sorted(latencia for valores in latencias.values() for latencia in valores)
+    por_solicitud = {}
+    for nombre, valores in latencias.items():
+        valores.sort()
+        por_solicitud[nombre] = {'cantidad': len(valores), 'p50_ms': _percentil(valores, 50) * 1000,
+                                 'p99_ms': _percentil(valores, 99) * 1000}
+    return {
+        'solicitudes': len(todas),
+        'segundos': segundos,
+        'solicitudes_por_segundo': len(todas) / segundos if segundos > 0 else 0.0,
+        'p50_ms': _percentil(todas, 50) * 1000,
+        'p99_ms': _percentil(todas, 99) * 1000,
+        'estados': estados,
+        'por_solicitud': por_solicitud,
+    }
+
+
+def comparar_con_base(resultados, base, tolerancia=0.2):
+    """
+    Compara el tiempo por operación de cada fase con el de una ejecución guardada.
+
+    Returns:
+        Lista de (fase, us actual, us base, cambio relativo) de las fases más lentas
+        que la base por encima de la tolerancia
+    """
+    regresiones = []
+    for fase, medicion in resultados.items():
+        anterior = base.get(fase)
+        if not anterior or not anterior['us_por_operacion']:
+            continue
+        cambio = medicion['us_por_operacion'] / anterior['us_por_operacion'] - 1
+        if cambio > tolerancia:
+            regresiones.append((fase, medicion['us_por_operacion'], anterior['us_por_operacion'], cambio))
+    return regresiones
+
+
+def _leer_mezcla(texto):
+    """'crear=3,buscar=4' -> {'crear': 3.0, 'buscar': 4.0}"""
+    mezcla = {}
+    for parte in texto.split(","):
+        nombre, _, peso = parte.partition("=")
+        if nombre.strip() not in MEZCLA_PREDETERMINADA:
+            raise argparse.ArgumentTypeError(f"operación desconocida en la mezcla: {nombre}")
+        mezcla[nombre.strip()] = float(peso or 1)
+    return mezcla
+
+
+def _leer_hilos(texto):
+    """'1,2,4' -> (1, 2, 4)"""
+    try:
+        hilos = tuple(int(parte) for parte in texto.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"cantidades de hilos inválidas: {texto}")
+    if not hilos or min(hilos) < 1:
+        raise argparse.ArgumentTypeError("cada cantidad de hilos debe ser al menos 1")
+    return hilos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks del gestor de tareas")
+    parser.add_argument("--memoria", action="store_true", help="Mide los bytes por tarea de cada representación")
+    parser.add_argument("-n", type=int, default=None, help="Cantidad de tareas (10000 para la carga, 100000 para --memoria)")
+    parser.add_argument("--profundidad", type=int, default=3, help="Niveles del árbol de categorías")
+    parser.add_argument("--ramas", type=int, default=4, help="Subcategorías por categoría")
+    parser.add_argument("--urgentes", type=float, default=0.1, help="Fracción de tareas urgentes")
+    parser.add_argument("--mezcla", type=_leer_mezcla, default=None,
+                        help="Pesos de la fase mixta, p. ej. crear=3,buscar=4,actualizar=3,eliminar=1,deshacer=1,rehacer=1")
+    parser.add_argument("--operaciones", type=int, default=None, help="Operaciones por fase (por defecto n / 4)")
+    parser.add_argument("--semilla", type=int, default=42, help="Semilla de la carga sintética")
+    parser.add_argument("--almacen", choices=["memoria", "sqlite"], default="memoria", help="Almacenamiento a medir")
+    parser.add_argument("--salida", metavar="ARCHIVO", help="Guardar los resultados en JSON")
+    parser.add_argument("--base", metavar="ARCHIVO", help="Comparar con resultados JSON guardados y marcar regresiones")
+    parser.add_argument("--tolerancia", type=float, default=0.2,
+                        help="Aumento relativo del tiempo por operación que se considera regresión (0.2 = 20%%)")
+    parser.add_argument("--estres", action="store_true",
+                        help="Prueba de estrés con hilos lectores y escritores sobre un gestor concurrente")
+    parser.add_argument("--hilos", type=_leer_hilos, default=(1, 2, 4, 8),
+                        help="Cantidades de hilos lectores de la prueba de estrés, p. ej. 1,2,4,8")
+    parser.add_argument("--escritores", type=int, default=1, help="Hilos escritores de la prueba de estrés")
+    parser.add_argument("--segundos", type=float, default=1.0, help="Duración de cada ronda de la prueba de estrés")
+    parser.add_argument("--http", nargs="?", const="", metavar="HOST:PUERTO",
+                        help="Carga sobre la API HTTP de un servidor en marcha (sin dirección, inicia uno en este proceso)")
+    parser.add_argument("--clientes", type=int, default=8, help="Conexiones simultáneas de --http")
+    parser.add_argument("--pipeline", type=int, default=8, help="Solicitudes sin respuesta por conexión en --http")
+    parser.add_argument("--solicitudes", type=int, default=5000, help="Solicitudes en total de --http")
+    args = parser.parse_args(argv)
+
+    if args.memoria:
+        n = args.n or 100000
+        resultados = medir_memoria_por_tarea(n)
+        referencia = resultados["original (__dict__)"]
+        print(f"Memoria por tarea ({n} tareas):")
+        for nombre, bytes_por_tarea in resultados.items():
+            print(f"  {nombre:<28} {bytes_por_tarea:8.1f} bytes  ({bytes_por_tarea / referencia:.0%})")
+        return 0
+
+    if args.http is not None:
+        n = args.n or 1000
+        resultado = ejecutar_carga_http(args.http or None, n, args.clientes, args.solicitudes, args.pipeline,
+                                        semilla=args.semilla)
+        print(f"HTTP: {resultado['solicitudes']} solicitudes, {args.clientes} clientes, pipeline {args.pipeline}, "
+              f"{n} tareas iniciales")
+        print(f"  {resultado['solicitudes_por_segundo']:.0f} solicitudes/s  p50 {resultado['p50_ms']:.2f} ms  "
+              f"p99 {resultado['p99_ms']:.2f} ms")
+        print(f"  {'solicitud':<14} {'cantidad':>9} {'p50 ms':>9} {'p99 ms':>9}")
+        for nombre, medicion in sorted(resultado['por_solicitud'].items()):
+            print(f"  {nombre:<14} {medicion['cantidad']:>9} {medicion['p50_ms']:>9.2f} {medicion['p99_ms']:>9.2f}")
+        errores = {estado: cantidad for estado, cantidad in resultado['estados'].items() if estado >= 400}
+        if errores:
+            print(f"  Respuestas con error: {errores}")
+        return 1 if errores else 0
+
+    if args.estres:
+        n = args.n or 5000
+        rondas = ejecutar_estres(n, args.hilos, args.segundos, args.escritores, args.profundidad, args.ramas,
+                                 args.semilla, args.almacen)
+        print(f"Estrés: {n} tareas, {args.escritores} escritor(es), {args.segundos:g} s por ronda, almacén {args.almacen}")
+        print(f"  {'lectores':>8} {'lecturas/s':>12} {'escala':>8} {'escrituras/s':>13} {'problemas':>10}")
+        referencia = rondas[0]['lecturas_por_segundo'] or 1.0
+        for ronda in rondas:
+            print(f"  {ronda['lectores']:>8} {ronda['lecturas_por_segundo']:>12.0f} "
+                  f"{ronda['lecturas_por_segundo'] / referencia:>7.2f}x {ronda['escrituras_por_segundo']:>13.0f} "
+                  f"{len(ronda['problemas']):>10}")
+        problemas = [problema for ronda in rondas for problema in ronda['problemas']]
+        for problema in dict.fromkeys(problemas):
+            print(f"  Inconsistencia: {problema}")
+        return 1 if problemas else 0
+
+    parametros = {
+        'tareas': args.n or 10000,
+        'profundidad': args.profundidad,
+        'ramas': args.ramas,
+        'proporcion_urgentes': args.urgentes,
+        'mezcla': args.mezcla or MEZCLA_PREDETERMINADA,
+        'operaciones': args.operaciones,
+        'semilla': args.semilla,
+        'almacen': args.almacen,
+    }
+    resultados = ejecutar_carga(**parametros)
+
+    base = None
+    if args.base:
+        with open(args.base, "r", encoding="utf-8") as archivo:
+            base = json.load(archivo)
+        if base.get('parametros') != parametros:
+            print("Aviso: la base se midió con otros parámetros; la comparación puede no ser válida")
+
+    regresiones = comparar_con_base(resultados, base['resultados'], args.tolerancia) if base else []
+    fases_lentas = {fase for fase, *_ in regresiones}
+
+    print(f"Carga: {parametros['tareas']} tareas, profundidad {args.profundidad}, {args.ramas} ramas, "
+          f"{args.urgentes:.0%} urgentes, semilla {args.semilla}, almacén {args.almacen}")
+    print(f"  {'fase':<24} {'operaciones':>11} {'µs/op':>10} {'op/s':>12}" + ("  vs base" if base else ""))
+    for fase, medicion in resultados.items():
+        linea = (f"  {fase:<24} {medicion['operaciones']:>11} {medicion['us_por_operacion']:>10.2f} "
+                 f"{medicion['operaciones_por_segundo']:>12.0f}")
+        anterior = base['resultados'].get(fase) if base else None
+        if anterior and anterior['us_por_operacion']:
+            cambio = medicion['us_por_operacion'] / anterior['us_por_operacion'] - 1
+            linea += f"  {cambio:+7.1%}" + ("  REGRESIÓN" if fase in fases_lentas else "")
+        print(linea)
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            json.dump({
+                'parametros': parametros,
+                'entorno': {'python': sys.version.split()[0], 'plataforma': platform.platform()},
+                'resultados': resultados,
+            }, archivo, ensure_ascii=False, indent=2)
+        print(f"Resultados guardados en {args.salida}")
+
+    if regresiones:
+        print(f"{len(regresiones)} fase(s) más lentas que la base por encima del {args.tolerancia:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,39 +1,118 @@
-from collections import deque
+import heapq
+from datetime import datetime
+from .models import Prioridad, fecha_a_entero
 
 """
-Estructura de datos: Cola (Queue)
----------------------------------
-Una cola es una estructura de datos que sigue el principio FIFO (First In, First Out - primero en entrar, primero en salir).
-Es conveniente usar colas para manejar tareas urgentes porque:
-1. Garantiza que las tareas se procesen en el orden en que fueron agregadas, respetando la prioridad temporal.
-2. Modela naturalmente una lista de espera, donde la próxima tarea a procesar es siempre la que lleva más tiempo esperando.
-3. Operaciones de encolar (append) y desencolar (popleft) son O(1), asegurando alto rendimiento.
-4. Previene que tareas antiguas sean ignoradas indefinidamente, evitando el "starvation" (inanición).
-5. La implementación deque de Python ofrece una solución optimizada con operaciones eficientes en ambos extremos.
+Estructura de datos: Cola de prioridad (montículo binario / heap)
+------------------------------------------------------------------
+Una cola de prioridad entrega siempre el elemento con la clave más pequeña, sin
+importar el orden en que se agregaron. Es conveniente para las tareas urgentes porque:
+1. Todas las tareas de la cola son urgentes, así que lo que decide el orden es cuál vence antes.
+2. Con un montículo (heapq) agregar y sacar la siguiente tarea cuesta O(log n).
+3. La clave combina la fecha de vencimiento con el momento en que la tarea entró a la cola
+   (envejecimiento): una tarea con fecha lejana va ganando lugar frente a las que llegan
+   después, así ninguna espera indefinidamente ("starvation").
+4. Un diccionario id -> entrada permite saber en O(1) si una tarea ya está en la cola,
+   de modo que nunca se encola dos veces.
+5. Quitar una tarea no reordena el montículo: su entrada se marca como eliminada (lápida)
+   y se descarta cuando llega a la cima. Solo si las lápidas superan a las entradas vivas
+   se reconstruye el montículo, con un costo amortizado O(1) por eliminación.
 """
 
+_ELIMINADA = None  # Lápida: la entrada sigue en el montículo pero ya no tiene tarea
+
 class ColaTareasUrgentes:
-    def __init__(self):
-        self.cola = deque()
-        
-    def agregar_tarea(self, tarea):
-        self.cola.append(tarea)
-        
-    def procesar_siguiente(self):
-        if not self.esta_vacia():
-            return self.cola.popleft()
+    def __init__(self, envejecimiento=1.0, reloj=datetime.now):
+        """
+        Args:
+            envejecimiento: Peso del momento de llegada frente a la fecha de vencimiento.
+                Con 0 el orden es solo por fecha; cuanto mayor, más se parece a una cola FIFO.
+            reloj: Función que devuelve la hora actual (para poder fijarla en pruebas)
+        """
+        self.envejecimiento = envejecimiento
+        self.reloj = reloj
+        self._monticulo = []  # [clave, orden de llegada, encolada, tarea]
+        self._entradas = {}   # id -> entrada viva del montículo
+        self._lapidas = 0
+        self._llegadas = 0    # Desempate estable entre claves iguales
+
+    def _clave(self, tarea, encolada):
+        # Las tareas sin fecha se consideran vencidas en el momento en que llegan
+        vencimiento = tarea._vencimiento if tarea._vencimiento is not None else encolada
+        return vencimiento + self.envejecimiento * encolada
+
+    def agregar_tarea(self, tarea, encolada=None):
+        if tarea.id in self._entradas:
+            return
+        if encolada is None:
+            encolada = fecha_a_entero(self.reloj())
+        self._llegadas += 1
+        entrada = [self._clave(tarea, encolada), self._llegadas, encolada, tarea]
+        self._entradas[tarea.id] = entrada
+        heapq.heappush(self._monticulo, entrada)
+
+    def eliminar_tarea(self, tarea):
+        """Quita la tarea de la cola (si está) dejando una lápida en el montículo"""
+        entrada = self._entradas.pop(tarea.id, None)
+        if entrada is None:
+            return False
+        entrada[-1] = _ELIMINADA
+        self._lapidas += 1
+        if self._lapidas > len(self._entradas) and self._lapidas > 64:
+            self._reconstruir()
+        return True
+
+    def actualizar_tarea(self, tarea):
+        """Recalcula la posición de una tarea cuya fecha cambió, conservando su llegada"""
+        entrada = self._entradas.get(tarea.id)
+        if entrada is not None:
+            encolada = entrada[2]
+            self.eliminar_tarea(tarea)
+            self.agregar_tarea(tarea, encolada)
+
+    def __contains__(self, tarea):
+        return tarea.id in self._entradas
+
+    def _reconstruir(self):
+        self._monticulo = [entrada for entrada in self._monticulo if entrada[-1] is not _ELIMINADA]
+        heapq.heapify(self._monticulo)
+        self._lapidas = 0
+
+    def _limpiar_cima(self):
+        """Descarta lápidas y tareas que ya no son urgentes pendientes hasta encontrar una válida"""
+        while self._monticulo:
+            tarea = self._monticulo[0][-1]
+            if tarea is _ELIMINADA:
+                heapq.heappop(self._monticulo)
+                self._lapidas -= 1
+            elif tarea.completada or tarea.prioridad != Prioridad.URGENTE:
+                self.eliminar_tarea(tarea)
+            else:
+                return self._monticulo[0]
         return None
-        
+
+    def procesar_siguiente(self):
+        entrada = self._limpiar_cima()
+        if entrada is None:
+            return None
+        heapq.heappop(self._monticulo)
+        del self._entradas[entrada[-1].id]
+        return entrada[-1]
+
     def ver_siguiente(self):
-        if not self.esta_vacia():
-            return self.cola[0]
-        return None
-        
+        entrada = self._limpiar_cima()
+        return entrada[-1] if entrada is not None else None
+
     def esta_vacia(self):
-        return len(self.cola) == 0
-        
+        return len(self._entradas) == 0
+
     def tamaño(self):
-        return len(self.cola)
-        
+        return len(self._entradas)
+
+    def primeras(self, cantidad):
+        """Las primeras tareas que se procesarían, en orden, en O(n log cantidad)"""
+        return [entrada[-1] for entrada in heapq.nsmallest(cantidad, self._entradas.values())]
+
     def obtener_todas(self):
-        return list(self.cola) 
\ No newline at end of file
+        """Tareas en la cola en el orden en que se procesarían"""
+        return [entrada[-1] for entrada in sorted(self._entradas.values())]
@@ -0,0 +1,153 @@
+import functools
+import threading
+
+"""
+Cerrojo de lectores y escritores
+--------------------------------
+Las estructuras del gestor (lista, índices, árbol, cola, historial) se modifican sin
+sincronización. Para compartir un gestor entre hilos, GestorTareas(concurrente=True)
+protege sus operaciones con un cerrojo de lectores y escritores:
+1. Las consultas toman el cerrojo en modo lectura y pueden ejecutarse a la vez en
+   varios hilos: ninguna modifica las estructuras.
+2. Las modificaciones lo toman en modo escritura, de a una y sin lectores: la lista,
+   el árbol, la cola, el historial y los suscriptores ven cada operación completa
+   (una transacción retiene el cerrojo hasta confirmarse o revertirse).
+3. Cuando un escritor espera, los lectores nuevos esperan detrás de él, así una
+   corriente continua de consultas no posterga indefinidamente a las modificaciones.
+4. Es reentrante: un escritor puede volver a escribir o leer (crear_tarea dentro de
+   una transacción, un suscriptor que consulta) y un lector puede volver a leer aunque
+   haya un escritor esperando. Pasar de lectura a escritura en el mismo hilo no se
+   admite (dos lectores que lo intentaran a la vez se bloquearían mutuamente).
+
+Los métodos del gestor que devuelven iteradores perezosos no retienen el cerrojo
+mientras se recorren; con varios hilos hay que recorrerlos dentro de
+`with gestor.lectura():`.
+"""
+
+
+class CerrojoLectoresEscritores:
+    def __init__(self):
+        self._condicion = threading.Condition(threading.Lock())
+        self._lectores = 0              # Hilos con el cerrojo en modo lectura
+        self._escritor = None           # Identificador del hilo que escribe
+        self._escrituras = 0            # Profundidad de escritura del escritor
+        self._escritores_esperando = 0
+        self._local = threading.local()  # lecturas: profundidad de lectura de cada hilo
+
+    def adquirir_lectura(self):
+        local = self._local
+        profundidad = getattr(local, 'lecturas', 0)
+        if profundidad or self._escritor == threading.get_ident():
+            # Reentrada: ya lee o es el escritor, no hace falta esperar
+            local.lecturas = profundidad + 1
+            return
+        with self._condicion:
+            while self._escritor is not None or self._escritores_esperando:
+                self._condicion.wait()
+            self._lectores += 1
+        local.lecturas = 1
+        local.registrado = True
+
+    def liberar_lectura(self):
+        local = self._local
+        local.lecturas -= 1
+        if local.lecturas or not getattr(local, 'registrado', False):
+            return
+        local.registrado = False
+        with self._condicion:
+            self._lectores -= 1
+            if not self._lectores:
+                self._condicion.notify_all()
+
+    def adquirir_escritura(self):
+        yo = threading.get_ident()
+        if self._escritor == yo:
+            self._escrituras += 1
+            return
+        if getattr(self._local, 'lecturas', 0):
+            raise RuntimeError("No se puede modificar mientras el mismo hilo está leyendo")
+        with self._condicion:
+            self._escritores_esperando += 1
+            try:
+                while self._escritor is not None or self._lectores:
+                    self._condicion.wait()
+            finally:
+                self._escritores_esperando -= 1
+            self._escritor = yo
+            self._escrituras = 1
+
+    def liberar_escritura(self):
+        self._escrituras -= 1
+        if self._escrituras:
+            return
+        with self._condicion:
+            self._escritor = None
+            self._condicion.notify_all()
+
+    def lectura(self):
+        """Para usar con with: retiene el cerrojo en modo lectura durante el bloque"""
+        return _Lectura(self)
+
+    def escritura(self):
+        """Para usar con with: retiene el cerrojo en modo escritura durante el bloque"""
+        return _Escritura(self)
+
+
+class _Lectura:
+    __slots__ = ('cerrojo',)
+
+    def __init__(self, cerrojo):
+        self.cerrojo = cerrojo
+
+    def __enter__(self):
+        self.cerrojo.adquirir_lectura()
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrojo.liberar_lectura()
+        return False
+
+
+class _Escritura:
+    __slots__ = ('cerrojo',)
+
+    def __init__(self, cerrojo):
+        self.cerrojo = cerrojo
+
+    def __enter__(self):
+        self.cerrojo.adquirir_escritura()
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrojo.liberar_escritura()
+        return False
+
+
+def con_lectura(metodo):
+    """Decorador de métodos: si el objeto tiene cerrojo, el método se ejecuta en modo lectura"""
+    @functools.wraps(metodo)
+    def envoltura(self, *args, **kwargs):
+        cerrojo = self.cerrojo
+        if cerrojo is None:
+            return metodo(self, *args, **kwargs)
+        cerrojo.adquirir_lectura()
+        try:
+            return metodo(self, *args, **kwargs)
+        finally:
+            cerrojo.liberar_lectura()
+    return envoltura
+
+
+def con_escritura(metodo):
+    """Decorador de métodos: si el objeto tiene cerrojo, el método se ejecuta en modo escritura"""
+    @functools.wraps(metodo)
+    def envoltura(self, *args, **kwargs):
+        cerrojo = self.cerrojo
+        if cerrojo is None:
+            return metodo(self, *args, **kwargs)
+        cerrojo.adquirir_escritura()
+        try:
+            return metodo(self, *args, **kwargs)
+        finally:
+            cerrojo.liberar_escritura()
+    return envoltura
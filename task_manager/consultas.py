@@ -0,0 +1,315 @@
+import heapq
+import math
+from itertools import islice, takewhile
+from .models import Prioridad, fecha_a_entero
+from .indice_texto import terminos
+from .metricas import medido
+
+"""
+Consultas compuestas con planificador
+-------------------------------------
+Una consulta combina criterios (categoría y subcategorías, conjunto de prioridades,
+completadas o pendientes, rango de vencimiento y texto) con un orden y un límite. En
+lugar de recorrer todas las tareas, un planificador pequeño elige por dónde empezar:
+1. Cada índice disponible es un camino de acceso: el subárbol de la categoría, el
+   índice por prioridad (recorrido de mayor a menor, cortado en la prioridad mínima
+   pedida), las fechas de las tareas pendientes (de la lista o de la categoría) y el
+   índice de texto. El recorrido completo siempre es posible.
+2. Los contadores agregados dan, sin recorrer tareas, cuántas filas leería cada camino
+   y qué fracción cumple cada criterio; con ellas se estima el tamaño del resultado.
+3. Si el camino entrega las tareas ya en el orden pedido y hay límite, se detiene en
+   cuanto tiene suficientes: su costo es el de las filas que leerá, no su tamaño total.
+4. Se elige el camino de menor costo; los demás criterios se aplican como filtros y, si
+   el camino no da el orden pedido, se ordena al final (solo los primeros si hay límite).
+
+explicar() ejecuta la consulta y muestra el plan elegido, las alternativas y las filas
+estimadas frente a las realmente leídas y devueltas.
+"""
+
+ORDENES = ('prioridad', 'vencimiento', 'id')
+
+_NOMBRES_ACCESO = {
+    'recorrido': "recorrido completo",
+    'categoria': "subárbol de la categoría",
+    'prioridad': "índice por prioridad",
+    'vencimiento': "fechas de las tareas pendientes",
+    'texto': "índice de texto",
+    'vacio': "sin filas (criterios incompatibles o categoría inexistente)",
+}
+
+
+class PlanConsulta:
+    def __init__(self, consulta, acceso, leidas_estimadas, resultado_estimado, ordenado, filtros, alternativas):
+        """
+        Args:
+            consulta: Texto con los criterios de la consulta
+            acceso: Camino de acceso elegido ('recorrido', 'categoria', 'prioridad', 'vencimiento', 'texto' o 'vacio')
+            leidas_estimadas: Filas que leería el camino elegido sin límite
+            resultado_estimado: Filas que cumplirían todos los criterios
+            ordenado: El camino entrega las filas en el orden pedido
+            filtros: Criterios que se comprueban fila por fila
+            alternativas: [(acceso, filas estimadas, costo)] de todos los caminos considerados
+        """
+        self.consulta = consulta
+        self.acceso = acceso
+        self.leidas_estimadas = leidas_estimadas
+        self.resultado_estimado = resultado_estimado
+        self.ordenado = ordenado
+        self.filtros = filtros
+        self.alternativas = alternativas
+        # Se completan al ejecutar la consulta
+        self.leidas = None
+        self.devueltas = None
+
+    def __str__(self):
+        def real(valor):
+            return "-" if valor is None else valor
+
+        lineas = [f"Consulta: {self.consulta}",
+                  f"Acceso: {_NOMBRES_ACCESO[self.acceso]}",
+                  f"  filas estimadas: {self.leidas_estimadas}  leídas: {real(self.leidas)}",
+                  f"Filtros: {', '.join(self.filtros) if self.filtros else 'ninguno'}",
+                  f"Orden: {'el del acceso' if self.ordenado else 'se ordena el resultado'}",
+                  f"Resultado: estimadas {round(self.resultado_estimado)}  devueltas: {real(self.devueltas)}"]
+        if len(self.alternativas) > 1:
+            lineas.append("Alternativas (filas estimadas / costo):")
+            for acceso, filas, costo in self.alternativas:
+                marca = "*" if acceso == self.acceso else " "
+                lineas.append(f"  {marca} {_NOMBRES_ACCESO[acceso]}: {filas} / {costo}")
+        return "\n".join(lineas)
+
+
+class ConsultaTareas:
+    def __init__(self, gestor, ruta_categoria=None, prioridades=None, completada=None, desde=None, hasta=None,
+                 texto=None, orden='prioridad', limite=None):
+        """
+        Args:
+            gestor: GestorTareas sobre el que se consulta
+            ruta_categoria: Solo tareas de esta categoría y sus subcategorías
+            prioridades: Prioridad o conjunto de prioridades admitidas
+            completada: True (solo completadas), False (solo pendientes) o None (ambas)
+            desde, hasta: Vencimiento en [desde, hasta); None deja ese extremo abierto
+            texto: Términos que deben aparecer en el título o la descripción
+            orden: 'prioridad' (como iter_por_prioridad()), 'vencimiento' (como iter_por_fecha()) o 'id'
+            limite: Cantidad máxima de tareas a devolver
+        """
+        if orden not in ORDENES:
+            raise ValueError(f"Orden desconocido: '{orden}' (se admite {', '.join(ORDENES)})")
+        if isinstance(prioridades, Prioridad):
+            prioridades = (prioridades,)
+        self.gestor = gestor
+        self.ruta_categoria = ruta_categoria if ruta_categoria and ruta_categoria != "todas" else None
+        self.prioridades = frozenset(prioridades) if prioridades is not None else None
+        self.completada = completada
+        self.desde = desde
+        self.hasta = hasta
+        self.texto = texto or None
+        self.orden = orden
+        self.limite = limite
+        self._incompatible = False  # Criterios combinados que ninguna tarea puede cumplir
+
+    def filtrar(self, **criterios):
+        """
+        Nueva consulta con los criterios de esta más los indicados (todos deben
+        cumplirse): las categorías y prioridades se intersecan, los rangos de fechas se
+        acotan y los textos se suman. orden y limite reemplazan a los anteriores.
+        """
+        nueva = ConsultaTareas(self.gestor, **criterios)
+        nueva._incompatible = self._incompatible
+
+        if self.ruta_categoria and nueva.ruta_categoria:
+            a, b = self.ruta_categoria, nueva.ruta_categoria
+            if b.startswith(a + "/") or a == b:
+                pass
+            elif a.startswith(b + "/"):
+                nueva.ruta_categoria = a
+            else:
+                nueva._incompatible = True
+        else:
+            nueva.ruta_categoria = nueva.ruta_categoria or self.ruta_categoria
+
+        if self.prioridades is not None:
+            nueva.prioridades = self.prioridades if nueva.prioridades is None else self.prioridades & nueva.prioridades
+        if self.completada is not None:
+            if nueva.completada is not None and nueva.completada != self.completada:
+                nueva._incompatible = True
+            nueva.completada = self.completada
+        if self.desde is not None:
+            nueva.desde = self.desde if nueva.desde is None else max(self.desde, nueva.desde)
+        if self.hasta is not None:
+            nueva.hasta = self.hasta if nueva.hasta is None else min(self.hasta, nueva.hasta)
+        if self.texto:
+            nueva.texto = f"{self.texto} {nueva.texto}" if nueva.texto else self.texto
+        if 'orden' not in criterios:
+            nueva.orden = self.orden
+        if 'limite' not in criterios:
+            nueva.limite = self.limite
+        return nueva
+
+    def __iter__(self):
+        return iter(self.ejecutar())
+
+    def describir(self):
+        """Los criterios en texto, para explicar()"""
+        partes = []
+        if self.ruta_categoria:
+            partes.append(f"categoría '{self.ruta_categoria}'")
+        if self.prioridades is not None:
+            nombres = sorted(self.prioridades, key=lambda p: p.value, reverse=True)
+            partes.append("prioridad en {" + ", ".join(p.name for p in nombres) + "}")
+        if self.completada is not None:
+            partes.append("completadas" if self.completada else "pendientes")
+        if self.desde is not None or self.hasta is not None:
+            desde = self.desde.strftime("%d/%m/%Y %H:%M") if self.desde else "-∞"
+            hasta = self.hasta.strftime("%d/%m/%Y %H:%M") if self.hasta else "∞"
+            partes.append(f"vence en [{desde}, {hasta})")
+        if self.texto:
+            partes.append(f"texto '{self.texto}'")
+        texto = ", ".join(partes) if partes else "todas las tareas"
+        texto += f"; orden {self.orden}"
+        if self.limite is not None:
+            texto += f"; límite {self.limite}"
+        return texto
+
+    def planificar(self):
+        """Plan elegido, sin ejecutar la consulta"""
+        return self._planificar()[0]
+
+    @medido("consulta.ejecutar")
+    def ejecutar(self):
+        """
+        Returns:
+            Lista de tareas que cumplen todos los criterios, en el orden pedido y hasta el límite
+        """
+        with self.gestor.lectura():
+            return self._ejecutar(*self._planificar())
+
+    def explicar(self):
+        """
+        Ejecuta la consulta y devuelve su plan con las filas reales leídas y devueltas
+        (str(plan) lo muestra como texto).
+        """
+        with self.gestor.lectura():
+            plan, acceso, predicados = self._planificar()
+            self._ejecutar(plan, acceso, predicados)
+        return plan
+
+    explain = explicar
+
+    def _planificar(self):
+        """
+        Returns:
+            (plan, función que devuelve el iterador del acceso elegido,
+             {criterio: predicado} de los filtros que quedan)
+        """
+        gestor = self.gestor
+        lista = gestor.lista_tareas
+        ruta = self.ruta_categoria
+        estadisticas = gestor.obtener_estadisticas_categoria(ruta)
+        if self._incompatible or estadisticas is None or self.prioridades == frozenset():
+            plan = PlanConsulta(self.describir(), 'vacio', 0, 0, True, [], [('vacio', 0, 0)])
+            return plan, lambda: iter(()), {}
+
+        total = len(lista)
+        base = estadisticas['total']  # Tareas de la categoría (o todas)
+        fraccion = base / total if total else 0.0
+        predicados = {}
+        caminos = {'recorrido': (total, self.orden != 'id')}
+        accesos = {'recorrido': lambda: {'prioridad': lista.iter_por_prioridad,
+                                         'vencimiento': lista.iter_por_fecha}.get(self.orden, lambda: iter(lista))()}
+        cubre = {'recorrido': ()}  # Criterios que el acceso ya garantiza
+
+        if ruta:
+            nodo = gestor.arbol_categorias.buscar_categoria(ruta)
+            ruta = nodo.ruta
+            prefijo = ruta + "/"
+            predicados['categoria'] = lambda t: bool(t.categoria) and (t.categoria == ruta or t.categoria.startswith(prefijo))
+            caminos['categoria'] = (base, False)
+            minima = Prioridad(min(p.value for p in self.prioridades)) if self.prioridades else None
+            accesos['categoria'] = lambda: gestor.arbol_categorias.iter_tareas_categoria(
+                ruta, solo_pendientes=self.completada is False, prioridad_minima=minima)
+            cubre['categoria'] = ('categoria',)
+
+        if self.prioridades is not None:
+            valores = frozenset(p.value for p in self.prioridades)
+            predicados['prioridad'] = lambda t: t._prioridad in valores
+            en_base = sum(estadisticas['por_prioridad'][p] for p in self.prioridades)
+            fraccion *= en_base / base if base else 0.0
+            # El índice de la lista se recorre desde la prioridad más alta hasta la mínima pedida
+            minimo = min(valores)
+            por_prioridad = estadisticas['por_prioridad'] if not ruta else gestor.obtener_estadisticas_categoria(None)['por_prioridad']
+            caminos['prioridad'] = (sum(cantidad for p, cantidad in por_prioridad.items() if p.value >= minimo),
+                                    self.orden == 'prioridad')
+            accesos['prioridad'] = lambda: takewhile(lambda t: t._prioridad >= minimo, lista.iter_por_prioridad())
+            maximo = max(p.value for p in Prioridad)
+            cubre['prioridad'] = ('prioridad',) if valores == frozenset(range(minimo, maximo + 1)) else ()
+
+        if self.completada is not None:
+            completada = self.completada
+            predicados['completada'] = lambda t: t.completada == completada
+            parte = estadisticas['completadas'] if completada else estadisticas['pendientes']
+            fraccion *= parte / base if base else 0.0
+
+        if self.desde is not None or self.hasta is not None:
+            desde, hasta = fecha_a_entero(self.desde), fecha_a_entero(self.hasta)
+            predicados['vencimiento'] = lambda t: t._vencimiento is not None and \
+                (desde is None or t._vencimiento >= desde) and (hasta is None or t._vencimiento < hasta)
+            en_rango = gestor.contar_por_vencimiento(self.desde, self.hasta, self.ruta_categoria)
+            pendientes = estadisticas['pendientes']
+            if pendientes:
+                # Solo hay fechas indexadas de las pendientes; para las completadas se supone la misma proporción
+                fraccion *= en_rango / pendientes
+            if self.completada is False:
+                caminos['vencimiento'] = (en_rango, self.orden == 'vencimiento')
+                accesos['vencimiento'] = lambda: gestor.tareas_por_vencimiento(self.desde, self.hasta, self.ruta_categoria)
+                cubre['vencimiento'] = ('vencimiento', 'completada', 'categoria')
+
+        if self.texto and terminos(self.texto):
+            ids = gestor.indice_texto.buscar(self.texto)
+            predicados['texto'] = lambda t: t.id in ids
+            fraccion *= len(ids) / total if total else 0.0
+            caminos['texto'] = (len(ids), False)
+            accesos['texto'] = lambda: (t for t in map(lista.obtener_tarea, ids) if t is not None)
+            cubre['texto'] = ('texto',)
+
+        resultado_estimado = total * fraccion
+        alternativas = []
+        for acceso, (filas, ordenado) in caminos.items():
+            costo = filas
+            if ordenado and self.limite is not None:
+                # Se detiene tras leer las filas que, con la selectividad estimada, dan el límite
+                costo = min(filas, math.ceil(self.limite * filas / max(resultado_estimado, 1)))
+            alternativas.append((acceso, filas, costo))
+        elegido, filas, _ = min(alternativas, key=lambda a: (a[2], not caminos[a[0]][1]))
+        restantes = {criterio: predicado for criterio, predicado in predicados.items()
+                     if criterio not in cubre[elegido]}
+        plan = PlanConsulta(self.describir(), elegido, filas, resultado_estimado, caminos[elegido][1],
+                            list(restantes), alternativas)
+        return plan, accesos[elegido], restantes
+
+    def _ejecutar(self, plan, acceso, predicados):
+        leidas = 0
+        filtros = list(predicados.values())
+
+        def filas():
+            nonlocal leidas
+            for tarea in acceso():
+                leidas += 1
+                if all(predicado(tarea) for predicado in filtros):
+                    yield tarea
+
+        limite = self.limite
+        if plan.ordenado:
+            resultado = list(islice(filas(), limite)) if limite is not None else list(filas())
+        elif self.orden == 'prioridad':
+            # La clave del almacén, para dar el mismo orden que su índice
+            clave = self.gestor.lista_tareas.clave_prioridad
+            resultado = heapq.nlargest(limite, filas(), key=clave) if limite is not None \
+                else sorted(filas(), key=clave, reverse=True)
+        else:
+            clave = self.gestor.lista_tareas.clave_fecha if self.orden == 'vencimiento' else (lambda t: t.id)
+            resultado = heapq.nsmallest(limite, filas(), key=clave) if limite is not None \
+                else sorted(filas(), key=clave)
+        plan.leidas = leidas
+        plan.devueltas = len(resultado)
+        return resultado
@@ -15,17 +15,17 @@ def cargar_datos_demo(gestor=None):
     
     # Crear estructura de categorías (Demostración del Árbol)
     print("Creando estructura de categorías...")
-    gestor.arbol_categorias.agregar_categoria("Trabajo")
-    gestor.arbol_categorias.agregar_categoria("Trabajo/Proyecto A")
-    gestor.arbol_categorias.agregar_categoria("Trabajo/Proyecto A/Fase 1")
-    gestor.arbol_categorias.agregar_categoria("Trabajo/Proyecto A/Fase 2")
-    gestor.arbol_categorias.agregar_categoria("Trabajo/Proyecto B")
-    gestor.arbol_categorias.agregar_categoria("Personal")
-    gestor.arbol_categorias.agregar_categoria("Personal/Salud")
-    gestor.arbol_categorias.agregar_categoria("Personal/Finanzas")
-    gestor.arbol_categorias.agregar_categoria("Estudios")
-    gestor.arbol_categorias.agregar_categoria("Estudios/Universidad")
-    gestor.arbol_categorias.agregar_categoria("Estudios/Cursos Online")
+    gestor.agregar_categoria("Trabajo")
+    gestor.agregar_categoria("Trabajo/Proyecto A")
+    gestor.agregar_categoria("Trabajo/Proyecto A/Fase 1")
+    gestor.agregar_categoria("Trabajo/Proyecto A/Fase 2")
+    gestor.agregar_categoria("Trabajo/Proyecto B")
+    gestor.agregar_categoria("Personal")
+    gestor.agregar_categoria("Personal/Salud")
+    gestor.agregar_categoria("Personal/Finanzas")
+    gestor.agregar_categoria("Estudios")
+    gestor.agregar_categoria("Estudios/Universidad")
+    gestor.agregar_categoria("Estudios/Cursos Online")
     
     # Crear tareas con diferentes prioridades y fechas (Demostración de Lista)
     print("Agregando tareas de ejemplo...")
@@ -143,7 +143,7 @@ def mostrar_estadisticas(gestor):
     
     # 2. DEMOSTRACIÓN DE PILAS (HISTORIAL)
     print("\n--- DEMOSTRACIÓN DE PILAS (HISTORIAL) ---")
-    print(f"Acciones en historial: {len(gestor.historial_acciones.pila_deshacer)}")
+    print(f"Acciones en historial: {gestor.historial_acciones.cantidad_deshacer()}")
     print(f"Se puede deshacer: {'Sí' if gestor.historial_acciones.puede_deshacer() else 'No'}")
     print(f"Se puede rehacer: {'Sí' if gestor.historial_acciones.puede_rehacer() else 'No'}")
     
@@ -174,7 +174,10 @@ def mostrar_estadisticas(gestor):
     
     categorias = gestor.obtener_todas_categorias()
     for ruta, nodo, profundidad in categorias:
-        print(f"{'  ' * profundidad}|- {nodo.nombre} ({len(nodo.tareas)} tareas)")
+        # Los totales incluyen las subcategorías y salen de los contadores del árbol
+        estadisticas = gestor.obtener_estadisticas_categoria(ruta)
+        print(f"{'  ' * profundidad}|- {nodo.nombre} ({estadisticas['total']} tareas, "
+              f"{estadisticas['pendientes']} pendientes, {estadisticas['vencidas']} vencidas)")
     
     # Mostrar tareas de una categoría específica
     categoria_ejemplo = "Trabajo/Proyecto A"
@@ -184,6 +187,17 @@ def mostrar_estadisticas(gestor):
     for i, tarea in enumerate(tareas_categoria):
         print(f"{i+1}. {tarea.titulo}")
     
+    estadisticas = gestor.obtener_estadisticas_categoria()
+    print(f"\nResumen: {estadisticas['total']} tareas, {estadisticas['pendientes']} pendientes, "
+          f"{estadisticas['completadas']} completadas, {estadisticas['vencidas']} vencidas")
+    print("Por prioridad: " + ", ".join(f"{prioridad.name}: {cantidad}"
+                                        for prioridad, cantidad in estadisticas['por_prioridad'].items()))
+    
+    vencimientos = gestor.resumen_vencimientos()
+    print(f"Vencidas: {vencimientos['vencidas']}, vencen en los próximos 7 días: {vencimientos['proximas']}")
+    for tarea in gestor.proximas():
+        print(f"  {tarea.fecha_vencimiento.strftime('%d/%m/%Y')} - {tarea.titulo}")
+    
     print("\n" + "="*50)
     print("FIN DE LA DEMOSTRACIÓN")
     print("="*50)
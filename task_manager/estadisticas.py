@@ -0,0 +1,87 @@
+from datetime import datetime
+from .models import Prioridad, fecha_a_entero
+from .lista_ordenada import ListaOrdenada
+
+"""
+Contadores agregados de un conjunto de tareas
+---------------------------------------------
+Guardan totales, pendientes, completadas, tareas por prioridad y las fechas de las
+tareas pendientes (ordenadas) para contar las vencidas con una búsqueda binaria.
+Se actualizan sumando o restando el estado de una sola tarea, así que mantenerlos al
+día cuesta O(log n) por cambio y leerlos no obliga a recorrer ninguna tarea.
+
+Los usan cada NodoCategoria (con los totales de todo su subárbol) y ListaTareas
+(con los de todas las tareas).
+"""
+
+class EstadisticasTareas:
+    __slots__ = ('total', 'pendientes', 'completadas', 'por_prioridad', '_vencimientos')
+
+    def __init__(self):
+        self.total = 0
+        self.pendientes = 0
+        self.completadas = 0
+        self.por_prioridad = [0] * (len(Prioridad) + 1)  # Indexado por Prioridad.value
+        self._vencimientos = ListaOrdenada()  # (vencimiento, id) de las tareas pendientes con fecha
+
+    @staticmethod
+    def estado(tarea):
+        """Lo que aporta la tarea a los contadores; se guarda para poder restarlo después"""
+        return (tarea._prioridad, tarea._completada, tarea._vencimiento, tarea.id)
+
+    def sumar(self, estado):
+        prioridad, completada, vencimiento, tarea_id = estado
+        self.total += 1
+        self.por_prioridad[prioridad] += 1
+        if completada:
+            self.completadas += 1
+        else:
+            self.pendientes += 1
+            if vencimiento is not None:
+                self._vencimientos.agregar((vencimiento, tarea_id))
+
+    def restar(self, estado):
+        prioridad, completada, vencimiento, tarea_id = estado
+        self.total -= 1
+        self.por_prioridad[prioridad] -= 1
+        if completada:
+            self.completadas -= 1
+        else:
+            self.pendientes -= 1
+            if vencimiento is not None:
+                self._vencimientos.eliminar((vencimiento, tarea_id))
+
+    def vencidas(self, ahora=None):
+        """Cantidad de tareas pendientes cuya fecha de vencimiento ya pasó"""
+        limite = fecha_a_entero(ahora or datetime.now())
+        return self._vencimientos.contar_menores((limite,))
+
+    def contar_entre(self, desde=None, hasta=None):
+        """
+        Tareas pendientes con vencimiento en [desde, hasta), con dos búsquedas binarias.
+        Las fechas son enteros de fecha_a_entero(); None deja ese extremo abierto.
+        """
+        fin = self._vencimientos.contar_menores((hasta,)) if hasta is not None else len(self._vencimientos)
+        inicio = self._vencimientos.contar_menores((desde,)) if desde is not None else 0
+        return fin - inicio
+
+    def ids_entre(self, desde=None, hasta=None):
+        """Ids de las tareas pendientes con vencimiento en [desde, hasta), de la fecha más próxima a la más lejana"""
+        elementos = self._vencimientos.iter_desde((desde,)) if desde is not None else iter(self._vencimientos)
+        for vencimiento, tarea_id in elementos:
+            if hasta is not None and vencimiento >= hasta:
+                return
+            yield tarea_id
+
+    def fechas_pendientes(self):
+        """Fechas (enteros) de las tareas pendientes, en orden"""
+        return [vencimiento for vencimiento, _ in self._vencimientos]
+
+    def como_diccionario(self, ahora=None):
+        return {
+            'total': self.total,
+            'pendientes': self.pendientes,
+            'completadas': self.completadas,
+            'por_prioridad': {prioridad: self.por_prioridad[prioridad.value] for prioridad in Prioridad},
+            'vencidas': self.vencidas(ahora),
+        }
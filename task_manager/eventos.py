@@ -0,0 +1,163 @@
+"""
+Bus de eventos de cambio del gestor
+-----------------------------------
+GestorTareas publica un evento por cada cambio observable: tareas agregadas,
+eliminadas o modificadas (con el delta de los campos), categorías nuevas, cambios en
+la cola de urgentes y acciones que entran o salen del historial. Es conveniente
+porque:
+1. Quien muestra o indexa los datos (la interfaz, por ejemplo) aplica solo el cambio
+   recibido en lugar de reconstruir todo después de cada operación.
+2. Cada evento lleva lo necesario para actualizarse sin volver a consultar: la tarea,
+   {campo: (anterior, nuevo)}, la ruta de la categoría o la acción del historial.
+3. Dentro de una operación compuesta (una transacción, deshacer, una importación) los
+   eventos se acumulan y se combinan: varios cambios de la misma tarea quedan en uno,
+   una tarea agregada y eliminada en el mismo lote no se publica, y los cambios de la
+   cola se reducen a un aviso. Los suscriptores reciben un solo lote al final.
+
+Los suscriptores se registran con suscribir(oyente, tipos) y reciben listas de eventos.
+Mientras no hay ninguno, el gestor no crea eventos (ver BusEventos.activo), así que el
+bus no cuesta nada a quien no lo usa.
+"""
+
+TAREA_AGREGADA = "tarea_agregada"
+TAREA_ELIMINADA = "tarea_eliminada"
+TAREA_MODIFICADA = "tarea_modificada"      # cambios: {campo: (anterior, nuevo)}
+CATEGORIA_AGREGADA = "categoria_agregada"  # ruta
+COLA_MODIFICADA = "cola_modificada"
+HISTORIAL_APILADA = "historial_apilada"        # accion: registrada o rehecha
+HISTORIAL_DESAPILADA = "historial_desapilada"  # accion: deshecha
+
+_EVENTOS_TAREA = (TAREA_AGREGADA, TAREA_ELIMINADA, TAREA_MODIFICADA)
+
+
+class Evento:
+    __slots__ = ('tipo', 'tarea', 'cambios', 'ruta', 'accion')
+
+    def __init__(self, tipo, tarea=None, cambios=None, ruta=None, accion=None):
+        self.tipo = tipo
+        self.tarea = tarea
+        self.cambios = cambios
+        self.ruta = ruta
+        self.accion = accion
+
+    def __repr__(self):
+        detalle = self.tarea.id if self.tarea is not None else self.ruta
+        return f"Evento({self.tipo}, {detalle}, {self.cambios})"
+
+
+def combinar_eventos(eventos):
+    """
+    Reduce un lote de eventos a su efecto neto:
+    - Las modificaciones de una misma tarea se unen (anterior más antiguo, nuevo más
+      reciente) y se descartan los campos que volvieron a su valor.
+    - Una tarea agregada en el lote se publica solo como agregada, con su estado final;
+      si además se eliminó, no se publica.
+    - Las categorías se publican una vez, antes que las tareas que pueden usarlas.
+    - Los cambios de la cola quedan en un solo evento; el historial se conserva en orden.
+    """
+    categorias = {}
+    tareas = {}  # id -> eventos de esa tarea, en el orden de su primer cambio
+    historial = []
+    cola = False
+    for evento in eventos:
+        tipo = evento.tipo
+        if tipo in _EVENTOS_TAREA:
+            entradas = tareas.setdefault(evento.tarea.id, [])
+            ultimo = entradas[-1] if entradas else None
+            if tipo == TAREA_MODIFICADA:
+                if ultimo is not None and ultimo.tipo == TAREA_AGREGADA:
+                    continue  # La agregada ya lleva el estado final de la tarea
+                if ultimo is not None and ultimo.tipo == TAREA_MODIFICADA:
+                    cambios = dict(ultimo.cambios)
+                    for campo, (anterior, nuevo) in evento.cambios.items():
+                        cambios[campo] = (cambios[campo][0] if campo in cambios else anterior, nuevo)
+                    entradas[-1] = Evento(TAREA_MODIFICADA, evento.tarea, cambios)
+                    continue
+            elif tipo == TAREA_ELIMINADA and ultimo is not None and ultimo.tipo == TAREA_AGREGADA:
+                entradas.pop()
+                continue
+            entradas.append(evento)
+        elif tipo == CATEGORIA_AGREGADA:
+            categorias.setdefault(evento.ruta, evento)
+        elif tipo == COLA_MODIFICADA:
+            cola = True
+        else:
+            historial.append(evento)
+
+    resultado = list(categorias.values())
+    for entradas in tareas.values():
+        for evento in entradas:
+            if evento.tipo == TAREA_MODIFICADA:
+                cambios = {campo: valores for campo, valores in evento.cambios.items() if valores[0] != valores[1]}
+                if not cambios:
+                    continue
+                evento = Evento(TAREA_MODIFICADA, evento.tarea, cambios)
+            resultado.append(evento)
+    if cola:
+        resultado.append(Evento(COLA_MODIFICADA))
+    resultado.extend(historial)
+    return resultado
+
+
+class BusEventos:
+    def __init__(self):
+        self._oyentes = []   # (oyente, tipos o None)
+        self._diferido = 0
+        self._pendientes = []
+        self.activo = False  # Hay suscriptores: los emisores pueden saltearse crear eventos
+
+    def suscribir(self, oyente, tipos=None):
+        """
+        Registra oyente(eventos), que recibe listas de Evento.
+
+        Args:
+            oyente: Función a llamar con cada lote de eventos
+            tipos: Tipos de evento que le interesan (None = todos)
+        """
+        self._oyentes.append((oyente, frozenset(tipos) if tipos is not None else None))
+        self.activo = True
+
+    def desuscribir(self, oyente):
+        self._oyentes = [(o, tipos) for o, tipos in self._oyentes if o != oyente]
+        self.activo = bool(self._oyentes)
+
+    def emitir(self, evento):
+        if not self.activo:
+            return
+        if self._diferido:
+            self._pendientes.append(evento)
+        else:
+            self._publicar([evento])
+
+    def diferir(self):
+        """Acumula los eventos hasta el reanudar() correspondiente"""
+        self._diferido += 1
+
+    def reanudar(self):
+        self._diferido -= 1
+        if self._diferido:
+            return
+        pendientes, self._pendientes = self._pendientes, []
+        if pendientes:
+            self._publicar(combinar_eventos(pendientes))
+
+    def agrupar(self):
+        """
+        Para usar con with: publica como un solo lote combinado los eventos emitidos
+        dentro del bloque. Devuelve el propio bus, sin crear un generador por bloque.
+        """
+        return self
+
+    def __enter__(self):
+        self._diferido += 1
+        return self
+
+    def __exit__(self, *excepcion):
+        self.reanudar()
+        return False
+
+    def _publicar(self, eventos):
+        for oyente, tipos in list(self._oyentes):
+            lote = eventos if tipos is None else [evento for evento in eventos if evento.tipo in tipos]
+            if lote:
+                oyente(lote)
@@ -1,22 +1,124 @@
-from datetime import datetime
+import logging
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta
 from .models import Tarea, Prioridad
+from .importacion import abrir_origen, leer_csv, leer_jsonl, filas_a_tareas, en_lotes
+from .metricas import medido
 from .lista_tareas import ListaTareas
 from .historial_acciones import Accion, HistorialAcciones
 from .cola_urgentes import ColaTareasUrgentes
 from .arbol_categorias import ArbolCategorias
+from .indice_texto import IndiceTexto, terminos
+from .consultas import ConsultaTareas
+from .concurrencia import CerrojoLectoresEscritores, con_lectura, con_escritura
+from .eventos import (BusEventos, Evento, TAREA_AGREGADA, TAREA_ELIMINADA, TAREA_MODIFICADA,
+                      CATEGORIA_AGREGADA, COLA_MODIFICADA, HISTORIAL_APILADA, HISTORIAL_DESAPILADA)
+
+logger = logging.getLogger(__name__)
 
 class GestorTareas:
-    def __init__(self):
-        self.lista_tareas = ListaTareas()
-        self.historial_acciones = HistorialAcciones()
+    def __init__(self, persistencia=None, almacen=None, historial=None, concurrente=False):
+        """
+        Args:
+            persistencia: Objeto Persistencia opcional. Si se indica, se restaura el
+                estado guardado y cada cambio posterior se registra en su diario.
+            almacen: Almacenamiento alternativo (p. ej. AlmacenSQLite) que aporta su
+                propia lista_tareas y arbol_categorias. Por defecto se usan las
+                estructuras en memoria.
+            historial: HistorialAcciones ya configurado (p. ej. con límite de memoria
+                u horizonte). Por defecto, uno sin límites.
+            concurrente: Proteger las operaciones con un cerrojo de lectores y
+                escritores para compartir el gestor entre hilos (ver concurrencia.py)
+        """
+        self.cerrojo = CerrojoLectoresEscritores() if concurrente else None
+        if almacen is not None:
+            self.lista_tareas = almacen.lista_tareas
+            self.arbol_categorias = almacen.arbol_categorias
+        else:
+            self.lista_tareas = ListaTareas()
+            self.arbol_categorias = ArbolCategorias()
+        self.almacen = almacen
+        self.historial_acciones = historial if historial is not None else HistorialAcciones()
+        # Las acciones que vuelven de disco se reconectan con las tareas vivas de la lista
+        self.historial_acciones.resolver_tarea = self.lista_tareas.obtener_tarea
         self.cola_urgentes = ColaTareasUrgentes()
-        self.arbol_categorias = ArbolCategorias()
+        self._transaccion = None  # Acciones de la transacción en curso (ver transaccion())
+        # La cola sigue a la lista: entran las tareas urgentes pendientes y salen las
+        # eliminadas, completadas o que dejan de ser urgentes (también al deshacer/rehacer)
+        self.lista_tareas.suscribir(self._sincronizar_cola)
+        self.lista_tareas.suscribir(self._sincronizar_estadisticas)
+        # Índice invertido de títulos y descripciones para buscar_tareas()
+        self.indice_texto = IndiceTexto(self.lista_tareas)
+        # Eventos de cambio para quien muestre los datos (ver eventos.py); los de tareas
+        # se traducen de los avisos de la lista, cuando la cola ya está al día
+        self.eventos = BusEventos()
+        self.lista_tareas.suscribir(self._publicar_cambio)
         
         # Crear algunas categorías predeterminadas
         self.arbol_categorias.agregar_categoria("Trabajo")
         self.arbol_categorias.agregar_categoria("Personal")
         self.arbol_categorias.agregar_categoria("Estudios")
         
+        self.persistencia = persistencia
+        if persistencia is not None:
+            persistencia.adjuntar(self)
+        
+        if concurrente:
+            # Las lecturas no deben modificar nada
+            self.preparar_consultas()
+    
+    def preparar_consultas(self):
+        """
+        Construye ya lo que de otro modo se construye en la primera consulta (el índice
+        de texto, la lista de una instantánea), para que las consultas hechas desde otro
+        hilo no modifiquen nada.
+        """
+        with self.escritura():
+            self.indice_texto.construir()
+            if hasattr(self.lista_tareas, 'cargar_todo'):
+                self.lista_tareas.cargar_todo()
+    
+    def lectura(self):
+        """
+        Para usar con with: retiene el cerrojo en modo lectura (sin efecto si el gestor
+        no es concurrente). Hace falta para recorrer los iteradores que devuelven
+        tareas_por_vencimiento(), buscar_tareas() o iter_tareas_por_categoria()
+        mientras otros hilos modifican el gestor.
+        """
+        return self.cerrojo.lectura() if self.cerrojo is not None else nullcontext()
+    
+    def escritura(self):
+        """Para usar con with: varias operaciones seguidas sin que otro hilo intervenga"""
+        return self.cerrojo.escritura() if self.cerrojo is not None else nullcontext()
+    
+    @con_escritura
+    def cerrar(self):
+        """Confirma en disco los cambios pendientes (si hay persistencia)"""
+        self.historial_acciones.cerrar()
+        if self.persistencia is not None:
+            self.persistencia.cerrar()
+        if self.almacen is not None:
+            self.almacen.cerrar()
+    
+    @con_escritura
+    def agregar_categoria(self, ruta):
+        nuevas = []
+        if self.arbol_categorias.buscar_categoria(ruta) is None:
+            # La categoría y las intermedias que falten, para publicarlas
+            partes = [parte for parte in ruta.split('/') if parte]
+            nuevas = [r for r in ("/".join(partes[:i + 1]) for i in range(len(partes)))
+                      if self.arbol_categorias.buscar_categoria(r) is None]
+        nodo = self.arbol_categorias.agregar_categoria(ruta)
+        if self.persistencia is not None:
+            self.persistencia.categoria_agregada(ruta)
+        with self.eventos.agrupar():
+            for nueva in nuevas:
+                self.eventos.emitir(Evento(CATEGORIA_AGREGADA, ruta=nueva))
+        return nodo
+        
+    @medido("gestor.crear_tarea")
+    @con_escritura
     def crear_tarea(self, titulo, descripcion, prioridad, fecha_vencimiento, categoria=None):
         # Asegurar que fecha_vencimiento sea datetime
         if hasattr(fecha_vencimiento, 'date') and callable(getattr(fecha_vencimiento, 'date')):
@@ -28,118 +130,564 @@ class GestorTareas:
         
         tarea = Tarea(titulo, descripcion, prioridad, fecha_vencimiento)
         
-        # Agregar a la lista general
-        self.lista_tareas.agregar_tarea(tarea)
-        
-        # Registrar acción
-        self.historial_acciones.agregar_accion(Accion("AGREGAR", tarea))
-        
-        # Agregar a la categoría si se especificó
-        if categoria:
-            self.arbol_categorias.agregar_tarea_a_categoria(tarea, categoria)
+        with self.eventos.agrupar(), self._diario():
+            # Agregar a la lista general
+            self.lista_tareas.agregar_tarea(tarea)
+            
+            # Registrar acción
+            self._registrar(Accion("AGREGAR", tarea))
             
-        # Si es urgente, añadir a la cola de urgentes
-        if prioridad == Prioridad.URGENTE:
-            self.cola_urgentes.agregar_tarea(tarea)
+            # Agregar a la categoría si se especificó
+            if categoria:
+                self.arbol_categorias.agregar_tarea_a_categoria(tarea, categoria)
             
         return tarea
         
+    @medido("gestor.importar")
+    @con_escritura
+    def importar(self, origen, formato=None, tamano_lote=1000):
+        """
+        Importa tareas en masa desde CSV o JSONL leyendo el origen como flujo.
+        Las categorías que falten se crean una sola vez por ruta, las tareas se
+        insertan por lotes y toda la importación queda como una única acción
+        que se deshace o rehace de una vez.
+        
+        Args:
+            origen: Ruta del archivo o archivo de texto ya abierto
+            formato: "csv" o "jsonl"; si no se indica se deduce de la extensión
+            tamano_lote: Tareas que se insertan juntas en la lista
+            
+        Returns:
+            Diccionario con importadas, omitidas, errores [(fila, mensaje)],
+            segundos y filas_por_segundo
+        """
+        if formato is None:
+            nombre = origen if isinstance(origen, str) else getattr(origen, "name", "")
+            formato = "jsonl" if str(nombre).lower().endswith((".jsonl", ".json")) else "csv"
+        lectores = {"csv": leer_csv, "jsonl": leer_jsonl}
+        if formato not in lectores:
+            raise ValueError(f"Formato de importación desconocido: {formato}")
+        
+        archivo = abrir_origen(origen)
+        errores = []
+        importadas = []
+        nodos = {}  # ruta -> nodo, para crear o buscar cada categoría una sola vez
+        inicio = time.perf_counter()
+        self.eventos.diferir()
+        try:
+            for lote in en_lotes(filas_a_tareas(lectores[formato](archivo), errores), tamano_lote):
+                ubicadas = []
+                for tarea in lote:
+                    if tarea.categoria:
+                        nodo = nodos.get(tarea.categoria)
+                        if nodo is None:
+                            nodo = nodos[tarea.categoria] = self.agregar_categoria(tarea.categoria)
+                        # La tarea guarda la ruta como quedó en el árbol ("/Trabajo//Q/" -> "Trabajo/Q")
+                        tarea.categoria = nodo.ruta
+                        ubicadas.append((tarea, nodo))
+                self.lista_tareas.agregar_tareas(lote)
+                for tarea, nodo in ubicadas:
+                    nodo.agregar_tarea(tarea)
+                importadas.extend(lote)
+        finally:
+            if archivo is not origen:
+                archivo.close()
+            # Aunque la lectura falle a mitad, lo ya importado se puede deshacer
+            if importadas:
+                self._registrar(Accion("IMPORTAR", None, tareas=importadas))
+            self.eventos.reanudar()
+        
+        segundos = time.perf_counter() - inicio
+        filas = len(importadas) + len(errores)
+        return {
+            'importadas': len(importadas),
+            'omitidas': len(errores),
+            'errores': errores,
+            'segundos': segundos,
+            'filas_por_segundo': filas / segundos if segundos > 0 else float(filas),
+        }
+        
+    @medido("gestor.eliminar_tarea")
+    @con_escritura
     def eliminar_tarea(self, tarea_id):
         tarea = self.lista_tareas.obtener_tarea(tarea_id)
         if tarea:
-            # Eliminar de la lista general
-            self.lista_tareas.eliminar_tarea(tarea_id)
-            
-            # Registrar acción
-            self.historial_acciones.agregar_accion(Accion("ELIMINAR", tarea))
-            
-            # No es necesario eliminar explícitamente de la cola de urgentes
-            # ya que las referencias seguirán apuntando al objeto
+            with self.eventos.agrupar(), self._diario():
+                # Eliminar de la lista general y de su categoría
+                self.lista_tareas.eliminar_tarea(tarea_id)
+                self._quitar_de_categoria(tarea)
+                
+                # Registrar acción (la lista avisa a la cola de urgentes para que la quite)
+                self._registrar(Accion("ELIMINAR", tarea))
             
             return tarea
         return None
         
+    @medido("gestor.actualizar_tarea")
+    @con_escritura
     def actualizar_tarea(self, tarea_id, **kwargs):
+        """
+        Cambia los campos indicados de una tarea. Como en Tarea.actualizar, un valor
+        None deja el campo como está; una categoría vacía ("") quita la categoría.
+        
+        Args:
+            tarea_id: Id de la tarea
+            **kwargs: titulo, descripcion, prioridad, fecha_vencimiento, categoria, completada
+            
+        Returns:
+            La tarea, o None si no existe
+        """
         tarea = self.lista_tareas.obtener_tarea(tarea_id)
         if tarea:
-            # Guardar valores antiguos para poder deshacer
-            valores_antiguos = {
-                'titulo': tarea.titulo,
-                'descripcion': tarea.descripcion,
-                'prioridad': tarea.prioridad,
-                'fecha_vencimiento': tarea.fecha_vencimiento,
-                'categoria': tarea.categoria
-            }
-            
-            # Actualizar la tarea
-            resultado = self.lista_tareas.actualizar_tarea(tarea_id, **kwargs)
-            
-            # Registrar acción
-            self.historial_acciones.agregar_accion(Accion("ACTUALIZAR", tarea, valores_antiguos))
+            valores = self._normalizar_valores(kwargs)
+            antiguos = {campo: getattr(tarea, campo) for campo in valores}
             
-            # Verificar si es urgente para añadir a la cola
-            if tarea.prioridad == Prioridad.URGENTE and valores_antiguos['prioridad'] != Prioridad.URGENTE:
-                self.cola_urgentes.agregar_tarea(tarea)
+            with self.eventos.agrupar(), self._diario():
+                # Actualizar la tarea (la categoría se mueve también en el árbol)
+                self._aplicar_valores(tarea, valores)
+                
+                # Registrar solo los campos que efectivamente cambiaron (delta en ambos sentidos)
+                nuevos = {campo: getattr(tarea, campo) for campo in valores}
+                accion = Accion("ACTUALIZAR", tarea, antiguos, valores_nuevos=nuevos)
+                if accion.cambios:
+                    self._registrar(accion)
                 
-            return resultado
+            return tarea
         return None
+    
+    def completar_tarea(self, tarea_id, completada=True):
+        """Marca la tarea como completada (o pendiente) dejando la acción en el historial"""
+        return self.actualizar_tarea(tarea_id, completada=completada)
+        
+    @contextmanager
+    def transaccion(self, descripcion=None):
+        """
+        Agrupa todas las modificaciones del bloque en una sola acción del historial:
         
+            with gestor.transaccion("Completar Trabajo"):
+                for tarea in tareas:
+                    gestor.completar_tarea(tarea.id)
+        
+        Mientras dura, la reubicación en los índices ordenados y los avisos a los
+        suscriptores (cola de urgentes, contadores, persistencia) se posponen hasta el
+        final, con SQLite todo se escribe en una única transacción y los eventos del
+        bus se publican combinados en un solo lote. Si el bloque
+        lanza una excepción, los cambios ya hechos se deshacen y la excepción se propaga.
+        Las transacciones anidadas forman parte de la exterior. En un gestor concurrente
+        el bloque retiene el cerrojo de escritura hasta terminar.
+        
+        Args:
+            descripcion: Texto que se muestra en el historial
+        """
+        with self.escritura():
+            if self._transaccion is not None:
+                yield
+                return
+            acciones = self._transaccion = []
+            with self.eventos.agrupar(), self._diario():
+                try:
+                    with self._agrupado():
+                        try:
+                            yield
+                        except BaseException:
+                            self._transaccion = None
+                            for accion in reversed(acciones):
+                                self._deshacer_accion(accion)
+                            raise
+                finally:
+                    self._transaccion = None
+                if acciones:
+                    self._registrar(Accion("TRANSACCION", None, acciones=acciones, descripcion=descripcion))
+    
+    @contextmanager
+    def _agrupado(self):
+        """Difiere índices y avisos de la lista (y agrupa las escrituras en SQLite)"""
+        lote = getattr(self.almacen, 'lote', None)
+        with (lote() if lote is not None else nullcontext()):
+            self.lista_tareas.diferir()
+            try:
+                yield
+            finally:
+                # Los nodos copian el estado de la tarea al recibirla: si se movió y después
+                # un campo volvió a su valor original no llega aviso, hay que volver a contarla
+                for tarea in self.lista_tareas.reanudar():
+                    self.arbol_categorias.actualizar_estadisticas(tarea)
+    
+    def _diario(self):
+        """Con persistencia, los cambios del bloque van al diario como un solo registro"""
+        return self.persistencia.agrupar() if self.persistencia is not None else nullcontext()
+    
+    def _registrar(self, accion):
+        if self._transaccion is not None:
+            self._transaccion.append(accion)
+        else:
+            self.historial_acciones.agregar_accion(accion)
+            if self.eventos.activo:
+                self.eventos.emitir(Evento(HISTORIAL_APILADA, accion=accion))
+        
+    @medido("gestor.deshacer")
+    @con_escritura
     def deshacer(self):
         if not self.historial_acciones.puede_deshacer():
             return False
             
-        accion = self.historial_acciones.deshacer()
+        with self.eventos.agrupar(), self._diario():
+            accion = self.historial_acciones.deshacer()
+            self._deshacer_accion(accion)
+            self.eventos.emitir(Evento(HISTORIAL_DESAPILADA, accion=accion))
+        return True
         
+    @medido("gestor.rehacer")
+    @con_escritura
+    def rehacer(self):
+        if not self.historial_acciones.puede_rehacer():
+            return False
+            
+        with self.eventos.agrupar(), self._diario():
+            accion = self.historial_acciones.rehacer()
+            self._rehacer_accion(accion)
+            self.eventos.emitir(Evento(HISTORIAL_APILADA, accion=accion))
+        return True
+    
+    def _deshacer_accion(self, accion):
         if accion.tipo_accion == "AGREGAR":
             # Deshacer una adición es eliminar
             self.lista_tareas.eliminar_tarea(accion.tarea.id)
+            self._quitar_de_categoria(accion.tarea)
             
         elif accion.tipo_accion == "ELIMINAR":
             # Deshacer una eliminación es añadir de nuevo
             self.lista_tareas.agregar_tarea(accion.tarea)
+            self._restaurar_en_categoria(accion.tarea)
             
         elif accion.tipo_accion == "ACTUALIZAR":
-            # Deshacer una actualización es restaurar los valores antiguos
+            # Deshacer una actualización es restaurar los valores antiguos de los campos que cambiaron
             tarea = self.lista_tareas.obtener_tarea(accion.tarea.id)
             if tarea:
-                tarea.actualizar(**accion.valores_antiguos)
+                self._aplicar_valores(tarea, accion.valores_antiguos)
                 
-        return True
-        
-    def rehacer(self):
-        if not self.historial_acciones.puede_rehacer():
-            return False
+        elif accion.tipo_accion == "IMPORTAR":
+            # Deshacer una importación es eliminar todas sus tareas
+            self._quitar_tareas(accion.tareas)
             
-        accion = self.historial_acciones.rehacer()
-        
+        elif accion.tipo_accion == "TRANSACCION":
+            # Deshacer una transacción es deshacer sus acciones en orden inverso, de una vez
+            with self._agrupado():
+                for parte in reversed(accion.acciones):
+                    self._deshacer_accion(parte)
+    
+    def _rehacer_accion(self, accion):
         if accion.tipo_accion == "AGREGAR":
             # Rehacer una adición es añadir de nuevo
             self.lista_tareas.agregar_tarea(accion.tarea)
+            self._restaurar_en_categoria(accion.tarea)
             
         elif accion.tipo_accion == "ELIMINAR":
             # Rehacer una eliminación es eliminar
             self.lista_tareas.eliminar_tarea(accion.tarea.id)
+            self._quitar_de_categoria(accion.tarea)
             
         elif accion.tipo_accion == "ACTUALIZAR":
-            # Rehacer una actualización
-            # Para simplificar, solo dejamos que la tarea siga con sus valores actuales
-            pass
+            # Rehacer una actualización es volver a aplicar los valores nuevos
+            tarea = self.lista_tareas.obtener_tarea(accion.tarea.id)
+            if tarea:
+                self._aplicar_valores(tarea, accion.valores_nuevos)
             
-        return True
+        elif accion.tipo_accion == "IMPORTAR":
+            # Rehacer una importación es volver a añadir todas sus tareas
+            self._restaurar_tareas(accion.tareas)
+            
+        elif accion.tipo_accion == "TRANSACCION":
+            with self._agrupado():
+                for parte in accion.acciones:
+                    self._rehacer_accion(parte)
+        
+    def _quitar_de_categoria(self, tarea):
+        if tarea.categoria:
+            nodo = self.arbol_categorias.buscar_categoria(tarea.categoria)
+            if nodo:
+                nodo.eliminar_tarea(tarea)
+    
+    def _restaurar_en_categoria(self, tarea):
+        if tarea.categoria:
+            nodo = self.arbol_categorias.buscar_categoria(tarea.categoria)
+            if nodo:
+                nodo.agregar_tarea(tarea)
+    
+    def _agrupar_por_categoria(self, tareas):
+        grupos = {}
+        for tarea in tareas:
+            if tarea.categoria:
+                grupos.setdefault(tarea.categoria, []).append(tarea)
+        return grupos
+    
+    def _quitar_tareas(self, tareas):
+        for tarea in tareas:
+            self.lista_tareas.eliminar_tarea(tarea.id)
+        for ruta, grupo in self._agrupar_por_categoria(tareas).items():
+            nodo = self.arbol_categorias.buscar_categoria(ruta)
+            if nodo:
+                nodo.eliminar_tareas(grupo)
+    
+    def _restaurar_tareas(self, tareas):
+        self.lista_tareas.agregar_tareas(tareas)
+        for ruta, grupo in self._agrupar_por_categoria(tareas).items():
+            nodo = self.arbol_categorias.buscar_categoria(ruta)
+            if nodo:
+                for tarea in grupo:
+                    nodo.agregar_tarea(tarea)
+    
+    _CAMPOS = ('titulo', 'descripcion', 'prioridad', 'fecha_vencimiento', 'categoria', 'completada')
+    
+    def _normalizar_valores(self, valores):
+        """Descarta los None, convierte date en datetime y "" (sin categoría) en None"""
+        normalizados = {}
+        for campo, valor in valores.items():
+            if campo not in self._CAMPOS:
+                raise TypeError(f"Campo de tarea desconocido: '{campo}'")
+            if valor is None:
+                continue
+            if campo == 'fecha_vencimiento' and not isinstance(valor, datetime):
+                valor = datetime.combine(valor, datetime.min.time())
+            elif campo == 'categoria':
+                valor = valor or None
+            normalizados[campo] = valor
+        return normalizados
+    
+    def _aplicar_valores(self, tarea, valores):
+        """
+        Asigna cada campo indicado (también None) en O(campos). Las notificaciones de
+        la tarea mantienen al día la lista, sus índices ordenados, la cola de urgentes y
+        los contadores; la categoría se mueve además en el árbol. Si algún campo falla,
+        se restauran los ya asignados antes de propagar el error.
+        """
+        aplicados = []
+        try:
+            for campo, valor in valores.items():
+                aplicados.append((campo, getattr(tarea, campo)))
+                self._asignar_campo(tarea, campo, valor)
+        except Exception:
+            for campo, anterior in reversed(aplicados):
+                self._asignar_campo(tarea, campo, anterior)
+            raise
+    
+    def _asignar_campo(self, tarea, campo, valor):
+        if campo != 'categoria':
+            setattr(tarea, campo, valor)
+        elif valor != tarea.categoria:
+            if valor:
+                # agregar_tarea_a_categoria ya la quita de la categoría anterior
+                self.arbol_categorias.agregar_tarea_a_categoria(tarea, valor)
+            else:
+                self._quitar_de_categoria(tarea)
+                tarea.categoria = None
+        
+    def _sincronizar_cola(self, evento, tarea, campo, valor_anterior):
+        estaba = tarea in self.cola_urgentes
+        if evento == "eliminada":
+            self.cola_urgentes.eliminar_tarea(tarea)
+        elif evento == "agregada" or campo in ("prioridad", "completada"):
+            if tarea.prioridad == Prioridad.URGENTE and not tarea.completada:
+                self.cola_urgentes.agregar_tarea(tarea)
+            else:
+                self.cola_urgentes.eliminar_tarea(tarea)
+        elif campo == "fecha_vencimiento":
+            self.cola_urgentes.actualizar_tarea(tarea)
+        if self.eventos.activo and (estaba or tarea in self.cola_urgentes):
+            self.eventos.emitir(Evento(COLA_MODIFICADA))
+    
+    def _publicar_cambio(self, evento, tarea, campo, valor_anterior):
+        if not self.eventos.activo:
+            return
+        if evento == "agregada":
+            self.eventos.emitir(Evento(TAREA_AGREGADA, tarea))
+        elif evento == "eliminada":
+            self.eventos.emitir(Evento(TAREA_ELIMINADA, tarea))
+        else:
+            self.eventos.emitir(Evento(TAREA_MODIFICADA, tarea, {campo: (valor_anterior, getattr(tarea, campo))}))
+    
+    def _sincronizar_estadisticas(self, evento, tarea, campo, valor_anterior):
+        # Altas, bajas y cambios de categoría ya pasan por los nodos del árbol
+        if evento == "modificada" and campo in ('prioridad', 'fecha_vencimiento', 'completada'):
+            self.arbol_categorias.actualizar_estadisticas(tarea)
+    
+    @con_lectura
+    def obtener_estadisticas_categoria(self, ruta=None, ahora=None):
+        """
+        Totales de una categoría y sus subcategorías (o de todas las tareas si la
+        ruta es None o "todas"), leídos de los contadores agregados.
+        
+        Args:
+            ruta: Ruta de la categoría
+            ahora: Momento de referencia para contar las vencidas (por defecto, ahora)
+            
+        Returns:
+            Diccionario con total, pendientes, completadas, por_prioridad
+            ({Prioridad: cantidad}) y vencidas; None si la categoría no existe
+        """
+        if not ruta or ruta == "todas":
+            return self.lista_tareas.obtener_estadisticas(ahora)
+        return self.arbol_categorias.obtener_estadisticas(ruta, ahora)
+    
+    def tareas_por_vencimiento(self, desde=None, hasta=None, ruta_categoria=None):
+        """
+        Tareas pendientes que vencen en [desde, hasta), de la más próxima a la más
+        lejana. Se resuelve con búsquedas binarias sobre las fechas pendientes que ya
+        mantienen los contadores de la lista y de cada categoría: O(log n + k).
+        
+        Args:
+            desde, hasta: Límites del rango (None = sin límite)
+            ruta_categoria: Limitar a esta categoría y sus subcategorías
+            
+        Returns:
+            Iterador de tareas
+        """
+        if not ruta_categoria or ruta_categoria == "todas":
+            return self.lista_tareas.iter_pendientes_entre(desde, hasta)
+        ids = self.arbol_categorias.iter_ids_pendientes_entre(ruta_categoria, desde, hasta)
+        return (tarea for tarea in map(self.lista_tareas.obtener_tarea, ids) if tarea is not None)
+    
+    @con_lectura
+    def contar_por_vencimiento(self, desde=None, hasta=None, ruta_categoria=None):
+        """Cantidad de tareas que devolvería tareas_por_vencimiento(), en O(log n)"""
+        if not ruta_categoria or ruta_categoria == "todas":
+            return self.lista_tareas.contar_pendientes_entre(desde, hasta)
+        return self.arbol_categorias.contar_pendientes_entre(ruta_categoria, desde, hasta) or 0
+    
+    def vencidas(self, ahora=None, ruta_categoria=None):
+        """Tareas pendientes cuya fecha de vencimiento ya pasó, de la más antigua a la más reciente"""
+        return self.tareas_por_vencimiento(None, ahora or datetime.now(), ruta_categoria)
+    
+    def proximas(self, horizonte=timedelta(days=7), ahora=None, ruta_categoria=None):
+        """Tareas pendientes que vencen entre ahora y ahora + horizonte"""
+        ahora = ahora or datetime.now()
+        return self.tareas_por_vencimiento(ahora, ahora + horizonte, ruta_categoria)
+    
+    @con_lectura
+    def resumen_vencimientos(self, ruta_categoria=None, ahora=None, horizonte=timedelta(days=7)):
+        """
+        Returns:
+            Diccionario con la cantidad de tareas 'vencidas' y 'proximas' (dentro del horizonte)
+        """
+        ahora = ahora or datetime.now()
+        return {
+            'vencidas': self.contar_por_vencimiento(None, ahora, ruta_categoria),
+            'proximas': self.contar_por_vencimiento(ahora, ahora + horizonte, ruta_categoria),
+        }
+    
+    def buscar_tareas(self, consulta, ruta_categoria=None):
+        """
+        Tareas cuyo título o descripción contiene todos los términos de la consulta
+        (sin distinguir mayúsculas ni acentos; cada término puede ser el comienzo de
+        una palabra), de mayor a menor prioridad.
         
+        Args:
+            consulta: Texto de búsqueda, p. ej. "reunion proy"
+            ruta_categoria: Limitar la búsqueda a esta categoría y sus subcategorías
+                (None o "todas" para buscar en todas)
+            
+        Returns:
+            Iterador de tareas (todas las de la categoría si la consulta no tiene términos)
+        """
+        if not terminos(consulta):
+            return self.iter_tareas_por_categoria(ruta_categoria, por_prioridad=True)
+        ids = self.indice_texto.buscar(consulta)
+        if not ids:
+            return iter(())
+        
+        def en_categoria(tarea):
+            return True
+        if ruta_categoria and ruta_categoria != "todas":
+            nodo = self.arbol_categorias.buscar_categoria(ruta_categoria)
+            if nodo is None:
+                return iter(())
+            prefijo = nodo.ruta + "/"
+            def en_categoria(tarea):
+                return bool(tarea.categoria) and (tarea.categoria == nodo.ruta or tarea.categoria.startswith(prefijo))
+        
+        # Igual que en iter_tareas_por_categoria: con muchos resultados se filtra el índice
+        # por prioridad (ya ordenado); con pocos, se ordenan solo ellos
+        if len(ids) * 8 >= len(self.lista_tareas):
+            return (tarea for tarea in self.lista_tareas.iter_por_prioridad()
+                    if tarea.id in ids and en_categoria(tarea))
+        tareas = [tarea for tarea in map(self.lista_tareas.obtener_tarea, ids)
+                  if tarea is not None and en_categoria(tarea)]
+        tareas.sort(key=self.lista_tareas.clave_prioridad, reverse=True)
+        return iter(tareas)
+    
+    def consulta(self, **criterios):
+        """
+        Consulta compuesta sobre las tareas; se ejecuta con ejecutar() o se inspecciona
+        con explicar(). Ver ConsultaTareas para los criterios admitidos.
+        """
+        return ConsultaTareas(self, **criterios)
+    
+    def consultar(self, **criterios):
+        """
+        Tareas que cumplen todos los criterios, p. ej.
+        consultar(ruta_categoria="Trabajo", completada=False, hasta=ahora, orden='vencimiento', limite=20)
+        
+        Returns:
+            Lista de tareas
+        """
+        return ConsultaTareas(self, **criterios).ejecutar()
+    
+    @con_escritura
     def procesar_siguiente_urgente(self):
-        return self.cola_urgentes.procesar_siguiente()
+        tarea = self.cola_urgentes.procesar_siguiente()
+        if tarea is not None and self.eventos.activo:
+            self.eventos.emitir(Evento(COLA_MODIFICADA))
+        return tarea
         
+    @con_lectura
     def obtener_todas_categorias(self):
         return self.arbol_categorias.obtener_todas_categorias()
         
+    @con_lectura
     def obtener_tareas_por_categoria(self, ruta_categoria):
-        print(f"Buscando tareas en categoría: '{ruta_categoria}'")  # Depuración
+        logger.debug("Buscando tareas en categoría: '%s'", ruta_categoria)
+        return list(self.iter_tareas_por_categoria(ruta_categoria))
+    
+    def iter_tareas_por_categoria(self, ruta_categoria, solo_pendientes=False, prioridad_minima=None,
+                                  por_prioridad=False):
+        """
+        Recorre perezosamente las tareas de una categoría y sus subcategorías (o todas
+        si la ruta es None o "todas"), aplicando los filtros indicados.
+        
+        Args:
+            ruta_categoria: Ruta de la categoría
+            solo_pendientes: Omitir las tareas completadas
+            prioridad_minima: Omitir las tareas con prioridad menor a esta
+            por_prioridad: Entregarlas de mayor a menor prioridad (como la vista "todas")
+            
+        Returns:
+            Iterador de tareas
+        """
+        def cumple(tarea):
+            if solo_pendientes and tarea.completada:
+                return False
+            return not prioridad_minima or tarea.prioridad.value >= prioridad_minima.value
         
         # Caso especial para "todas" o cuando no hay categoría seleccionada
         if not ruta_categoria or ruta_categoria == "todas":
-            print("Devolviendo todas las tareas (categoría especial)")
-            return self.lista_tareas.obtener_todas_tareas()
+            tareas = self.lista_tareas.iter_por_prioridad() if por_prioridad else iter(self.lista_tareas)
+            return (tarea for tarea in tareas if cumple(tarea))
+        
+        if not por_prioridad:
+            return self.arbol_categorias.iter_tareas_categoria(ruta_categoria, solo_pendientes, prioridad_minima)
         
-        # Usar el método recursivo para obtener todas las tareas de la categoría y sus subcategorías
-        return self.arbol_categorias.obtener_todas_tareas_categoria(ruta_categoria) 
\ No newline at end of file
+        # Si la categoría abarca buena parte de las tareas conviene filtrar el índice por
+        # prioridad de la lista (ya ordenado, se puede cortar en cualquier momento); si es
+        # chica, es más barato recorrer solo su subárbol y ordenarlo.
+        estadisticas = self.obtener_estadisticas_categoria(ruta_categoria)
+        if estadisticas is None:
+            return iter(())
+        if estadisticas['total'] * 8 >= len(self.lista_tareas):
+            nodo = self.arbol_categorias.buscar_categoria(ruta_categoria)
+            prefijo = nodo.ruta + "/"
+            return (tarea for tarea in self.lista_tareas.iter_por_prioridad()
+                    if tarea.categoria and (tarea.categoria == nodo.ruta or tarea.categoria.startswith(prefijo))
+                    and cumple(tarea))
+        tareas = list(self.arbol_categorias.iter_tareas_categoria(ruta_categoria, solo_pendientes, prioridad_minima))
+        tareas.sort(key=self.lista_tareas.clave_prioridad, reverse=True)
+        return iter(tareas) 
\ No newline at end of file
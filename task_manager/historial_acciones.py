@@ -1,3 +1,13 @@
+import json
+import logging
+import struct
+import sys
+import tempfile
+import zlib
+from .models import Tarea, Prioridad, fecha_a_entero, entero_a_fecha
+
+logger = logging.getLogger(__name__)
+
 """
 Estructura de datos: Pila (Stack)
 ---------------------------------
@@ -8,42 +18,371 @@ Es conveniente usar pilas para implementar el historial de acciones (deshacer/re
 3. Mantener dos pilas (deshacer y rehacer) permite navegar de forma bidireccional por el historial.
 4. Las operaciones son O(1) en tiempo, lo que garantiza una respuesta instantánea al usuario.
 5. El modelo mental de "apilar" acciones es intuitivo y refleja cómo los usuarios entienden la funcionalidad.
+
+Historial acotado con desborde a disco
+--------------------------------------
+En sesiones largas la pila de deshacer crece sin límite, y cada acción retiene su tarea
+(también las eliminadas, que así nunca se liberan). Con maximo_acciones o maximo_bytes la
+parte en memoria queda acotada: cuando se supera el límite, la mitad más antigua se
+serializa como un segmento comprimido al final de un archivo de desborde, que funciona
+a su vez como una pila de segmentos. Si el usuario sigue deshaciendo hasta vaciar la
+parte en memoria, el último segmento se vuelve a leer y el archivo se trunca.
+Con horizonte, las acciones más antiguas que ese número directamente se descartan.
+
+Formato de cada segmento: longitud (uint32) + crc32 (uint32) + JSON comprimido con zlib.
 """
 
+_ENCABEZADO = struct.Struct("<II")
+
 class Accion:
-    def __init__(self, tipo_accion, tarea, valores_antiguos=None):
-        self.tipo_accion = tipo_accion  # "AGREGAR", "ELIMINAR", "ACTUALIZAR"
+    __slots__ = ('tipo_accion', 'tarea', 'tareas', 'cambios', 'acciones', 'descripcion', '_resumen')
+
+    def __init__(self, tipo_accion, tarea, valores_antiguos=None, tareas=None, valores_nuevos=None,
+                 acciones=None, descripcion=None):
+        self.tipo_accion = tipo_accion  # "AGREGAR", "ELIMINAR", "ACTUALIZAR", "IMPORTAR", "TRANSACCION"
         self.tarea = tarea
-        self.valores_antiguos = valores_antiguos  # Para guardar los valores anteriores en caso de ACTUALIZAR
-        
+        self.tareas = tareas  # Todas las tareas de una acción compuesta (IMPORTAR)
+        self.acciones = acciones  # Acciones agrupadas por una transacción, en orden
+        self.descripcion = descripcion  # Texto opcional para mostrar en el historial
+        self._resumen = None  # Texto para mostrar, calculado una sola vez (ver resumen())
+        # ACTUALIZAR guarda solo los campos que cambiaron como {campo: (anterior, nuevo)}:
+        # deshacer aplica los anteriores y rehacer los nuevos, en O(campos cambiados)
+        self.cambios = None
+        if valores_antiguos is not None:
+            if valores_nuevos is None:
+                # Sin valores nuevos explícitos, son los que la tarea tiene ahora
+                valores_nuevos = {campo: getattr(tarea, campo) for campo in valores_antiguos}
+            self.cambios = {campo: (anterior, valores_nuevos[campo])
+                            for campo, anterior in valores_antiguos.items()
+                            if anterior != valores_nuevos[campo]}
+
+    @property
+    def valores_antiguos(self):
+        """Valores anteriores de los campos que cambiaron (para deshacer)"""
+        if self.cambios is None:
+            return None
+        return {campo: anterior for campo, (anterior, _) in self.cambios.items()}
+
+    @property
+    def valores_nuevos(self):
+        """Valores posteriores de los campos que cambiaron (para rehacer)"""
+        if self.cambios is None:
+            return None
+        return {campo: nuevo for campo, (_, nuevo) in self.cambios.items()}
+
+    def resumen(self):
+        """
+        Texto de la acción para mostrar en el historial. Se arma la primera vez que se
+        pide (en la interfaz, al registrarse la acción) y queda guardado: la acción no
+        cambia, así que no hace falta volver a formatear fechas ni cambios.
+
+        Returns:
+            (tipo, tarea, detalles)
+        """
+        if self._resumen is None:
+            self._resumen = _resumir(self)
+        return self._resumen
+
+
+def _texto_fecha(valor):
+    return valor.strftime("%d/%m/%Y") if hasattr(valor, 'strftime') else "Sin fecha"
+
+
+def _resumir(accion):
+    titulo = accion.tarea.titulo if accion.tarea else ""
+    if accion.tipo_accion == "IMPORTAR":
+        return ("Importar", f"{len(accion.tareas)} tareas", "Se importaron estas tareas")
+    if accion.tipo_accion == "TRANSACCION":
+        return ("Transacción", f"{len(accion.acciones)} cambios", accion.descripcion or "Cambios agrupados")
+    if accion.tipo_accion == "AGREGAR":
+        return ("Agregar", titulo, "Se agregó esta tarea")
+    if accion.tipo_accion == "ELIMINAR":
+        return ("Eliminar", titulo, "Se eliminó esta tarea")
+
+    # ACTUALIZAR: detalles a partir del delta guardado
+    cambios = []
+    for campo, (anterior, nuevo) in accion.cambios.items():
+        if campo == 'titulo':
+            cambios.append(f"Título: '{anterior}' → '{nuevo}'")
+        elif campo == 'descripcion':
+            cambios.append("Descripción modificada")
+        elif campo == 'prioridad':
+            cambios.append(f"Prioridad: {anterior} → {nuevo}")
+        elif campo == 'fecha_vencimiento':
+            cambios.append(f"Fecha: {_texto_fecha(anterior)} → {_texto_fecha(nuevo)}")
+        elif campo == 'categoria':
+            cambios.append(f"Categoría: '{anterior or 'Sin categoría'}' → '{nuevo or 'Sin categoría'}'")
+        elif campo == 'completada':
+            cambios.append("Marcada como completada" if nuevo else "Marcada como pendiente")
+    return ("Actualizar", titulo, ", ".join(cambios) if cambios else "No hay cambios significativos")
+
+
+def _codificar_valores(valores):
+    if valores is None:
+        return None
+    codificados = dict(valores)
+    if isinstance(codificados.get('prioridad'), Prioridad):
+        codificados['prioridad'] = codificados['prioridad'].value
+    if 'fecha_vencimiento' in codificados:
+        codificados['fecha_vencimiento'] = fecha_a_entero(codificados['fecha_vencimiento'])
+    return codificados
+
+
+def _decodificar_valores(codificados):
+    if codificados is None:
+        return None
+    valores = dict(codificados)
+    if valores.get('prioridad') is not None:
+        valores['prioridad'] = Prioridad(valores['prioridad'])
+    if 'fecha_vencimiento' in valores:
+        valores['fecha_vencimiento'] = entero_a_fecha(valores['fecha_vencimiento'])
+    return valores
+
+
+def accion_a_registro(accion):
+    """Representación serializable (JSON) de una acción; las tareas se guardan por valor"""
+    return {
+        'tipo': accion.tipo_accion,
+        'descripcion': accion.descripcion,
+        'acciones': [accion_a_registro(parte) for parte in accion.acciones] if accion.acciones is not None else None,
+        'tarea': accion.tarea.a_diccionario() if accion.tarea is not None else None,
+        'valores': _codificar_valores(accion.valores_antiguos),
+        'nuevos': _codificar_valores(accion.valores_nuevos),
+        'tareas': [tarea.a_diccionario() for tarea in accion.tareas] if accion.tareas is not None else None,
+    }
+
+
+def registro_a_accion(registro, resolver):
+    """
+    Operación inversa de accion_a_registro.
+
+    Args:
+        registro: Diccionario generado por accion_a_registro
+        resolver: Función (datos de la tarea) -> Tarea que devuelve el objeto vivo
+            con ese id o lo reconstruye si ya no existe
+    """
+    acciones = None
+    if registro['acciones'] is not None:
+        # Igual que con el segmento completo, de la acción más reciente a la más antigua
+        acciones = [registro_a_accion(parte, resolver) for parte in reversed(registro['acciones'])]
+        acciones.reverse()
+    tarea = resolver(registro['tarea']) if registro['tarea'] is not None else None
+    tareas = [resolver(datos) for datos in registro['tareas']] if registro['tareas'] is not None else None
+    return Accion(registro['tipo'], tarea, _decodificar_valores(registro['valores']), tareas,
+                  _decodificar_valores(registro['nuevos']), acciones, registro['descripcion'])
+
+
+def tamano_accion(accion):
+    """
+    Estimación de los bytes que retiene una acción en memoria. Las tareas de ELIMINAR
+    se cuentan completas porque solo el historial las mantiene vivas; las demás siguen
+    en la lista de tareas y solo se cuenta la referencia.
+    """
+    tamano = sys.getsizeof(accion)
+    if accion.cambios is not None:
+        tamano += sys.getsizeof(accion.cambios)
+        for par in accion.cambios.values():
+            tamano += sys.getsizeof(par) + sys.getsizeof(par[0]) + sys.getsizeof(par[1])
+    if accion.tareas is not None:
+        tamano += sys.getsizeof(accion.tareas)
+    if accion.acciones is not None:
+        tamano += sys.getsizeof(accion.acciones) + sum(tamano_accion(parte) for parte in accion.acciones)
+    if accion.tipo_accion == "ELIMINAR" and accion.tarea is not None:
+        tarea = accion.tarea
+        tamano += sys.getsizeof(tarea) + sys.getsizeof(tarea.titulo) + sys.getsizeof(tarea.descripcion)
+    return tamano
+
+
 class HistorialAcciones:
-    def __init__(self):
+    def __init__(self, maximo_acciones=None, maximo_bytes=None, horizonte=None, desbordar=True,
+                 ruta_desborde=None):
+        """
+        Args:
+            maximo_acciones: Acciones de deshacer que se mantienen en memoria (None = sin límite)
+            maximo_bytes: Bytes estimados que pueden ocupar en memoria (None = sin límite)
+            horizonte: Cantidad máxima de acciones que se pueden deshacer; las más
+                antiguas se descartan (None = sin límite)
+            desbordar: Si es False, al superar el límite en memoria las acciones se
+                descartan en vez de pasar a disco
+            ruta_desborde: Archivo para los segmentos desbordados (por defecto, uno temporal)
+        """
         self.pila_deshacer = []
         self.pila_rehacer = []
-        
+        self.maximo_acciones = maximo_acciones
+        self.maximo_bytes = maximo_bytes
+        self.horizonte = horizonte
+        self.desbordar = desbordar
+        self.ruta_desborde = ruta_desborde
+        # Devuelve la tarea viva con un id (la asigna GestorTareas) para reconectar las
+        # acciones leídas de disco con los mismos objetos que hay en la lista
+        self.resolver_tarea = None
+
+        self._tamanos = []       # Bytes estimados de cada acción de pila_deshacer
+        self._bytes_en_memoria = 0
+        self._archivo = None
+        self._segmentos = []     # (desplazamiento, longitud, cantidad), del más antiguo al más reciente
+        self._en_disco = 0
+        self._descartadas = 0
+        self._bytes_liberados = 0
+
     def agregar_accion(self, accion):
-        self.pila_deshacer.append(accion)
+        self._apilar(accion)
         # Cuando se agrega una nueva acción, se limpia la pila de rehacer
         self.pila_rehacer.clear()
-        
+        self._acotar()
+
     def puede_deshacer(self):
-        return len(self.pila_deshacer) > 0
-        
+        return len(self.pila_deshacer) > 0 or self._en_disco > 0
+
     def puede_rehacer(self):
         return len(self.pila_rehacer) > 0
-        
+
+    def cantidad_deshacer(self):
+        """Acciones que se pueden deshacer, en memoria y en disco"""
+        return len(self.pila_deshacer) + self._en_disco
+
     def deshacer(self):
         if not self.puede_deshacer():
             return None
-            
+        if not self.pila_deshacer:
+            self._cargar_segmento()
+
         accion = self.pila_deshacer.pop()
+        self._bytes_en_memoria -= self._tamanos.pop()
         self.pila_rehacer.append(accion)
         return accion
-        
+
     def rehacer(self):
         if not self.puede_rehacer():
             return None
-            
+
         accion = self.pila_rehacer.pop()
+        self._apilar(accion)
+        self._acotar()
+        return accion
+
+    def estadisticas(self):
+        """
+        Returns:
+            Diccionario con en_memoria, en_disco, descartadas, bytes_en_memoria
+            (estimados), bytes_en_disco y bytes_liberados (estimación de la memoria
+            recuperada al pasar acciones a disco o descartarlas)
+        """
+        return {
+            'en_memoria': len(self.pila_deshacer),
+            'en_disco': self._en_disco,
+            'descartadas': self._descartadas,
+            'bytes_en_memoria': self._bytes_en_memoria,
+            'bytes_en_disco': sum(longitud + _ENCABEZADO.size for _, longitud, _ in self._segmentos),
+            'bytes_liberados': self._bytes_liberados,
+        }
+
+    def cerrar(self):
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = None
+
+    def _apilar(self, accion):
+        tamano = tamano_accion(accion)
         self.pila_deshacer.append(accion)
-        return accion 
\ No newline at end of file
+        self._tamanos.append(tamano)
+        self._bytes_en_memoria += tamano
+
+    def _excede_memoria(self):
+        if self.maximo_acciones is not None and len(self.pila_deshacer) > self.maximo_acciones:
+            return True
+        return self.maximo_bytes is not None and self._bytes_en_memoria > self.maximo_bytes
+
+    def _acotar(self):
+        if self._excede_memoria():
+            # Se saca de memoria la mitad más antigua, así el costo de escribir un
+            # segmento se reparte entre muchas acciones nuevas
+            cantidad = len(self.pila_deshacer) - len(self.pila_deshacer) // 2
+            if self.maximo_acciones is not None:
+                cantidad = max(cantidad, len(self.pila_deshacer) - self.maximo_acciones // 2)
+            self._sacar_de_memoria(min(cantidad, len(self.pila_deshacer)))
+        if self.horizonte is not None:
+            self._recortar_horizonte()
+
+    def _sacar_de_memoria(self, cantidad):
+        acciones = self.pila_deshacer[:cantidad]
+        liberados = sum(self._tamanos[:cantidad])
+        del self.pila_deshacer[:cantidad]
+        del self._tamanos[:cantidad]
+        self._bytes_en_memoria -= liberados
+        self._bytes_liberados += liberados
+
+        if self.desbordar:
+            self._escribir_segmento(acciones)
+            logger.info("Historial: %d acciones pasadas a disco (~%d bytes liberados)", cantidad, liberados)
+        else:
+            self._descartadas += cantidad
+            logger.info("Historial: %d acciones descartadas (~%d bytes liberados)", cantidad, liberados)
+
+    def _recortar_horizonte(self):
+        sobrantes = self.cantidad_deshacer() - self.horizonte
+        # Primero los segmentos en disco (los más antiguos), enteros; el espacio del
+        # archivo se recupera cuando ya no queda ningún segmento
+        if sobrantes > 0 and self._segmentos:
+            while sobrantes > 0 and self._segmentos:
+                cantidad = self._segmentos.pop(0)[2]
+                self._en_disco -= cantidad
+                self._descartadas += cantidad
+                sobrantes -= cantidad
+            if not self._segmentos:
+                self._archivo.truncate(0)
+        if sobrantes > 0:
+            liberados = sum(self._tamanos[:sobrantes])
+            del self.pila_deshacer[:sobrantes]
+            del self._tamanos[:sobrantes]
+            self._bytes_en_memoria -= liberados
+            self._bytes_liberados += liberados
+            self._descartadas += sobrantes
+
+    def _abrir_desborde(self):
+        if self._archivo is None:
+            if self.ruta_desborde:
+                self._archivo = open(self.ruta_desborde, "w+b")
+            else:
+                self._archivo = tempfile.TemporaryFile(prefix="historial_")
+        return self._archivo
+
+    def _escribir_segmento(self, acciones):
+        datos = zlib.compress(json.dumps([accion_a_registro(accion) for accion in acciones],
+                                         ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        archivo = self._abrir_desborde()
+        archivo.seek(0, 2)
+        desplazamiento = archivo.tell()
+        archivo.write(_ENCABEZADO.pack(len(datos), zlib.crc32(datos)))
+        archivo.write(datos)
+        self._segmentos.append((desplazamiento, len(datos), len(acciones)))
+        self._en_disco += len(acciones)
+
+    def _cargar_segmento(self):
+        """Devuelve a memoria el segmento más reciente y lo quita del archivo"""
+        desplazamiento, longitud, cantidad = self._segmentos.pop()
+        self._archivo.seek(desplazamiento)
+        _, crc = _ENCABEZADO.unpack(self._archivo.read(_ENCABEZADO.size))
+        datos = self._archivo.read(longitud)
+        if zlib.crc32(datos) != crc:
+            raise IOError("El segmento del historial en disco está dañado")
+        self._archivo.truncate(desplazamiento)
+        self._en_disco -= cantidad
+
+        # Al cargar, el estado de las tareas es justo el posterior a la última acción
+        # del segmento: las que existen se toman de la lista y las eliminadas se
+        # reconstruyen una sola vez por id, empezando por la acción más reciente
+        registros = json.loads(zlib.decompress(datos).decode("utf-8"))
+        reconstruidas = {}
+        def resolver(datos_tarea):
+            tarea_id = datos_tarea['id']
+            tarea = reconstruidas.get(tarea_id)
+            if tarea is None and self.resolver_tarea is not None:
+                tarea = self.resolver_tarea(tarea_id)
+            if tarea is None:
+                tarea = Tarea.desde_diccionario(datos_tarea)
+            reconstruidas[tarea_id] = tarea
+            return tarea
+        acciones = [registro_a_accion(registro, resolver) for registro in reversed(registros)]
+        for accion in reversed(acciones):
+            self._apilar(accion)
@@ -0,0 +1,133 @@
+import csv
+import io
+import json
+from datetime import datetime
+from itertools import islice
+from .models import Tarea, Prioridad
+
+"""
+Importación masiva por flujo (pipeline de generadores)
+------------------------------------------------------
+Cada etapa es un generador que consume la anterior de a una fila:
+
+    leer_csv / leer_jsonl  ->  filas_a_tareas  ->  en_lotes
+
+Así la memoria usada durante la importación no depende del tamaño del archivo:
+solo hay en vuelo un lote de tareas a la vez, y cada fila se convierte a Tarea
+sin pasar por las coerciones genéricas de GestorTareas.crear_tarea.
+
+Columnas (CSV) o claves (JSONL) reconocidas:
+    titulo, descripcion, prioridad, fecha_vencimiento (o vencimiento), categoria, completada
+- prioridad: nombre (BAJA, MEDIA, ALTA, URGENTE) o valor numérico (1-4)
+- fecha_vencimiento: fecha u hora en formato ISO 8601 (AAAA-MM-DD[THH:MM[:SS]])
+
+Una fila inválida (JSON mal formado, una línea que no es un objeto, un campo con un
+valor que no corresponde) no detiene la importación: se omite y se informa en errores.
+"""
+
+_VERDADEROS = {"1", "true", "si", "sí", "s", "x", "yes"}
+
+
+def abrir_origen(origen):
+    """Devuelve un archivo de texto a partir de una ruta o de un objeto archivo ya abierto"""
+    if isinstance(origen, str):
+        return open(origen, "r", encoding="utf-8", newline="")
+    if isinstance(origen, (bytes, bytearray)):
+        return io.StringIO(origen.decode("utf-8"))
+    return origen
+
+
+def leer_csv(archivo):
+    """Genera un diccionario por fila usando la primera línea como encabezado"""
+    for fila in csv.DictReader(archivo):
+        yield fila
+
+
+class FilaInvalida:
+    """Lugar de una fila que no se pudo leer; filas_a_tareas la anota como error"""
+    def __init__(self, mensaje):
+        self.mensaje = mensaje
+
+
+def leer_jsonl(archivo):
+    """Genera un diccionario por línea no vacía (o FilaInvalida si no es JSON válido)"""
+    for linea in archivo:
+        linea = linea.strip()
+        if linea:
+            try:
+                yield json.loads(linea)
+            except json.JSONDecodeError as e:
+                yield FilaInvalida(f"JSON inválido: {e.msg} (columna {e.colno})")
+
+
+def _prioridad(valor):
+    if isinstance(valor, Prioridad):
+        return valor
+    if isinstance(valor, int):
+        return Prioridad(valor)
+    valor = str(valor).strip()
+    if valor.isdigit():
+        return Prioridad(int(valor))
+    if valor.upper() not in Prioridad.__members__:
+        raise ValueError(f"prioridad desconocida: '{valor}'")
+    return Prioridad[valor.upper()]
+
+
+def _fecha(valor):
+    if not valor:
+        return None
+    if isinstance(valor, datetime):
+        return valor
+    return datetime.fromisoformat(str(valor).strip())
+
+
+def _texto(valor, campo):
+    if valor is None:
+        return ""
+    if not isinstance(valor, str):
+        raise ValueError(f"'{campo}' debe ser texto")
+    return valor
+
+
+def _booleano(valor):
+    if isinstance(valor, bool):
+        return valor
+    return str(valor or "").strip().lower() in _VERDADEROS
+
+
+def filas_a_tareas(filas, errores):
+    """
+    Convierte cada fila en una Tarea. Las filas inválidas se saltan y se anotan
+    en la lista errores como (número de fila, mensaje).
+    """
+    for numero, fila in enumerate(filas, 1):
+        try:
+            if isinstance(fila, FilaInvalida):
+                raise ValueError(fila.mensaje)
+            if not isinstance(fila, dict):
+                raise ValueError("la fila no es un objeto JSON")
+            titulo = _texto(fila.get("titulo"), "titulo").strip()
+            if not titulo:
+                raise ValueError("falta el título")
+            categoria = _texto(fila.get("categoria"), "categoria").strip()
+            tarea = Tarea(titulo,
+                          _texto(fila.get("descripcion"), "descripcion"),
+                          _prioridad(fila.get("prioridad") or Prioridad.MEDIA),
+                          _fecha(fila.get("fecha_vencimiento") or fila.get("vencimiento")),
+                          categoria if categoria.strip("/") else None)
+            if _booleano(fila.get("completada")):
+                tarea.completada = True
+        except (ValueError, TypeError) as e:
+            errores.append((numero, str(e)))
+            continue
+        yield tarea
+
+
+def en_lotes(iterable, tamano):
+    """Agrupa el iterable en listas de a lo sumo 'tamano' elementos"""
+    iterador = iter(iterable)
+    while True:
+        lote = list(islice(iterador, tamano))
+        if not lote:
+            return
+        yield lote
@@ -0,0 +1,150 @@
+import re
+import unicodedata
+from .lista_ordenada import ListaOrdenada
+from .metricas import medido
+
+"""
+Estructura de datos: Índice invertido
+-------------------------------------
+Un índice invertido guarda, para cada término, el conjunto de tareas que lo contienen
+(su lista de publicaciones). Es conveniente para buscar tareas por texto porque:
+1. Buscar un término cuesta O(1) y no depende de cuántas tareas haya: no se recorren
+   títulos ni descripciones.
+2. Los términos se normalizan (minúsculas y sin acentos), así "Reunión", "REUNION" y
+   "reunion" son el mismo término.
+3. El vocabulario se mantiene también en una lista ordenada: los términos que empiezan
+   con un prefijo quedan contiguos y se encuentran con una búsqueda binaria, lo que
+   permite buscar mientras se escribe ("reu" encuentra "reunión").
+4. Una consulta de varios términos es la intersección (AND) de sus publicaciones; se
+   empieza por el término más selectivo y los demás solo filtran esos candidatos.
+5. El índice se actualiza con los avisos de la lista de tareas: altas, bajas y cambios
+   de título o descripción (también los de deshacer/rehacer) reindexan solo esa tarea.
+"""
+
+_PALABRA = re.compile(r"\w+")
+
+
+def normalizar(texto):
+    """Minúsculas y sin marcas diacríticas: "Reunión" -> "reunion" """
+    descompuesto = unicodedata.normalize("NFKD", texto.casefold())
+    return "".join(caracter for caracter in descompuesto if not unicodedata.combining(caracter))
+
+
+def terminos(texto):
+    """Términos normalizados de un texto, sin repetir y en orden de aparición"""
+    return list(dict.fromkeys(_PALABRA.findall(normalizar(texto or ""))))
+
+
+class IndiceTexto:
+    def __init__(self, lista_tareas=None):
+        """
+        Args:
+            lista_tareas: Lista a indexar. El índice se construye recién en la primera
+                búsqueda (para no materializar todas las tareas de un almacén perezoso
+                si nunca se busca) y desde entonces sigue sus avisos.
+        """
+        self._lista = lista_tareas
+        self._publicaciones = {}  # término -> set de ids
+        self._terminos = {}       # id -> tupla de términos con que se indexó la tarea
+        self._vocabulario = ListaOrdenada()
+        self.construido = lista_tareas is None
+        if lista_tareas is not None:
+            lista_tareas.suscribir(self._cambio_en_lista)
+
+    def __len__(self):
+        return len(self._terminos)
+
+    def construir(self):
+        if self.construido:
+            return
+        try:
+            for tarea in self._lista:
+                self.agregar(tarea)
+        except BaseException:
+            # Un índice a medias no se usa: se descarta y se vuelve a construir en la próxima búsqueda
+            self._publicaciones.clear()
+            self._terminos.clear()
+            self._vocabulario = ListaOrdenada()
+            raise
+        # Recién ahora: hasta aquí las búsquedas no deben usar el índice ni seguir los avisos
+        self.construido = True
+
+    def _cambio_en_lista(self, evento, tarea, campo, valor_anterior):
+        if not self.construido:
+            return
+        if evento == "agregada":
+            self.agregar(tarea)
+        elif evento == "eliminada":
+            self.eliminar(tarea.id)
+        elif campo in ('titulo', 'descripcion'):
+            self.eliminar(tarea.id)
+            self.agregar(tarea)
+
+    def agregar(self, tarea):
+        if tarea.id in self._terminos:
+            return
+        nuevos = tuple(terminos(f"{tarea.titulo} {tarea.descripcion}"))
+        self._terminos[tarea.id] = nuevos
+        for termino in nuevos:
+            publicaciones = self._publicaciones.get(termino)
+            if publicaciones is None:
+                publicaciones = self._publicaciones[termino] = set()
+                self._vocabulario.agregar(termino)
+            publicaciones.add(tarea.id)
+
+    def eliminar(self, tarea_id):
+        for termino in self._terminos.pop(tarea_id, ()):
+            publicaciones = self._publicaciones[termino]
+            publicaciones.discard(tarea_id)
+            if not publicaciones:
+                del self._publicaciones[termino]
+                self._vocabulario.eliminar(termino)
+
+    def _con_prefijo(self, prefijo):
+        """Términos del vocabulario que empiezan con prefijo"""
+        coincidencias = []
+        for termino in self._vocabulario.iter_desde(prefijo):
+            if not termino.startswith(prefijo):
+                break
+            coincidencias.append(termino)
+        return coincidencias
+
+    @medido("indice.buscar")
+    def buscar(self, consulta):
+        """
+        Ids de las tareas cuyo título o descripción contiene todos los términos de la
+        consulta, cada uno como palabra completa o como comienzo de una palabra.
+
+        Args:
+            consulta: Texto de búsqueda, p. ej. "reu proyecto"
+
+        Returns:
+            set de ids (vacío si la consulta no tiene términos)
+        """
+        self.construir()
+        prefijos = terminos(consulta)
+        if not prefijos:
+            return set()
+
+        # Para cada término: los del vocabulario que coinciden y cuántas publicaciones suman
+        grupos = []
+        for prefijo in prefijos:
+            coincidencias = self._con_prefijo(prefijo)
+            if not coincidencias:
+                return set()
+            grupos.append((sum(len(self._publicaciones[t]) for t in coincidencias), prefijo, coincidencias))
+        grupos.sort()
+
+        # El término más selectivo da los candidatos; los demás los filtran. Si quedan pocos
+        # candidatos, comprobar sus términos es más barato que unir publicaciones grandes.
+        _, _, coincidencias = grupos[0]
+        candidatos = set().union(*(self._publicaciones[t] for t in coincidencias))
+        for cantidad, prefijo, coincidencias in grupos[1:]:
+            if len(candidatos) * 4 < cantidad:
+                candidatos = {tarea_id for tarea_id in candidatos
+                              if any(t.startswith(prefijo) for t in self._terminos[tarea_id])}
+            else:
+                candidatos &= set().union(*(self._publicaciones[t] for t in coincidencias))
+            if not candidatos:
+                break
+        return candidatos
@@ -0,0 +1,457 @@
+import mmap
+import os
+import struct
+from datetime import datetime
+from .models import Tarea, Prioridad, fecha_a_entero
+from .lista_tareas import ListaTareas
+from .arbol_categorias import ArbolCategorias
+
+"""
+Instantánea binaria con acceso por mmap
+---------------------------------------
+Formato versionado para guardar el contenido de ListaTareas + ArbolCategorias y
+cargarlo sin leer ni convertir todas las tareas de antemano:
+
+    encabezado | registros de ancho fijo (ordenados por id) | índice por prioridad |
+    índice por fecha | cola de urgentes | categorías | tabla de cadenas |
+    contadores agregados | fechas pendientes
+
+- Cada registro ocupa siempre los mismos bytes, así el registro i está en
+  inicio + i * tamaño y se busca un id con búsqueda binaria directamente sobre el archivo.
+- Los textos (títulos, descripciones y rutas) se guardan una sola vez en una tabla de
+  cadenas y los registros solo guardan su número.
+- Los índices por prioridad y por fecha son listas de números de registro ya ordenadas,
+  de modo que mostrar las primeras k tareas solo materializa esas k tareas.
+- Desde la versión 2 se guardan también los contadores de cada categoría (y los de
+  todas las tareas) y las fechas ordenadas de sus tareas pendientes, así las
+  estadísticas se responden sin crear ninguna tarea.
+
+El archivo se lee a través de mmap: el sistema operativo trae a memoria únicamente las
+páginas que se tocan, y cada Tarea se crea la primera vez que se accede a ella.
+"""
+
+MAGICO = b"GTAREAS\x00"
+VERSION = 2
+
+# magico, version, tareas, cadenas, categorias, urgentes + desplazamientos de cada sección
+_ENCABEZADO_V1 = struct.Struct("<8sIQQQQQQQQQQQ")
+# Versión 2: además, desplazamientos de los contadores agregados y de las fechas pendientes
+_ENCABEZADO = struct.Struct("<8sIQQQQQQQQQQQQQ")
+# total, pendientes, completadas, una cuenta por prioridad, primera fecha pendiente y cantidad
+_AGREGADO = struct.Struct("<" + "q" * (3 + len(Prioridad)) + "QQ")
+_FECHA = struct.Struct("<q")
+# id, vencimiento, titulo, descripcion, categoria, prioridad, completada, relleno
+_REGISTRO = struct.Struct("<qqIIIbb2x")
+_INDICE = struct.Struct("<I")
+_DESPLAZAMIENTO = struct.Struct("<Q")
+
+_SIN_CADENA = 0xFFFFFFFF
+_SIN_FECHA = -2**63
+
+
+def guardar_instantanea_binaria(gestor, ruta):
+    """Escribe el contenido del gestor en el formato binario (de forma atómica)"""
+    cadenas = []
+    numero_de_cadena = {}
+
+    def cadena(texto):
+        if texto is None:
+            return _SIN_CADENA
+        numero = numero_de_cadena.get(texto)
+        if numero is None:
+            numero = numero_de_cadena[texto] = len(cadenas)
+            cadenas.append(texto.encode("utf-8"))
+        return numero
+
+    lista = gestor.lista_tareas
+    tareas = sorted(lista, key=lambda t: t.id)
+    registro_de_id = {tarea.id: i for i, tarea in enumerate(tareas)}
+
+    registros = bytearray()
+    for tarea in tareas:
+        datos = tarea.a_diccionario()
+        vencimiento = datos['vencimiento']
+        registros += _REGISTRO.pack(
+            tarea.id, _SIN_FECHA if vencimiento is None else vencimiento,
+            cadena(datos['titulo']), cadena(datos['descripcion']), cadena(datos['categoria']),
+            datos['prioridad'], 1 if datos['completada'] else 0)
+
+    def indice(iterable):
+        return b"".join(_INDICE.pack(registro_de_id[t.id]) for t in iterable)
+
+    por_prioridad = indice(lista.iter_por_prioridad())
+    por_fecha = indice(lista.iter_por_fecha())
+    urgentes = indice(t for t in gestor.cola_urgentes.obtener_todas() if t.id in registro_de_id)
+    todas_categorias = gestor.obtener_todas_categorias()
+    # `ruta` es el archivo de destino: las rutas de categorías usan otro nombre para no taparlo
+    categorias = b"".join(_INDICE.pack(cadena(ruta_categoria)) for ruta_categoria, _, _ in todas_categorias)
+
+    # Un contador por categoría (con todo su subárbol) y uno final para todas las tareas.
+    # Las fechas pendientes de cada categoría son solo las de sus tareas directas: las
+    # vencidas de un subárbol se suman recorriendo sus categorías.
+    agregados = bytearray()
+    fechas = []
+
+    def agregar_contador(totales, fechas_pendientes):
+        agregados.extend(_AGREGADO.pack(
+            totales['total'], totales['pendientes'], totales['completadas'],
+            *(totales['por_prioridad'][prioridad] for prioridad in Prioridad),
+            len(fechas), len(fechas_pendientes)))
+        fechas.extend(fechas_pendientes)
+
+    for ruta_categoria, nodo, _ in todas_categorias:
+        agregar_contador(gestor.obtener_estadisticas_categoria(ruta_categoria),
+                         sorted(t._vencimiento for t in nodo.tareas if not t.completada and t._vencimiento is not None))
+    agregar_contador(gestor.obtener_estadisticas_categoria(None),
+                     sorted(t._vencimiento for t in tareas if not t.completada and t._vencimiento is not None))
+    fechas = b"".join(_FECHA.pack(fecha) for fecha in fechas)
+
+    desplazamientos_cadenas = bytearray()
+    posicion = 0
+    for datos in cadenas:
+        desplazamientos_cadenas += _DESPLAZAMIENTO.pack(posicion)
+        posicion += len(datos)
+    desplazamientos_cadenas += _DESPLAZAMIENTO.pack(posicion)
+
+    secciones = [registros, por_prioridad, por_fecha, urgentes, categorias, desplazamientos_cadenas, b"".join(cadenas),
+                 agregados, fechas]
+    desplazamientos = []
+    posicion = _ENCABEZADO.size
+    for seccion in secciones:
+        desplazamientos.append(posicion)
+        posicion += len(seccion)
+
+    encabezado = _ENCABEZADO.pack(MAGICO, VERSION, len(tareas), len(cadenas), len(categorias) // _INDICE.size,
+                                  len(urgentes) // _INDICE.size, *desplazamientos)
+
+    temporal = ruta + ".tmp"
+    with open(temporal, "wb") as archivo:
+        archivo.write(encabezado)
+        for seccion in secciones:
+            archivo.write(seccion)
+        archivo.flush()
+        os.fsync(archivo.fileno())
+    os.replace(temporal, ruta)
+
+
+class InstantaneaBinaria:
+    """
+    Almacenamiento de solo lectura perezosa sobre un archivo binario. Se usa como
+    GestorTareas(almacen=InstantaneaBinaria(ruta)); ver cargar_instantanea_binaria().
+    """
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._archivo = open(ruta, "rb")
+        self._mapa = mmap.mmap(self._archivo.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magico, self.version = struct.unpack_from("<8sI", self._mapa, 0)
+        if magico != MAGICO:
+            raise ValueError(f"'{ruta}' no es una instantánea binaria de tareas")
+        if self.version == 1:
+            # Sin contadores agregados: las estadísticas obligan a cargar todo
+            campos = _ENCABEZADO_V1.unpack_from(self._mapa, 0) + (None, None)
+        elif self.version == VERSION:
+            campos = _ENCABEZADO.unpack_from(self._mapa, 0)
+        else:
+            raise ValueError(f"Versión de instantánea no soportada: {self.version}")
+        (_, _, self.num_tareas, self.num_cadenas, self.num_categorias, self.num_urgentes,
+         self._off_registros, self._off_prioridad, self._off_fecha, self._off_urgentes,
+         self._off_categorias, self._off_desplazamientos, self._off_cadenas,
+         self._off_agregados, self._off_fechas) = campos
+
+        self.gestor = None
+        self.arbol_categorias = ArbolCategoriasPerezoso(self)
+        self.lista_tareas = ListaTareasPerezosa(self, self.arbol_categorias)
+        self._rutas = []  # Rutas de las categorías en el orden de la sección de contadores
+        for i in range(self.num_categorias):
+            ruta_categoria = self._cadena(self._indice(self._off_categorias, i))
+            self._rutas.append(ruta_categoria)
+            self.arbol_categorias.agregar_categoria(ruta_categoria)
+        self._numero_de_ruta = {ruta_categoria: i for i, ruta_categoria in enumerate(self._rutas)}
+
+    def _cadena(self, numero):
+        if numero == _SIN_CADENA:
+            return None
+        inicio, = _DESPLAZAMIENTO.unpack_from(self._mapa, self._off_desplazamientos + numero * _DESPLAZAMIENTO.size)
+        fin, = _DESPLAZAMIENTO.unpack_from(self._mapa, self._off_desplazamientos + (numero + 1) * _DESPLAZAMIENTO.size)
+        return self._mapa[self._off_cadenas + inicio:self._off_cadenas + fin].decode("utf-8")
+
+    def _indice(self, desplazamiento, i):
+        return _INDICE.unpack_from(self._mapa, desplazamiento + i * _INDICE.size)[0]
+
+    def id_de_registro(self, numero):
+        return struct.unpack_from("<q", self._mapa, self._off_registros + numero * _REGISTRO.size)[0]
+
+    def buscar_registro(self, tarea_id):
+        """Búsqueda binaria del id sobre los registros del archivo"""
+        bajo, alto = 0, self.num_tareas
+        while bajo < alto:
+            medio = (bajo + alto) // 2
+            if self.id_de_registro(medio) < tarea_id:
+                bajo = medio + 1
+            else:
+                alto = medio
+        if bajo < self.num_tareas and self.id_de_registro(bajo) == tarea_id:
+            return bajo
+        return None
+
+    def leer_tarea(self, numero):
+        (tarea_id, vencimiento, titulo, descripcion, categoria,
+         prioridad, completada) = _REGISTRO.unpack_from(self._mapa, self._off_registros + numero * _REGISTRO.size)
+        return Tarea.desde_diccionario({
+            'id': tarea_id,
+            'titulo': self._cadena(titulo),
+            'descripcion': self._cadena(descripcion),
+            'prioridad': prioridad,
+            'vencimiento': None if vencimiento == _SIN_FECHA else vencimiento,
+            'categoria': self._cadena(categoria),
+            'completada': bool(completada),
+        })
+
+    @property
+    def tiene_estadisticas(self):
+        return self._off_agregados is not None
+
+    def _contar_vencidas(self, primera, cantidad, limite):
+        """Búsqueda binaria sobre las fechas pendientes de un contador"""
+        bajo, alto = primera, primera + cantidad
+        while bajo < alto:
+            medio = (bajo + alto) // 2
+            if _FECHA.unpack_from(self._mapa, self._off_fechas + medio * _FECHA.size)[0] < limite:
+                bajo = medio + 1
+            else:
+                alto = medio
+        return bajo - primera
+
+    def contar_pendientes_entre(self, ruta=None, desde=None, hasta=None):
+        """
+        Tareas pendientes que vencen en [desde, hasta) (enteros; None = sin límite) de
+        una categoría con sus subcategorías, o de todas si ruta es None, con búsquedas
+        binarias sobre las fechas pendientes guardadas en cada contador
+        """
+        if ruta is None:
+            numeros = [self.num_categorias]
+        else:
+            prefijo = ruta + "/"
+            numeros = [i for i, otra in enumerate(self._rutas) if otra == ruta or otra.startswith(prefijo)]
+        total = 0
+        for numero in numeros:
+            primera, cantidad = _AGREGADO.unpack_from(self._mapa, self._off_agregados + numero * _AGREGADO.size)[-2:]
+            fin = self._contar_vencidas(primera, cantidad, hasta) if hasta is not None else cantidad
+            inicio = self._contar_vencidas(primera, cantidad, desde) if desde is not None else 0
+            total += fin - inicio
+        return total
+
+    def estadisticas(self, ruta=None, ahora=None):
+        """
+        Contadores guardados para una categoría (con sus subcategorías) o, si ruta es
+        None, para todas las tareas. Mismo formato que EstadisticasTareas.como_diccionario().
+        """
+        if ruta is None:
+            numero = self.num_categorias
+        else:
+            numero = self._numero_de_ruta.get(ruta)
+            if numero is None:
+                return None
+        campos = _AGREGADO.unpack_from(self._mapa, self._off_agregados + numero * _AGREGADO.size)
+        total, pendientes, completadas = campos[:3]
+        por_prioridad = dict(zip(Prioridad, campos[3:-2]))
+
+        vencidas = self.contar_pendientes_entre(ruta, None, fecha_a_entero(ahora or datetime.now()))
+        return {
+            'total': total,
+            'pendientes': pendientes,
+            'completadas': completadas,
+            'por_prioridad': por_prioridad,
+            'vencidas': vencidas,
+        }
+
+    def registros_por_prioridad(self):
+        return (self._indice(self._off_prioridad, i) for i in range(self.num_tareas))
+
+    def registros_por_fecha(self):
+        return (self._indice(self._off_fecha, i) for i in range(self.num_tareas))
+
+    def tareas_urgentes(self):
+        """Tareas de la cola de urgentes guardada, en su orden"""
+        return [self.lista_tareas._tarea_de_registro(self._indice(self._off_urgentes, i))
+                for i in range(self.num_urgentes)]
+
+    def cerrar(self):
+        """Vuelve a guardar la instantánea si hubo cambios y libera el mapa"""
+        if self.gestor is not None and (self.lista_tareas.cargada or
+                                        len(self.gestor.obtener_todas_categorias()) != self.num_categorias):
+            # Las fechas de cada categoría salen de sus nodos, que se llenan con la carga completa
+            self.lista_tareas.cargar_todo()
+            guardar_instantanea_binaria(self.gestor, self.ruta)
+        self._mapa.close()
+        self._archivo.close()
+
+
+class ListaTareasPerezosa(ListaTareas):
+    """
+    ListaTareas que lee del archivo mapeado mientras nadie la modifica. Las consultas
+    (obtener una tarea, recorrer por prioridad o por fecha) solo crean las tareas que
+    se visitan; la primera modificación carga todas las tareas en las estructuras
+    normales de ListaTareas y a partir de ahí se comporta igual que ella.
+    """
+    def __init__(self, instantanea, arbol):
+        super().__init__()
+        self._instantanea = instantanea
+        self._arbol = arbol
+        self._materializadas = {}  # número de registro -> Tarea ya creada
+        self.cargada = False
+
+    def _tarea_de_registro(self, numero):
+        tarea = self._materializadas.get(numero)
+        if tarea is None:
+            tarea = self._instantanea.leer_tarea(numero)
+            # La tarea avisa a la lista al cambiar, lo que provoca la carga completa
+            tarea._observador = self
+            self._materializadas[numero] = tarea
+        return tarea
+
+    def cargar_todo(self):
+        """Materializa todas las tareas y las pasa a los índices en memoria (una sola vez)"""
+        if self.cargada:
+            return
+        for numero in range(self._instantanea.num_tareas):
+            tarea = self._tarea_de_registro(numero)
+            # Cada paso se puede repetir si un intento anterior no terminó
+            if tarea.categoria:
+                nodo = self._arbol.buscar_categoria(tarea.categoria)
+                if nodo:
+                    nodo.agregar_tarea(tarea)
+            if tarea.id not in self._claves:
+                self._indexar(tarea)
+            self.tareas[tarea.id] = tarea
+        # Recién con todas las tareas cargadas se dejan de leer del archivo
+        self.cargada = True
+        self._materializadas.clear()
+
+    def __len__(self):
+        return len(self.tareas) if self.cargada else self._instantanea.num_tareas
+
+    def __iter__(self):
+        if self.cargada:
+            return super().__iter__()
+        return (self._tarea_de_registro(i) for i in range(self._instantanea.num_tareas))
+
+    def __contains__(self, tarea_id):
+        if self.cargada:
+            return super().__contains__(tarea_id)
+        return self._instantanea.buscar_registro(tarea_id) is not None
+
+    def obtener_tarea(self, tarea_id):
+        if self.cargada:
+            return super().obtener_tarea(tarea_id)
+        numero = self._instantanea.buscar_registro(tarea_id)
+        return self._tarea_de_registro(numero) if numero is not None else None
+
+    def obtener_todas_tareas(self):
+        return list(self)
+
+    def obtener_estadisticas(self, ahora=None):
+        if self.cargada or not self._instantanea.tiene_estadisticas:
+            self.cargar_todo()
+            return super().obtener_estadisticas(ahora)
+        return self._instantanea.estadisticas(None, ahora)
+
+    def contar_pendientes_entre(self, desde=None, hasta=None):
+        if self.cargada or not self._instantanea.tiene_estadisticas:
+            self.cargar_todo()
+            return super().contar_pendientes_entre(desde, hasta)
+        return self._instantanea.contar_pendientes_entre(None, fecha_a_entero(desde), fecha_a_entero(hasta))
+
+    def iter_pendientes_entre(self, desde=None, hasta=None):
+        self.cargar_todo()
+        return super().iter_pendientes_entre(desde, hasta)
+
+    def iter_por_prioridad(self):
+        if self.cargada:
+            return super().iter_por_prioridad()
+        return (self._tarea_de_registro(i) for i in self._instantanea.registros_por_prioridad())
+
+    def iter_por_fecha(self):
+        if self.cargada:
+            return super().iter_por_fecha()
+        return (self._tarea_de_registro(i) for i in self._instantanea.registros_por_fecha())
+
+    def agregar_tarea(self, tarea):
+        self.cargar_todo()
+        return super().agregar_tarea(tarea)
+
+    def eliminar_tarea(self, tarea_id):
+        self.cargar_todo()
+        return super().eliminar_tarea(tarea_id)
+
+    def actualizar_tarea(self, tarea_id, **kwargs):
+        self.cargar_todo()
+        return super().actualizar_tarea(tarea_id, **kwargs)
+
+    def tarea_modificada(self, tarea, campo, valor_anterior):
+        self.cargar_todo()
+        super().tarea_modificada(tarea, campo, valor_anterior)
+
+
+class ArbolCategoriasPerezoso(ArbolCategorias):
+    """
+    Las categorías se crean al abrir la instantánea, pero las tareas se cuelgan de sus
+    nodos recién con la carga completa, que se dispara al consultar o cambiar las tareas
+    de una categoría.
+    """
+    def __init__(self, instantanea):
+        super().__init__()
+        self._instantanea = instantanea
+
+    def agregar_tarea_a_categoria(self, tarea, ruta):
+        self._instantanea.lista_tareas.cargar_todo()
+        return super().agregar_tarea_a_categoria(tarea, ruta)
+
+    def iter_tareas_categoria(self, ruta, solo_pendientes=False, prioridad_minima=None):
+        self._instantanea.lista_tareas.cargar_todo()
+        return super().iter_tareas_categoria(ruta, solo_pendientes, prioridad_minima)
+
+    def obtener_estadisticas(self, ruta, ahora=None):
+        lista = self._instantanea.lista_tareas
+        nodo = self.buscar_categoria(ruta)
+        if nodo is None:
+            return None
+        if lista.cargada or not self._instantanea.tiene_estadisticas:
+            lista.cargar_todo()
+            return super().obtener_estadisticas(ruta, ahora)
+        # Las categorías creadas después de abrir la instantánea todavía no tienen tareas
+        return self._instantanea.estadisticas(nodo.ruta, ahora) or nodo.estadisticas.como_diccionario(ahora)
+
+    def contar_pendientes_entre(self, ruta, desde=None, hasta=None):
+        lista = self._instantanea.lista_tareas
+        nodo = self.buscar_categoria(ruta)
+        if nodo is None:
+            return None
+        if lista.cargada or not self._instantanea.tiene_estadisticas:
+            lista.cargar_todo()
+            return super().contar_pendientes_entre(ruta, desde, hasta)
+        return self._instantanea.contar_pendientes_entre(nodo.ruta, fecha_a_entero(desde), fecha_a_entero(hasta))
+
+    def iter_ids_pendientes_entre(self, ruta, desde=None, hasta=None):
+        self._instantanea.lista_tareas.cargar_todo()
+        return super().iter_ids_pendientes_entre(ruta, desde, hasta)
+
+
+def cargar_instantanea_binaria(ruta, historial=None, concurrente=False):
+    """
+    Abre una instantánea binaria (la crea vacía si no existe) y devuelve un GestorTareas
+    que la lee de forma perezosa. El tiempo de apertura no depende de la cantidad de
+    tareas guardadas; al cerrar el gestor se vuelve a escribir si hubo cambios.
+    El historial (opcional) y concurrente se pasan tal cual a GestorTareas; un gestor
+    concurrente carga todas las tareas al abrirse.
+    """
+    from .gestor_tareas import GestorTareas
+    if not os.path.exists(ruta):
+        guardar_instantanea_binaria(GestorTareas(), ruta)
+    instantanea = InstantaneaBinaria(ruta)
+    gestor = GestorTareas(almacen=instantanea, historial=historial, concurrente=concurrente)
+    instantanea.gestor = gestor
+    for tarea in instantanea.tareas_urgentes():
+        gestor.cola_urgentes.agregar_tarea(tarea)
+    return gestor
@@ -1,9 +1,18 @@
+import logging
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
+from tkinter import ttk, messagebox, simpledialog, filedialog
 import tkcalendar
-from datetime import datetime
+from datetime import datetime, timedelta
+from itertools import islice
 from .models import Prioridad
 from .gestor_tareas import GestorTareas
+from .metricas import medido
+from .tabla_virtual import TablaVirtual
+from .trabajador_consultas import TrabajadorConsultas
+from .eventos import (TAREA_AGREGADA, TAREA_ELIMINADA, TAREA_MODIFICADA, CATEGORIA_AGREGADA,
+                      COLA_MODIFICADA, HISTORIAL_APILADA)
+
+logger = logging.getLogger(__name__)
 
 class InterfazGrafica:
     def __init__(self, root, gestor=None):
@@ -12,16 +21,38 @@ class InterfazGrafica:
         self.root.geometry("1200x800")
         self.root.resizable(True, True)
         
-        self.gestor_tareas = gestor if gestor else GestorTareas()
+        # Las consultas corren en un hilo de trabajo: el gestor debe ser concurrente
+        self.gestor_tareas = gestor if gestor else GestorTareas(concurrente=True)
         
         # Variables para almacenar selecciones
         self.tarea_seleccionada = None
         self.categoria_seleccionada = None
         
+        # Vista mostrada en la tabla de tareas (categoría, búsqueda, filtro): al cambiarla
+        # la tabla vuelve al principio; al editar tareas conserva la posición
+        self._vista_tareas = None
+        
+        # El panel de historial muestra solo las acciones más recientes y se actualiza
+        # fila por fila; _historial_cima es la posición de la acción de arriba
+        self.maximo_filas_historial = 100
+        self._historial_cima = 0
+        
+        # Las consultas de la tabla de tareas corren en segundo plano (ver _actualizar_tareas).
+        # Lo que se construye en la primera consulta se construye antes en este hilo, así el
+        # trabajador nunca deja a medias una construcción (con un gestor no concurrente es
+        # lo único que lo protege de las modificaciones hechas desde Tk)
+        self.gestor_tareas.preparar_consultas()
+        self.trabajador = TrabajadorConsultas(self.root)
+        self.root.protocol("WM_DELETE_WINDOW", self._cerrar)
+        
         self._crear_widgets()
         self._configurar_estilos()
         self._actualizar_listas()
         self._actualizar_historial()
+        
+        # Desde aquí cada operación del gestor publica sus cambios y la interfaz
+        # actualiza solo lo afectado (ver _aplicar_eventos)
+        self.gestor_tareas.eventos.suscribir(self._aplicar_eventos)
     
     def _configurar_estilos(self):
         # Configurar estilos
@@ -66,6 +97,7 @@ class InterfazGrafica:
         frame_botones_cat.pack(fill=tk.X, padx=5, pady=2)
         
         ttk.Button(frame_botones_cat, text="Nueva Categoría", command=self._nueva_categoria).pack(side=tk.LEFT, padx=2)
+        ttk.Button(frame_botones_cat, text="Completar todas", command=self._completar_categoria).pack(side=tk.LEFT, padx=2)
         
         # Treeview para categorías
         self.tree_categorias = ttk.Treeview(self.panel_izquierdo)
@@ -84,24 +116,42 @@ class InterfazGrafica:
         ttk.Button(frame_botones_tareas, text="Editar", command=self._editar_tarea).pack(side=tk.LEFT, padx=2)
         ttk.Button(frame_botones_tareas, text="Eliminar", command=self._eliminar_tarea).pack(side=tk.LEFT, padx=2)
         ttk.Button(frame_botones_tareas, text="Completar", command=self._completar_tarea).pack(side=tk.LEFT, padx=2)
+        ttk.Button(frame_botones_tareas, text="Importar", command=self._importar_tareas).pack(side=tk.LEFT, padx=2)
         
         # Botones de deshacer/rehacer
         ttk.Button(frame_botones_tareas, text="Historial", command=self._actualizar_historial).pack(side=tk.RIGHT, padx=2)
         ttk.Button(frame_botones_tareas, text="Deshacer", command=self._deshacer).pack(side=tk.RIGHT, padx=2)
         ttk.Button(frame_botones_tareas, text="Rehacer", command=self._rehacer).pack(side=tk.RIGHT, padx=2)
         
+        # Búsqueda por título o descripción (se aplica en cada tecla, dentro de la categoría seleccionada)
+        frame_busqueda = ttk.Frame(self.panel_derecho)
+        frame_busqueda.pack(fill=tk.X, padx=5, pady=2)
+        ttk.Label(frame_busqueda, text="Buscar:").pack(side=tk.LEFT, padx=2)
+        self.busqueda_var = tk.StringVar()
+        self.busqueda_var.trace_add("write", lambda *args: self._actualizar_tareas(retraso_ms=None))
+        ttk.Entry(frame_busqueda, textvariable=self.busqueda_var).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=2)
+        ttk.Button(frame_busqueda, text="Limpiar", command=lambda: self.busqueda_var.set("")).pack(side=tk.LEFT, padx=2)
+        
+        # Filtro por vencimiento y cantidades de vencidas/próximas de la categoría seleccionada
+        self.filtro_vencimiento = tk.StringVar(value="Todas")
+        combo_vencimiento = ttk.Combobox(frame_busqueda, textvariable=self.filtro_vencimiento, state="readonly",
+                                         values=["Todas", "Vencidas", "Próximos 7 días"], width=16)
+        combo_vencimiento.pack(side=tk.LEFT, padx=2)
+        combo_vencimiento.bind("<<ComboboxSelected>>", lambda event: self._actualizar_tareas(retraso_ms=None))
+        self.lbl_vencimientos = ttk.Label(frame_busqueda, text="")
+        self.lbl_vencimientos.pack(side=tk.LEFT, padx=5)
+        
         # Lista de tareas
         self.frame_tareas = ttk.Frame(self.panel_derecho)
         self.frame_tareas.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
+        # Tabla virtual: solo las filas visibles están en el Treeview y cada prioridad
+        # tiene una etiqueta de color compartida por todas sus filas
         columnas = ("prioridad", "titulo", "vencimiento", "estado")
-        self.tree_tareas = ttk.Treeview(self.frame_tareas, columns=columnas, show="headings")
-        self.tree_tareas.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
-        
-        # Barra de desplazamiento
-        scrollbar = ttk.Scrollbar(self.frame_tareas, orient="vertical", command=self.tree_tareas.yview)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.tree_tareas.configure(yscrollcommand=scrollbar.set)
+        colores = {Prioridad.BAJA: "green", Prioridad.MEDIA: "blue", Prioridad.ALTA: "orange", Prioridad.URGENTE: "red"}
+        self.tabla_tareas = TablaVirtual(self.frame_tareas, columnas,
+                                         {p.name: {"foreground": color} for p, color in colores.items()})
+        self.tree_tareas = self.tabla_tareas.tree
         
         # Configurar columnas
         self.tree_tareas.heading("prioridad", text="Prioridad")
@@ -114,7 +164,7 @@ class InterfazGrafica:
         self.tree_tareas.column("vencimiento", width=150)
         self.tree_tareas.column("estado", width=100)
         
-        self.tree_tareas.bind("<<TreeviewSelect>>", self._seleccionar_tarea)
+        self.tree_tareas.bind("<<TreeviewSelect>>", self._seleccionar_tarea, add="+")
         self.tree_tareas.bind("<Double-1>", lambda event: self._editar_tarea())
         
         # Configuración del panel de historial
@@ -166,12 +216,13 @@ class InterfazGrafica:
         ttk.Button(self.frame_urgentes, text="Procesar", 
                    command=self._procesar_urgente).pack(padx=5, pady=5, side=tk.RIGHT)
     
+    @medido("gui.actualizar_listas")
     def _actualizar_listas(self):
         # Actualizar árbol de categorías
         self.tree_categorias.delete(*self.tree_categorias.get_children())
         
         # Insertar categoría "Todas"
-        self.tree_categorias.insert("", "end", text="Todas", iid="todas")
+        self.tree_categorias.insert("", "end", text=self._texto_categoria("Todas", None), iid="todas")
         
         # Obtener todas las categorías ordenadas por profundidad para asegurar que los padres se creen antes que los hijos
         categorias = sorted(self.gestor_tareas.obtener_todas_categorias(), key=lambda x: x[2])
@@ -183,8 +234,9 @@ class InterfazGrafica:
                 continue
             
             # Para categorías de primer nivel, el padre es la raíz del árbol (cadena vacía "")
+            texto = self._texto_categoria(nodo.nombre, ruta)
             if profundidad == 0:
-                self.tree_categorias.insert("", "end", text=nodo.nombre, iid=ruta)
+                self.tree_categorias.insert("", "end", text=texto, iid=ruta)
             else:
                 # Para subcategorías, calcular el ID del padre
                 partes = ruta.split('/')
@@ -192,97 +244,188 @@ class InterfazGrafica:
                 
                 # Verificar que el padre existe antes de intentar insertar
                 try:
-                    self.tree_categorias.insert(padre, "end", text=nodo.nombre, iid=ruta)
+                    self.tree_categorias.insert(padre, "end", text=texto, iid=ruta)
                 except Exception as e:
-                    print(f"Error al insertar categoría '{ruta}': {e}")
+                    logger.warning("Error al insertar categoría '%s': %s", ruta, e)
                     # Intentar insertar en la raíz como fallback
-                    self.tree_categorias.insert("", "end", text=nodo.nombre, iid=ruta)
+                    self.tree_categorias.insert("", "end", text=texto, iid=ruta)
         
         # Actualizar lista de tareas según la categoría seleccionada
         self._actualizar_tareas()
         
-        # Actualizar lista de tareas urgentes
+        self._actualizar_urgentes()
+    
+    def _actualizar_urgentes(self, cantidad=50):
+        """Muestra las primeras tareas de la cola de urgentes, en el orden en que se procesarían"""
+        cola = self.gestor_tareas.cola_urgentes
         self.lista_urgentes.delete(0, tk.END)
-        for tarea in self.gestor_tareas.cola_urgentes.obtener_todas():
+        for tarea in cola.primeras(cantidad):
             self.lista_urgentes.insert(tk.END, tarea.titulo)
+        if cola.tamaño() > cantidad:
+            self.lista_urgentes.insert(tk.END, f"... y {cola.tamaño() - cantidad} más")
     
-    def _actualizar_tareas(self):
-        # Limpiar lista actual
-        self.tree_tareas.delete(*self.tree_tareas.get_children())
-        
-        # Depuración
-        print(f"Actualizando tareas para categoría: {self.categoria_seleccionada}")
-        
-        # Obtener tareas según la categoría seleccionada
-        if not self.categoria_seleccionada or self.categoria_seleccionada == "todas":
-            tareas = self.gestor_tareas.lista_tareas.obtener_todas_tareas()
-            print(f"Mostrando todas las tareas: {len(tareas)}")
-        else:
-            tareas = self.gestor_tareas.obtener_tareas_por_categoria(self.categoria_seleccionada)
-            print(f"Tareas para {self.categoria_seleccionada}: {len(tareas)}")
+    def _aplicar_eventos(self, eventos):
+        """
+        Aplica un lote de eventos del gestor: inserta las categorías nuevas, actualiza
+        el texto (pendientes/total) solo de las categorías afectadas y sus ancestros,
+        y refresca la tabla, la cola de urgentes y el historial solo si cambiaron.
+        """
+        rutas = set()        # Categorías cuyos contadores cambiaron
+        consultar = False    # Cambió qué tareas se ven o su orden: volver a consultar
+        repintar = False     # Solo cambió el texto de alguna tarea: repintar la ventana visible
+        cola = historial = False
+        for evento in eventos:
+            tipo = evento.tipo
+            if tipo == CATEGORIA_AGREGADA:
+                self._insertar_categoria(evento.ruta)
+            elif tipo in (TAREA_AGREGADA, TAREA_ELIMINADA):
+                rutas.add(evento.tarea.categoria)
+                consultar = True
+            elif tipo == TAREA_MODIFICADA:
+                cambios = evento.cambios
+                if 'categoria' in cambios:
+                    rutas.update(cambios['categoria'])
+                elif 'completada' in cambios:
+                    rutas.add(evento.tarea.categoria)
+                if cambios.keys() - {'titulo', 'descripcion'} or self.busqueda_var.get().strip():
+                    consultar = True
+                else:
+                    repintar = True
+            elif tipo == COLA_MODIFICADA:
+                cola = True
+            elif tipo == HISTORIAL_APILADA:
+                self._historial_apilada(evento.accion)
+                historial = True
+            else:
+                self._historial_desapilada()
+                historial = True
         
-        # Si no hay tareas, salir
-        if not tareas:
-            print("No hay tareas para mostrar")
+        if rutas:
+            self._actualizar_textos_categorias(rutas)
+        if consultar:
+            self._actualizar_tareas()
+        elif repintar:
+            self.tabla_tareas.refrescar()
+        if cola:
+            self._actualizar_urgentes()
+        if historial:
+            self._actualizar_resumen_historial()
+    
+    def _insertar_categoria(self, ruta):
+        if self.tree_categorias.exists(ruta):
             return
+        padre, _, nombre = ruta.rpartition('/')
+        if padre and not self.tree_categorias.exists(padre):
+            self._insertar_categoria(padre)
+        self.tree_categorias.insert(padre, "end", text=self._texto_categoria(nombre, ruta), iid=ruta)
+    
+    def _actualizar_textos_categorias(self, rutas):
+        """Recalcula el texto de las categorías indicadas, de sus ancestros y de "Todas" (O(profundidad) cada una)"""
+        pendientes = {"todas"}
+        for ruta in rutas:
+            while ruta and ruta not in pendientes:
+                pendientes.add(ruta)
+                ruta = ruta.rpartition('/')[0]
+        for ruta in pendientes:
+            if ruta == "todas":
+                self.tree_categorias.item("todas", text=self._texto_categoria("Todas", None))
+            elif self.tree_categorias.exists(ruta):
+                self.tree_categorias.item(ruta, text=self._texto_categoria(ruta.rpartition('/')[2], ruta))
+    
+    def _texto_categoria(self, nombre, ruta):
+        """Nombre de la categoría con sus tareas pendientes/total, leídos de los contadores agregados"""
+        estadisticas = self.gestor_tareas.obtener_estadisticas_categoria(ruta)
+        if not estadisticas or not estadisticas['total']:
+            return nombre
+        return f"{nombre} ({estadisticas['pendientes']}/{estadisticas['total']})"
+    
+    @medido("gui.actualizar_tareas")
+    def _actualizar_tareas(self, retraso_ms=0):
+        """
+        Pide al trabajador la lista de tareas de la vista actual (categoría, búsqueda y
+        filtro) y la muestra cuando llega. Las filas visibles se repintan enseguida con
+        la lista anterior, así una tarea editada se ve modificada sin esperar la consulta.
+        
+        Args:
+            retraso_ms: Espera antes de consultar; None usa la del trabajador, para que
+                una ráfaga de teclas o clics termine en una sola consulta
+        """
+        logger.debug("Actualizando tareas para categoría: %s", self.categoria_seleccionada)
+        vista = (self.categoria_seleccionada, self.busqueda_var.get().strip(), self.filtro_vencimiento.get())
+        if vista == self._vista_tareas:
+            self.tabla_tareas.refrescar()
+        self.trabajador.solicitar(lambda vigente: self._consultar_tareas(vista, datetime.now(), vigente),
+                                  lambda resultado: self._mostrar_tareas(vista, resultado), retraso_ms)
+    
+    @medido("gui.consultar_tareas")
+    def _consultar_tareas(self, vista, ahora, vigente):
+        """
+        En el hilo de trabajo: tareas de la vista, ya ordenadas, y las cantidades de
+        vencidas y próximas. Devuelve None si la consulta quedó vieja antes de terminar.
+        Retiene el cerrojo de lectura del gestor mientras recorre los iteradores, así las
+        modificaciones del hilo de Tk esperan a que termine.
+        """
+        categoria, consulta, filtro = vista
+        gestor = self.gestor_tareas
+        with gestor.lectura():
+            if consulta:
+                tareas = gestor.buscar_tareas(consulta, categoria)
+                if filtro != "Todas":
+                    limite = ahora if filtro == "Vencidas" else ahora + timedelta(days=7)
+                    desde = None if filtro == "Vencidas" else ahora
+                    tareas = (tarea for tarea in tareas if not tarea.completada and tarea.fecha_vencimiento
+                              and (desde is None or tarea.fecha_vencimiento >= desde) and tarea.fecha_vencimiento < limite)
+            elif filtro == "Vencidas":
+                tareas = gestor.vencidas(ahora, categoria)
+            elif filtro == "Próximos 7 días":
+                tareas = gestor.proximas(timedelta(days=7), ahora, categoria)
+            else:
+                tareas = gestor.iter_tareas_por_categoria(categoria, por_prioridad=True)
+        
+            resultados = []
+            for tarea in tareas:
+                resultados.append(tarea)
+                if len(resultados) % 1024 == 0 and not vigente():
+                    return None
+            return resultados, gestor.resumen_vencimientos(categoria, ahora)
+    
+    def _mostrar_tareas(self, vista, resultado):
+        """En el hilo de Tk: pasa a la tabla la lista consultada; la tabla formatea solo las filas visibles"""
+        tareas, vencimientos = resultado
         
-        # Ordenar por prioridad
-        try:
-            tareas = sorted(tareas, key=lambda t: (
-                t.prioridad.value, 
-                t.fecha_vencimiento.strftime("%Y%m%d") if hasattr(t.fecha_vencimiento, 'strftime') else str(t.fecha_vencimiento)
-            ), reverse=True)
-        except Exception as e:
-            print(f"Error al ordenar tareas: {e}")
+        def fuente(inicio, cantidad):
+            return [self._fila_tarea(tarea) for tarea in tareas[inicio:inicio + cantidad]]
         
-        # Insertar en la lista
-        for tarea in tareas:
-            try:
-                estado = "Completada" if tarea.completada else "Pendiente"
-                
-                # Formatear fecha de manera segura
-                if hasattr(tarea.fecha_vencimiento, 'strftime'):
-                    fecha = tarea.fecha_vencimiento.strftime("%d/%m/%Y")
-                else:
-                    fecha = str(tarea.fecha_vencimiento)
-                
-                valores = (tarea.prioridad.name, tarea.titulo, fecha, estado)
-                item = self.tree_tareas.insert("", "end", values=valores)
-                
-                # Guardar ID para referencia
-                self.tree_tareas.item(item, tags=(str(tarea.id),))
-                
-                # Asignar color según prioridad
-                if tarea.prioridad == Prioridad.BAJA:
-                    self.tree_tareas.tag_configure(str(tarea.id), foreground="green")
-                elif tarea.prioridad == Prioridad.MEDIA:
-                    self.tree_tareas.tag_configure(str(tarea.id), foreground="blue")
-                elif tarea.prioridad == Prioridad.ALTA:
-                    self.tree_tareas.tag_configure(str(tarea.id), foreground="orange")
-                elif tarea.prioridad == Prioridad.URGENTE:
-                    self.tree_tareas.tag_configure(str(tarea.id), foreground="red")
-            except Exception as e:
-                print(f"Error al insertar tarea '{tarea.titulo}': {e}")
+        self.tabla_tareas.mostrar(len(tareas), fuente, reiniciar=vista != self._vista_tareas)
+        self._vista_tareas = vista
+        self.lbl_vencimientos.config(
+            text=f"Vencidas: {vencimientos['vencidas']}  |  Próximos 7 días: {vencimientos['proximas']}")
+    
+    @staticmethod
+    def _fila_tarea(tarea):
+        """Fila de la tabla de tareas: (iid, valores, etiqueta de color)"""
+        estado = "Completada" if tarea.completada else "Pendiente"
+        
+        # Formatear fecha de manera segura
+        if hasattr(tarea.fecha_vencimiento, 'strftime'):
+            fecha = tarea.fecha_vencimiento.strftime("%d/%m/%Y")
+        else:
+            fecha = str(tarea.fecha_vencimiento)
+        
+        return (str(tarea.id), (tarea.prioridad.name, tarea.titulo, fecha, estado), tarea.prioridad.name)
     
     def _seleccionar_categoria(self, event):
         seleccion = self.tree_categorias.selection()
         if seleccion:
             self.categoria_seleccionada = seleccion[0]
-            self._actualizar_tareas()
-            print(f"Categoría seleccionada: {self.categoria_seleccionada}")  # Depuración
-            
-            # Verificar tareas en esta categoría (depuración)
-            tareas = self.gestor_tareas.obtener_tareas_por_categoria(self.categoria_seleccionada)
-            print(f"Encontradas {len(tareas)} tareas en esta categoría")  # Depuración
+            self._actualizar_tareas(retraso_ms=None)
+            logger.debug("Categoría seleccionada: %s", self.categoria_seleccionada)
     
     def _seleccionar_tarea(self, event):
+        # Las filas usan el id de la tarea como iid
         seleccion = self.tree_tareas.selection()
         if seleccion:
-            item = seleccion[0]
-            tags = self.tree_tareas.item(item, "tags")
-            if tags:
-                tarea_id = int(tags[0])
-                self.tarea_seleccionada = tarea_id
+            self.tarea_seleccionada = int(seleccion[0])
     
     def _nueva_categoria(self):
         nombre = simpledialog.askstring("Nueva Categoría", "Nombre de la categoría:")
@@ -293,9 +436,7 @@ class InterfazGrafica:
             else:
                 ruta = nombre
                 
-            self.gestor_tareas.arbol_categorias.agregar_categoria(ruta)
-            self._actualizar_listas()
-            self._actualizar_historial()
+            self.gestor_tareas.agregar_categoria(ruta)
             self.barra_estado.config(text=f"Categoría '{nombre}' creada")
     
     def _nueva_tarea(self):
@@ -357,8 +498,6 @@ class InterfazGrafica:
             categoria = categoria_var.get()
             
             self.gestor_tareas.crear_tarea(titulo, descripcion, prioridad, fecha_dt, categoria)
-            self._actualizar_listas()
-            self._actualizar_historial()
             ventana.destroy()
             self.barra_estado.config(text=f"Tarea '{titulo}' creada")
         
@@ -443,8 +582,6 @@ class InterfazGrafica:
                 categoria=categoria
             )
             
-            self._actualizar_listas()
-            self._actualizar_historial()
             ventana.destroy()
             self.barra_estado.config(text=f"Tarea '{titulo}' actualizada")
         
@@ -463,83 +600,111 @@ class InterfazGrafica:
         if confirmar:
             tarea = self.gestor_tareas.eliminar_tarea(self.tarea_seleccionada)
             if tarea:
-                self._actualizar_listas()
-                self._actualizar_historial()
                 self.barra_estado.config(text=f"Tarea '{tarea.titulo}' eliminada")
                 self.tarea_seleccionada = None
     
+    def _completar_categoria(self):
+        """Marca como completadas todas las tareas pendientes de la categoría seleccionada, como una sola acción"""
+        ruta = self.categoria_seleccionada
+        nombre = ruta if ruta and ruta != "todas" else "Todas"
+        tareas = list(self.gestor_tareas.iter_tareas_por_categoria(ruta, solo_pendientes=True))
+        if not tareas:
+            self.barra_estado.config(text=f"No hay tareas pendientes en '{nombre}'")
+            return
+        if not messagebox.askyesno("Confirmar", f"¿Marcar como completadas las {len(tareas)} tareas pendientes de '{nombre}'?"):
+            return
+        with self.gestor_tareas.transaccion(f"Completar tareas de '{nombre}'"):
+            for tarea in tareas:
+                self.gestor_tareas.completar_tarea(tarea.id)
+        self.barra_estado.config(text=f"{len(tareas)} tareas de '{nombre}' marcadas como completadas")
+    
     def _completar_tarea(self):
         if not self.tarea_seleccionada:
             messagebox.showinfo("Información", "Seleccione una tarea para marcar como completada")
             return
             
-        tarea = self.gestor_tareas.lista_tareas.obtener_tarea(self.tarea_seleccionada)
+        tarea = self.gestor_tareas.completar_tarea(self.tarea_seleccionada)
         if tarea:
-            tarea.marcar_completada()
-            self._actualizar_listas()
-            self._actualizar_historial()
             self.barra_estado.config(text=f"Tarea '{tarea.titulo}' marcada como completada")
     
+    @medido("gui.actualizar_historial")
     def _actualizar_historial(self):
-        """Actualiza la visualización del historial de acciones"""
-        # Limpiar lista actual
+        """Vuelve a mostrar las acciones más recientes del historial (al iniciar)"""
         self.tree_historial.delete(*self.tree_historial.get_children())
-        
-        # Cargar acciones desde el historial (en orden inverso para mostrar las más recientes primero)
-        for i, accion in enumerate(reversed(self.gestor_tareas.historial_acciones.pila_deshacer)):
-            indice = len(self.gestor_tareas.historial_acciones.pila_deshacer) - i
-            
-            # Determinar tipo de acción en español
-            if accion.tipo_accion == "AGREGAR":
-                tipo = "Agregar"
-                detalles = "Se agregó esta tarea"
-            elif accion.tipo_accion == "ELIMINAR":
-                tipo = "Eliminar"
-                detalles = "Se eliminó esta tarea"
-            elif accion.tipo_accion == "ACTUALIZAR":
-                tipo = "Actualizar"
-                # Crear detalles de la actualización
-                cambios = []
-                for key, old_value in accion.valores_antiguos.items():
-                    if key == 'titulo' and old_value != accion.tarea.titulo:
-                        cambios.append(f"Título: '{old_value}' → '{accion.tarea.titulo}'")
-                    elif key == 'descripcion' and old_value != accion.tarea.descripcion:
-                        # Truncar descripciones largas
-                        old_desc = (old_value[:20] + '...') if len(old_value) > 20 else old_value
-                        new_desc = (accion.tarea.descripcion[:20] + '...') if len(accion.tarea.descripcion) > 20 else accion.tarea.descripcion
-                        cambios.append(f"Descripción modificada")
-                    elif key == 'prioridad' and old_value != accion.tarea.prioridad:
-                        cambios.append(f"Prioridad: {old_value} → {accion.tarea.prioridad}")
-                    elif key == 'fecha_vencimiento' and old_value != accion.tarea.fecha_vencimiento:
-                        old_date = old_value.strftime("%d/%m/%Y") if hasattr(old_value, 'strftime') else str(old_value)
-                        new_date = accion.tarea.fecha_vencimiento.strftime("%d/%m/%Y") if hasattr(accion.tarea.fecha_vencimiento, 'strftime') else str(accion.tarea.fecha_vencimiento)
-                        cambios.append(f"Fecha: {old_date} → {new_date}")
-                    elif key == 'categoria' and old_value != accion.tarea.categoria:
-                        cambios.append(f"Categoría: '{old_value or 'Sin categoría'}' → '{accion.tarea.categoria or 'Sin categoría'}'")
-                
-                detalles = ", ".join(cambios) if cambios else "No hay cambios significativos"
-            
-            self.tree_historial.insert("", "end", values=(indice, tipo, accion.tarea.titulo, detalles))
-        
-        # Actualizar estadísticas
-        total_acciones = len(self.gestor_tareas.historial_acciones.pila_deshacer)
-        total_rehacer = len(self.gestor_tareas.historial_acciones.pila_rehacer)
-        
-        self.lbl_total_acciones.config(text=f"Total de acciones: {total_acciones}")
+        historial = self.gestor_tareas.historial_acciones
+        self._historial_cima = historial.cantidad_deshacer()
+        # Solo las que están en memoria; las más antiguas pueden haber pasado a disco
+        recientes = islice(reversed(historial.pila_deshacer), self.maximo_filas_historial)
+        for i, accion in enumerate(recientes):
+            self.tree_historial.insert("", "end", values=(self._historial_cima - i, *accion.resumen()))
+        self._actualizar_resumen_historial()
+    
+    def _historial_apilada(self, accion):
+        """Una acción nueva (o rehecha) arriba: se agrega su fila y se quita la más vieja si sobra"""
+        historial = self.gestor_tareas.historial_acciones
+        cima = historial.cantidad_deshacer()
+        if cima != self._historial_cima + 1:
+            # El horizonte descartó acciones antiguas: las posiciones de las filas cambiaron
+            for i, item in enumerate(self.tree_historial.get_children()):
+                self.tree_historial.set(item, "indice", cima - 1 - i)
+        self._historial_cima = cima
+        self.tree_historial.insert("", 0, values=(cima, *accion.resumen()))
+        filas = self.tree_historial.get_children()
+        if len(filas) > self.maximo_filas_historial:
+            self.tree_historial.delete(filas[-1])
+    
+    def _historial_desapilada(self):
+        """La acción de arriba se deshizo: se quita su fila y, si hay, entra una más vieja abajo"""
+        filas = self.tree_historial.get_children()
+        if filas:
+            self.tree_historial.delete(filas[0])
+        historial = self.gestor_tareas.historial_acciones
+        self._historial_cima = historial.cantidad_deshacer()
+        mostradas = len(filas) - 1 if filas else 0
+        # Posición (desde 1) de la acción que entra abajo y su lugar en la parte en memoria
+        posicion = self._historial_cima - mostradas
+        indice = len(historial.pila_deshacer) - 1 - mostradas
+        if posicion >= 1 and indice >= 0:
+            accion = historial.pila_deshacer[indice]
+            self.tree_historial.insert("", "end", values=(posicion, *accion.resumen()))
+    
+    def _actualizar_resumen_historial(self):
+        historial = self.gestor_tareas.historial_acciones
+        total_acciones = historial.cantidad_deshacer()
+        total_rehacer = len(historial.pila_rehacer)
+        resumen = historial.estadisticas()
+        
+        texto = f"Total de acciones: {total_acciones}"
+        if resumen['en_disco']:
+            texto += f" ({resumen['en_disco']} en disco)"
+        if resumen['bytes_liberados']:
+            texto += f" - {resumen['bytes_liberados'] // 1024} KB liberados"
+        self.lbl_total_acciones.config(text=texto)
         self.lbl_total_rehacer.config(text=f"Acciones para rehacer: {total_rehacer}")
     
+    def _importar_tareas(self):
+        ruta = filedialog.askopenfilename(
+            title="Importar tareas",
+            filetypes=[("CSV o JSONL", "*.csv *.jsonl"), ("Todos los archivos", "*.*")])
+        if not ruta:
+            return
+        try:
+            resultado = self.gestor_tareas.importar(ruta)
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudo importar el archivo: {e}")
+            return
+        self.barra_estado.config(
+            text=f"Importadas {resultado['importadas']} tareas ({resultado['omitidas']} omitidas, "
+                 f"{resultado['filas_por_segundo']:.0f} filas/s)")
+    
     def _deshacer(self):
         if self.gestor_tareas.deshacer():
-            self._actualizar_listas()
-            self._actualizar_historial()
             self.barra_estado.config(text="Acción deshecha")
         else:
             self.barra_estado.config(text="No hay acciones para deshacer")
     
     def _rehacer(self):
         if self.gestor_tareas.rehacer():
-            self._actualizar_listas()
-            self._actualizar_historial()
             self.barra_estado.config(text="Acción rehecha")
         else:
             self.barra_estado.config(text="No hay acciones para rehacer")
@@ -547,14 +712,17 @@ class InterfazGrafica:
     def _procesar_urgente(self):
         tarea = self.gestor_tareas.procesar_siguiente_urgente()
         if tarea:
-            tarea.marcar_completada()
-            self._actualizar_listas()
-            self._actualizar_historial()
+            self.gestor_tareas.completar_tarea(tarea.id)
             self.barra_estado.config(text=f"Tarea urgente '{tarea.titulo}' procesada")
         else:
             self.barra_estado.config(text="No hay tareas urgentes pendientes")
 
 
+    def _cerrar(self):
+        self.trabajador.cerrar()
+        self.root.destroy()
+
+
 def iniciar_interfaz_grafica(gestor=None):
     root = tk.Tk()
     if gestor:
@@ -562,6 +730,8 @@ def iniciar_interfaz_grafica(gestor=None):
     else:
         app = InterfazGrafica(root)
     root.mainloop()
+    # Confirmar en disco los cambios pendientes al cerrar la ventana
+    app.gestor_tareas.cerrar()
 
 if __name__ == "__main__":
     iniciar_interfaz_grafica() 
\ No newline at end of file
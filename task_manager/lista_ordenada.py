@@ -0,0 +1,135 @@
+from bisect import bisect_left, bisect_right, insort
+from itertools import chain, islice
+
+"""
+Estructura de datos: Lista ordenada por bloques
+-----------------------------------------------
+Mantiene sus elementos siempre ordenados repartidos en bloques pequeños (sublistas).
+Es conveniente para los índices de ordenamiento de tareas porque:
+1. Insertar o eliminar un elemento solo busca con bisect (O(log n)) y desplaza
+   los elementos de un bloque acotado, nunca los de toda la colección.
+2. Recorrer los primeros k elementos en orden cuesta O(k), sin volver a ordenar.
+3. No necesita dependencias externas, solo el módulo bisect de la biblioteca estándar.
+4. Las longitudes de los bloques se acumulan en un árbol de Fenwick, así contar los
+   elementos menores que un valor cuesta O(log n) en lugar de sumar todos los bloques
+   anteriores. El árbol se reconstruye (O(n/carga)) solo al dividir o eliminar un bloque.
+"""
+
+class ListaOrdenada:
+    def __init__(self, iterable=(), carga=500):
+        self._carga = carga
+        self._listas = []    # Bloques ordenados
+        self._maximos = []   # Último elemento de cada bloque
+        self._fenwick = []   # Árbol de Fenwick sobre las longitudes de los bloques
+        self._longitud = 0
+
+        valores = sorted(iterable)
+        for i in range(0, len(valores), carga):
+            bloque = valores[i:i + carga]
+            self._listas.append(bloque)
+            self._maximos.append(bloque[-1])
+        self._longitud = len(valores)
+        self._reconstruir_fenwick()
+
+    def __len__(self):
+        return self._longitud
+
+    def __iter__(self):
+        return chain.from_iterable(self._listas)
+
+    def __reversed__(self):
+        return chain.from_iterable(reversed(bloque) for bloque in reversed(self._listas))
+
+    def agregar(self, valor):
+        if not self._listas:
+            self._listas.append([valor])
+            self._maximos.append(valor)
+            self._longitud = 1
+            self._reconstruir_fenwick()
+            return
+
+        pos = bisect_right(self._maximos, valor)
+        if pos == len(self._maximos):
+            # Mayor que todos: va al final del último bloque
+            pos -= 1
+            self._listas[pos].append(valor)
+            self._maximos[pos] = valor
+        else:
+            insort(self._listas[pos], valor)
+
+        self._longitud += 1
+        self._sumar_fenwick(pos, 1)
+        self._dividir(pos)
+
+    def eliminar(self, valor):
+        pos = bisect_left(self._maximos, valor)
+        if pos == len(self._maximos):
+            raise ValueError(f"{valor!r} no está en la lista")
+
+        bloque = self._listas[pos]
+        i = bisect_left(bloque, valor)
+        if bloque[i] != valor:
+            raise ValueError(f"{valor!r} no está en la lista")
+
+        del bloque[i]
+        self._longitud -= 1
+
+        if not bloque:
+            del self._listas[pos]
+            del self._maximos[pos]
+            self._reconstruir_fenwick()
+        else:
+            self._sumar_fenwick(pos, -1)
+            if i == len(bloque):
+                self._maximos[pos] = bloque[-1]
+
+    def contar_menores(self, valor):
+        """Cantidad de elementos estrictamente menores que valor, en O(log n)"""
+        pos = bisect_left(self._maximos, valor)
+        anteriores = self._prefijo_fenwick(pos)
+        if pos < len(self._listas):
+            anteriores += bisect_left(self._listas[pos], valor)
+        return anteriores
+
+    def iter_desde(self, valor):
+        """Recorre en orden los elementos mayores o iguales que valor, en O(log n) más lo recorrido"""
+        pos = bisect_left(self._maximos, valor)
+        if pos == len(self._listas):
+            return iter(())
+        primero = self._listas[pos]
+        return chain(primero[bisect_left(primero, valor):], chain.from_iterable(islice(self._listas, pos + 1, None)))
+
+    def _dividir(self, pos):
+        bloque = self._listas[pos]
+        if len(bloque) > 2 * self._carga:
+            mitad = bloque[self._carga:]
+            del bloque[self._carga:]
+            self._maximos[pos] = bloque[-1]
+            self._listas.insert(pos + 1, mitad)
+            self._maximos.insert(pos + 1, mitad[-1])
+            self._reconstruir_fenwick()
+
+    def _reconstruir_fenwick(self):
+        """Vuelve a armar el árbol de Fenwick con las longitudes actuales de los bloques"""
+        arbol = [len(bloque) for bloque in self._listas]
+        for i in range(len(arbol)):
+            padre = i | (i + 1)
+            if padre < len(arbol):
+                arbol[padre] += arbol[i]
+        self._fenwick = arbol
+
+    def _sumar_fenwick(self, pos, delta):
+        """Suma delta a la longitud registrada del bloque pos"""
+        arbol = self._fenwick
+        while pos < len(arbol):
+            arbol[pos] += delta
+            pos |= pos + 1
+
+    def _prefijo_fenwick(self, pos):
+        """Cantidad de elementos en los bloques anteriores a pos"""
+        total = 0
+        arbol = self._fenwick
+        while pos > 0:
+            total += arbol[pos - 1]
+            pos &= pos - 1
+        return total
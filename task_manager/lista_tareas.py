@@ -1,5 +1,7 @@
 from datetime import datetime
-from .models import Tarea, Prioridad
+from .models import Tarea, Prioridad, fecha_a_entero
+from .lista_ordenada import ListaOrdenada
+from .estadisticas import EstadisticasTareas
 
 """
 Estructura de datos: Lista
@@ -11,40 +13,223 @@ Es conveniente usar listas para la gestión de tareas porque:
 3. Facilita operaciones como ordenar las tareas por diferentes criterios (prioridad, fecha).
 4. La flexibilidad para agregar o eliminar elementos en cualquier posición.
 5. Implementación sencilla y eficiente para colecciones de tamaño moderado.
+
+La lista se respalda con un diccionario id -> Tarea. Los diccionarios de Python conservan
+el orden de inserción, así que se mantiene el recorrido en orden de creación y además
+obtener, eliminar y actualizar una tarea por su id cuesta O(1) en lugar de O(n).
+
+Además se mantienen dos índices ordenados (por prioridad y por fecha) que se actualizan
+al agregar, eliminar o modificar una tarea en O(log n). Así obtener las k primeras
+tareas en orden cuesta O(k) y no hace falta reordenar toda la lista en cada consulta.
+Junto con los índices se mantienen los contadores agregados de todas las tareas
+(EstadisticasTareas), así las estadísticas generales no recorren la lista.
+
+Entre diferir() y reanudar() (p. ej. durante una transacción del gestor) las tareas
+modificadas se reubican en los índices una sola vez al final, y los avisos a los
+oyentes se acumulan y se entregan juntos, sin repetir los del mismo campo de una tarea.
 """
 
+_SIN_FECHA = 2**63
+
+def combinar_avisos(avisos):
+    """
+    Reduce los avisos acumulados: de varios "modificada" del mismo campo de una tarea
+    queda el primero (con el valor anterior más antiguo), y se descarta si el campo
+    volvió a ese valor. Las altas y bajas se conservan en orden.
+    """
+    vistos = set()
+    resultado = []
+    for aviso in avisos:
+        evento, tarea, campo, valor_anterior = aviso
+        if evento == "modificada":
+            clave = (tarea.id, campo)
+            if clave in vistos:
+                continue
+            vistos.add(clave)
+            if getattr(tarea, campo) == valor_anterior:
+                continue
+        resultado.append(aviso)
+    return resultado
+
+def clave_prioridad(tarea):
+    """Clave del índice por prioridad: ordenar con reverse=True da el orden de iter_por_prioridad()"""
+    return ListaTareas._calcular_claves(tarea)[0]
+
+def clave_fecha(tarea):
+    """Clave del índice por fecha: ordenar con ella da el orden de iter_por_fecha()"""
+    return ListaTareas._calcular_claves(tarea)[1]
+
 class ListaTareas:
+    # Claves con que se ordenan iter_por_prioridad() e iter_por_fecha(); otros almacenes
+    # definen las suyas si ordenan distinto las tareas sin fecha
+    clave_prioridad = staticmethod(clave_prioridad)
+    clave_fecha = staticmethod(clave_fecha)
+    
     def __init__(self):
-        self.tareas = []
+        self.tareas = {}  # id -> Tarea, en orden de inserción
+        self._claves = {}  # id -> (clave_prioridad, clave_fecha, estado) con que se indexó la tarea
+        self.estadisticas = EstadisticasTareas()
+        self._por_prioridad = ListaOrdenada()
+        self._por_fecha = ListaOrdenada()
+        self._oyentes = []  # Funciones oyente(evento, tarea, campo, valor_anterior)
+        self._diferido = 0  # Profundidad de diferir()/reanudar()
+        self._sucias = {}   # id -> tarea a reubicar en los índices al reanudar
+        self._avisos = []   # Avisos acumulados mientras se difiere
+        
+    def __len__(self):
+        return len(self.tareas)
+    
+    def __iter__(self):
+        return iter(self.tareas.values())
+    
+    def __contains__(self, tarea_id):
+        return tarea_id in self.tareas
+    
+    def suscribir(self, oyente):
+        """
+        Registra una función que se llamará tras cada cambio en la lista como
+        oyente(evento, tarea, campo, valor_anterior), con evento "agregada",
+        "eliminada" o "modificada" (solo este último indica campo y valor anterior).
+        """
+        self._oyentes.append(oyente)
+    
+    def desuscribir(self, oyente):
+        if oyente in self._oyentes:
+            self._oyentes.remove(oyente)
+    
+    def _avisar(self, evento, tarea, campo=None, valor_anterior=None):
+        if self._diferido:
+            self._avisos.append((evento, tarea, campo, valor_anterior))
+            return
+        for oyente in self._oyentes:
+            oyente(evento, tarea, campo, valor_anterior)
+    
+    def diferir(self):
+        """Pospone la reubicación en los índices y los avisos hasta el reanudar() correspondiente"""
+        self._diferido += 1
+    
+    def reanudar(self):
+        """
+        Termina un diferir(); el último reubica las tareas modificadas y entrega los avisos
+        combinados. Un campo que volvió a su valor original no genera aviso, así que quien
+        haya copiado un estado intermedio (p. ej. el nodo al que se movió la tarea) debe
+        volver a contar las tareas devueltas.
+        
+        Returns:
+            Lista de tareas cuya prioridad, fecha o estado cambió mientras se difería
+        """
+        self._diferido -= 1
+        if self._diferido:
+            return []
+        sucias, self._sucias = self._sucias, {}
+        reubicadas = []
+        for tarea_id in sucias:
+            tarea = self.tareas.get(tarea_id)
+            if tarea is not None:
+                self._desindexar(tarea)
+                self._indexar(tarea)
+                reubicadas.append(tarea)
+        avisos, self._avisos = self._avisos, []
+        for aviso in combinar_avisos(avisos):
+            for oyente in self._oyentes:
+                oyente(*aviso)
+        return reubicadas
+    
+    @staticmethod
+    def _calcular_claves(tarea):
+        # El id negado desempata igual que sorted(..., reverse=True): a igual prioridad
+        # y fecha se conserva el orden de creación
+        # Se usan los enteros compactos de la tarea para no crear objetos al comparar
+        # Las tareas sin fecha se ordenan como si vencieran después de todas las demás
+        vencimiento = tarea._vencimiento if tarea._vencimiento is not None else _SIN_FECHA
+        return ((tarea._prioridad, vencimiento, -tarea.id),
+                (vencimiento, tarea.id))
+    
+    def _indexar(self, tarea):
+        clave_prioridad, clave_fecha = self._calcular_claves(tarea)
+        estado = EstadisticasTareas.estado(tarea)
+        self._claves[tarea.id] = (clave_prioridad, clave_fecha, estado)
+        self._por_prioridad.agregar((clave_prioridad, tarea))
+        self._por_fecha.agregar((clave_fecha, tarea))
+        self.estadisticas.sumar(estado)
+    
+    def _desindexar(self, tarea):
+        clave_prioridad, clave_fecha, estado = self._claves.pop(tarea.id)
+        self._por_prioridad.eliminar((clave_prioridad, tarea))
+        self._por_fecha.eliminar((clave_fecha, tarea))
+        self.estadisticas.restar(estado)
         
     def agregar_tarea(self, tarea):
-        self.tareas.append(tarea)
+        if tarea.id in self.tareas:
+            return tarea
+        self.tareas[tarea.id] = tarea
+        self._indexar(tarea)
+        tarea._observador = self
+        self._avisar("agregada", tarea)
         return tarea
     
+    def agregar_tareas(self, tareas):
+        """Agrega un lote de tareas (misma interfaz que ListaTareasSQLite.agregar_tareas)"""
+        for tarea in tareas:
+            self.agregar_tarea(tarea)
+        return tareas
+    
     def eliminar_tarea(self, tarea_id):
-        for i, tarea in enumerate(self.tareas):
-            if tarea.id == tarea_id:
-                return self.tareas.pop(i)
-        return None
+        tarea = self.tareas.pop(tarea_id, None)
+        if tarea:
+            self._desindexar(tarea)
+            tarea._observador = None
+            self._avisar("eliminada", tarea)
+        return tarea
     
     def obtener_tarea(self, tarea_id):
-        for tarea in self.tareas:
-            if tarea.id == tarea_id:
-                return tarea
-        return None
+        return self.tareas.get(tarea_id)
     
     def actualizar_tarea(self, tarea_id, **kwargs):
-        tarea = self.obtener_tarea(tarea_id)
+        tarea = self.tareas.get(tarea_id)
         if tarea:
             tarea.actualizar(**kwargs)
             return tarea
         return None
     
+    def tarea_modificada(self, tarea, campo, valor_anterior):
+        """Llamado por la tarea al cambiar un campo: reubica la tarea si cambió una clave de orden y avisa a los oyentes"""
+        if tarea.id not in self.tareas:
+            return
+        if campo in ('prioridad', 'fecha_vencimiento', 'completada'):
+            if self._diferido:
+                self._sucias[tarea.id] = tarea
+            else:
+                self._desindexar(tarea)
+                self._indexar(tarea)
+        self._avisar("modificada", tarea, campo, valor_anterior)
+    
+    def obtener_estadisticas(self, ahora=None):
+        """Contadores de todas las tareas (ver EstadisticasTareas.como_diccionario)"""
+        return self.estadisticas.como_diccionario(ahora)
+    
+    def contar_pendientes_entre(self, desde=None, hasta=None):
+        """Tareas pendientes que vencen en [desde, hasta) (None = sin límite), en O(log n)"""
+        return self.estadisticas.contar_entre(fecha_a_entero(desde), fecha_a_entero(hasta))
+    
+    def iter_pendientes_entre(self, desde=None, hasta=None):
+        """Tareas pendientes que vencen en [desde, hasta), de la más próxima a la más lejana: O(log n + k)"""
+        ids = self.estadisticas.ids_entre(fecha_a_entero(desde), fecha_a_entero(hasta))
+        return (self.tareas[tarea_id] for tarea_id in ids)
+    
     def obtener_todas_tareas(self):
-        return self.tareas.copy()
+        return list(self.tareas.values())
+    
+    def iter_por_prioridad(self):
+        """Recorre las tareas de mayor a menor prioridad (y fecha más lejana primero)"""
+        return (tarea for _, tarea in reversed(self._por_prioridad))
+    
+    def iter_por_fecha(self):
+        """Recorre las tareas desde la fecha de vencimiento más próxima"""
+        return (tarea for _, tarea in self._por_fecha)
     
     def ordenar_por_prioridad(self):
-        return sorted(self.tareas, key=lambda t: (t.prioridad.value, t.fecha_vencimiento), reverse=True)
+        return list(self.iter_por_prioridad())
     
     def ordenar_por_fecha(self):
-        return sorted(self.tareas, key=lambda t: t.fecha_vencimiento) 
\ No newline at end of file
+        return list(self.iter_por_fecha())
@@ -0,0 +1,147 @@
+import functools
+import time
+from bisect import bisect_left
+
+"""
+Métricas de operaciones: contadores e histogramas de latencia
+-------------------------------------------------------------
+Cada operación instrumentada suma uno a su contador y registra cuánto tardó en un
+histograma de cubetas fijas (potencias de 2 en microsegundos). Es conveniente porque:
+1. Registrar una medición es O(log cubetas) y no guarda las muestras: la memoria no
+   crece con la cantidad de operaciones.
+2. Las cubetas permiten estimar percentiles (p50, p90, p99) en cualquier momento.
+3. Si el registro está deshabilitado, el decorador solo hace una comprobación antes
+   de llamar a la función original.
+
+Uso:
+    @medido("gestor.crear_tarea")
+    def crear_tarea(...): ...
+
+    metricas.instantanea()  # diccionario con contadores y latencias
+"""
+
+# Límites superiores de las cubetas, en segundos: 1 µs, 2 µs, 4 µs, ... ~16 s
+_LIMITES = tuple(2 ** k / 1e6 for k in range(25))
+
+
+class Histograma:
+    __slots__ = ('cubetas', 'cantidad', 'total', 'minimo', 'maximo')
+
+    def __init__(self):
+        self.cubetas = [0] * (len(_LIMITES) + 1)  # La última recoge lo que supera el mayor límite
+        self.cantidad = 0
+        self.total = 0.0
+        self.minimo = None
+        self.maximo = None
+
+    def observar(self, segundos):
+        self.cubetas[bisect_left(_LIMITES, segundos)] += 1
+        self.cantidad += 1
+        self.total += segundos
+        if self.minimo is None or segundos < self.minimo:
+            self.minimo = segundos
+        if self.maximo is None or segundos > self.maximo:
+            self.maximo = segundos
+
+    def percentil(self, p):
+        """Estimación del percentil p (0-100): el límite superior de la cubeta que lo contiene"""
+        if not self.cantidad:
+            return None
+        objetivo = self.cantidad * p / 100
+        acumulado = 0
+        for i, cantidad in enumerate(self.cubetas):
+            acumulado += cantidad
+            if acumulado >= objetivo:
+                limite = _LIMITES[i] if i < len(_LIMITES) else self.maximo
+                return min(limite, self.maximo)
+        return self.maximo
+
+    def resumen(self):
+        return {
+            'cantidad': self.cantidad,
+            'total': self.total,
+            'media': self.total / self.cantidad if self.cantidad else None,
+            'minimo': self.minimo,
+            'maximo': self.maximo,
+            'p50': self.percentil(50),
+            'p90': self.percentil(90),
+            'p99': self.percentil(99),
+        }
+
+
+class RegistroMetricas:
+    def __init__(self, habilitado=True):
+        self.habilitado = habilitado
+        self._contadores = {}
+        self._histogramas = {}
+
+    def incrementar(self, nombre, cantidad=1):
+        if self.habilitado:
+            self._contadores[nombre] = self._contadores.get(nombre, 0) + cantidad
+
+    def observar(self, nombre, segundos):
+        """Registra una latencia (y cuenta una operación con ese nombre)"""
+        if not self.habilitado:
+            return
+        histograma = self._histogramas.get(nombre)
+        if histograma is None:
+            histograma = self._histogramas[nombre] = Histograma()
+        histograma.observar(segundos)
+        self._contadores[nombre] = self._contadores.get(nombre, 0) + 1
+
+    def instantanea(self):
+        """
+        Copia del estado actual de las métricas.
+
+        Returns:
+            {'contadores': {nombre: cantidad}, 'latencias': {nombre: resumen del histograma}}
+        """
+        # list() copia de una vez: otros hilos pueden estar registrando mediciones nuevas
+        return {
+            'contadores': dict(self._contadores),
+            'latencias': {nombre: histograma.resumen() for nombre, histograma in list(self._histogramas.items())},
+        }
+
+    def reiniciar(self):
+        self._contadores.clear()
+        self._histogramas.clear()
+
+
+# Registro compartido por todo el proceso
+metricas = RegistroMetricas()
+
+
+def medido(nombre, registro=None):
+    """Decorador que cuenta las llamadas a la función y mide su latencia"""
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            destino = registro or metricas
+            if not destino.habilitado:
+                return funcion(*args, **kwargs)
+            inicio = time.perf_counter()
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                destino.observar(nombre, time.perf_counter() - inicio)
+        return envoltura
+    return decorador
+
+
+def formatear_metricas(instantanea):
+    """Texto legible de una instantánea de métricas (para main.py --stats)"""
+    def en_ms(segundos):
+        return f"{segundos * 1000:9.3f}" if segundos is not None else "        -"
+
+    lineas = ["Latencias (ms):",
+              f"  {'operación':<32} {'llamadas':>9} {'media':>9} {'p50':>9} {'p90':>9} {'p99':>9} {'máx':>9}"]
+    for nombre, resumen in sorted(instantanea['latencias'].items()):
+        lineas.append(f"  {nombre:<32} {resumen['cantidad']:>9} {en_ms(resumen['media'])} {en_ms(resumen['p50'])} "
+                      f"{en_ms(resumen['p90'])} {en_ms(resumen['p99'])} {en_ms(resumen['maximo'])}")
+    otros = {nombre: cantidad for nombre, cantidad in instantanea['contadores'].items()
+             if nombre not in instantanea['latencias']}
+    if otros:
+        lineas.append("Contadores:")
+        for nombre, cantidad in sorted(otros.items()):
+            lineas.append(f"  {nombre:<32} {cantidad:>9}")
+    return "\n".join(lineas)
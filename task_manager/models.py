@@ -1,4 +1,6 @@
-from datetime import datetime
+import sys
+import threading
+from datetime import datetime, timedelta
 from enum import Enum
 
 class Prioridad(Enum):
@@ -10,19 +12,183 @@ class Prioridad(Enum):
     def __str__(self):
         return self.name
 
+class GeneradorIds:
+    """
+    Generador de identificadores monotónicos de 64 bits compartido por todo el proceso.
+    A diferencia de id(objeto), un identificador nunca se reutiliza aunque la tarea
+    original haya sido liberada por el recolector de basura.
+    """
+    MAXIMO = 2**63 - 1
+    
+    def __init__(self, inicio=1):
+        self._siguiente = inicio
+        self._cerrojo = threading.Lock()
+        
+    def siguiente(self):
+        with self._cerrojo:
+            valor = self._siguiente
+            if valor > self.MAXIMO:
+                raise OverflowError("Se agotaron los identificadores de 64 bits")
+            self._siguiente = valor + 1
+            return valor
+    
+    def avanzar(self, ultimo_usado):
+        """Garantiza que no se vuelva a entregar un id menor o igual a ultimo_usado (p. ej. al restaurar datos)"""
+        with self._cerrojo:
+            if ultimo_usado >= self._siguiente:
+                self._siguiente = ultimo_usado + 1
+
+# Generador único para todas las tareas del proceso
+generador_ids = GeneradorIds()
+
+# Representación compacta de los campos de una tarea:
+# - la prioridad se guarda como su valor entero (1-4)
+# - la fecha de vencimiento como microsegundos desde 1970-01-01 (fecha ingenua, sin zona horaria)
+# - las rutas de categoría se internan, así todas las tareas de una categoría comparten la misma cadena
+_PRIORIDADES = (None,) + tuple(Prioridad)  # valor entero -> Prioridad
+_EPOCA = datetime(1970, 1, 1)
+_MICROSEGUNDO = timedelta(microseconds=1)
+
+def fecha_a_entero(fecha):
+    """Convierte un datetime (o date) en microsegundos desde la época"""
+    if fecha is None:
+        return None
+    if not isinstance(fecha, datetime):
+        fecha = datetime.combine(fecha, datetime.min.time())
+    return (fecha - _EPOCA) // _MICROSEGUNDO
+
+def entero_a_fecha(valor):
+    """Operación inversa de fecha_a_entero"""
+    if valor is None:
+        return None
+    return _EPOCA + timedelta(microseconds=valor)
+
+def prioridad_desde_valor(valor):
+    return _PRIORIDADES[valor]
+
+def internar_categoria(categoria):
+    return sys.intern(categoria) if isinstance(categoria, str) else categoria
+
 class Tarea:
+    # __slots__ elimina el diccionario de atributos de cada instancia, que es
+    # la mayor parte del costo en memoria cuando se manejan millones de tareas
+    __slots__ = ('id', '_observador', '_titulo', '_descripcion', '_prioridad',
+                 '_vencimiento', '_categoria', '_completada', '__weakref__')
+    
     def __init__(self, titulo, descripcion, prioridad, fecha_vencimiento, categoria=None):
-        self.id = id(self)  # Usar id del objeto como identificador único
-        self.titulo = titulo
-        self.descripcion = descripcion
-        self.prioridad = prioridad
-        self.fecha_vencimiento = fecha_vencimiento
-        self.categoria = categoria
-        self.completada = False
+        self.id = generador_ids.siguiente()  # Identificador único y estable durante todo el proceso
+        self._observador = None  # Estructura que indexa la tarea (p. ej. ListaTareas)
+        self._titulo = titulo
+        self._descripcion = descripcion
+        self._prioridad = prioridad.value
+        self._vencimiento = fecha_a_entero(fecha_vencimiento)
+        self._categoria = internar_categoria(categoria)
+        self._completada = False
+    
+    @classmethod
+    def desde_diccionario(cls, datos):
+        """Reconstruye una tarea guardada con a_diccionario() conservando su id"""
+        tarea = cls.__new__(cls)
+        tarea.id = datos['id']
+        tarea._observador = None
+        tarea._titulo = datos['titulo']
+        tarea._descripcion = datos['descripcion']
+        tarea._prioridad = datos['prioridad']
+        tarea._vencimiento = datos['vencimiento']
+        tarea._categoria = internar_categoria(datos['categoria'])
+        tarea._completada = datos['completada']
+        generador_ids.avanzar(tarea.id)
+        return tarea
+    
+    def a_diccionario(self):
+        """Representación compacta y serializable (JSON) de la tarea"""
+        return {
+            'id': self.id,
+            'titulo': self._titulo,
+            'descripcion': self._descripcion,
+            'prioridad': self._prioridad,
+            'vencimiento': self._vencimiento,
+            'categoria': self._categoria,
+            'completada': self._completada,
+        }
+    
+    # Cada cambio de campo se avisa al observador (si lo hay) con el valor anterior,
+    # para que reubique la tarea en sus índices y lo comunique a sus suscriptores.
+    def _notificar(self, campo, anterior):
+        if self._observador is not None:
+            self._observador.tarea_modificada(self, campo, anterior)
+    
+    @property
+    def titulo(self):
+        return self._titulo
+    
+    @titulo.setter
+    def titulo(self, valor):
+        anterior = self._titulo
+        self._titulo = valor
+        if anterior != valor:
+            self._notificar('titulo', anterior)
+    
+    @property
+    def descripcion(self):
+        return self._descripcion
+    
+    @descripcion.setter
+    def descripcion(self, valor):
+        anterior = self._descripcion
+        self._descripcion = valor
+        if anterior != valor:
+            self._notificar('descripcion', anterior)
+    
+    @property
+    def prioridad(self):
+        return _PRIORIDADES[self._prioridad]
+    
+    @prioridad.setter
+    def prioridad(self, valor):
+        anterior = self._prioridad
+        self._prioridad = valor.value
+        if anterior != valor.value:
+            self._notificar('prioridad', _PRIORIDADES[anterior])
+    
+    @property
+    def fecha_vencimiento(self):
+        return entero_a_fecha(self._vencimiento)
+    
+    @fecha_vencimiento.setter
+    def fecha_vencimiento(self, valor):
+        anterior = self._vencimiento
+        self._vencimiento = fecha_a_entero(valor)
+        if anterior != self._vencimiento:
+            self._notificar('fecha_vencimiento', entero_a_fecha(anterior))
+    
+    @property
+    def categoria(self):
+        return self._categoria
+    
+    @categoria.setter
+    def categoria(self, valor):
+        anterior = self._categoria
+        self._categoria = internar_categoria(valor)
+        if anterior != valor:
+            self._notificar('categoria', anterior)
+    
+    @property
+    def completada(self):
+        return self._completada
+    
+    @completada.setter
+    def completada(self, valor):
+        anterior = self._completada
+        self._completada = valor
+        if anterior != valor:
+            self._notificar('completada', anterior)
         
     def __str__(self):
         estado = "Completada" if self.completada else "Pendiente"
-        return f"[{self.prioridad}] {self.titulo} - Vence: {self.fecha_vencimiento.strftime('%d/%m/%Y')} - {estado}"
+        vencimiento = self.fecha_vencimiento
+        vence = vencimiento.strftime('%d/%m/%Y') if vencimiento is not None else "Sin fecha"
+        return f"[{self.prioridad}] {self.titulo} - Vence: {vence} - {estado}"
     
     def marcar_completada(self):
         self.completada = True
@@ -40,4 +206,4 @@ class Tarea:
         if fecha_vencimiento is not None:
             self.fecha_vencimiento = fecha_vencimiento
         if categoria is not None:
-            self.categoria = categoria 
\ No newline at end of file
+            self.categoria = categoria 
@@ -0,0 +1,297 @@
+import json
+import os
+import struct
+import threading
+import zlib
+from contextlib import contextmanager
+from .models import Tarea, Prioridad, entero_a_fecha
+
+"""
+Persistencia: diario de escritura anticipada (write-ahead journal) con instantáneas
+-----------------------------------------------------------------------------------
+Cada cambio en las tareas o categorías se agrega al final de un archivo de diario.
+Es conveniente porque:
+1. Agregar al final de un archivo es la escritura más barata y segura que existe.
+2. Los registros se acumulan y se confirman en grupo (un solo write + fsync por lote),
+   así el costo de fsync se reparte entre muchas operaciones.
+3. Cada cierto número de registros el diario se compacta en una instantánea del estado
+   completo; al iniciar solo se carga la instantánea y se reproduce la cola del diario,
+   de modo que el tiempo de arranque no crece con la longitud del historial.
+4. Cada registro lleva su longitud y un CRC32: si el proceso se interrumpe a mitad de
+   una escritura, el registro incompleto se detecta y se descarta al recuperar.
+5. Los cambios de una misma operación del gestor (agregar una tarea y ubicarla en su
+   categoría, los campos de una actualización, una transacción) se escriben como un
+   único registro "grupo": al recuperar se aplican todos o ninguno.
+
+Formato de cada registro del diario: longitud (uint32) + crc32 (uint32) + JSON en UTF-8.
+"""
+
+_ENCABEZADO = struct.Struct("<II")
+
+class Persistencia:
+    ARCHIVO_DIARIO = "diario.log"
+    ARCHIVO_INSTANTANEA = "instantanea.json"
+
+    def __init__(self, directorio, tamano_lote=64, intervalo=0.05, compactar_cada=10000):
+        """
+        Args:
+            directorio: Carpeta donde se guardan el diario y la instantánea
+            tamano_lote: Registros acumulados que fuerzan una confirmación en grupo
+            intervalo: Segundos máximos que un registro puede esperar antes de confirmarse
+            compactar_cada: Registros del diario tras los cuales se genera una nueva instantánea
+        """
+        self.directorio = directorio
+        self.tamano_lote = tamano_lote
+        self.intervalo = intervalo
+        self.compactar_cada = compactar_cada
+
+        os.makedirs(directorio, exist_ok=True)
+        self._ruta_diario = os.path.join(directorio, self.ARCHIVO_DIARIO)
+        self._ruta_instantanea = os.path.join(directorio, self.ARCHIVO_INSTANTANEA)
+
+        self._gestor = None
+        self._secuencia = 0            # Número del último registro generado
+        self._registros_en_diario = 0  # Registros desde la última instantánea
+        self._pendientes = []          # Registros codificados aún sin confirmar
+        self._temporizador = None
+        self._cerrojo = threading.RLock()
+        self._archivo = None
+        self._grupo = None             # Registros de la operación en curso (ver agrupar())
+
+    def adjuntar(self, gestor):
+        """
+        Restaura el estado guardado en el gestor (instantánea + cola del diario)
+        y a partir de ese momento registra todos sus cambios.
+
+        Returns:
+            Cantidad de registros del diario reproducidos
+        """
+        self._gestor = gestor
+        self._cargar_instantanea(gestor)
+        reproducidos = self._reproducir_diario(gestor)
+
+        self._archivo = open(self._ruta_diario, "ab")
+        gestor.lista_tareas.suscribir(self._cambio_en_lista)
+        return reproducidos
+
+    def _cargar_instantanea(self, gestor):
+        if not os.path.exists(self._ruta_instantanea):
+            return
+        with open(self._ruta_instantanea, "r", encoding="utf-8") as archivo:
+            estado = json.load(archivo)
+
+        self._secuencia = estado["secuencia"]
+        for ruta in estado["categorias"]:
+            gestor.arbol_categorias.agregar_categoria(ruta)
+        for datos in estado["tareas"]:
+            self._aplicar(gestor, {"op": "agregar", "tarea": datos})
+
+    def _leer_registros(self):
+        """Devuelve los registros válidos del diario y la posición donde termina el último"""
+        registros = []
+        valido_hasta = 0
+        if not os.path.exists(self._ruta_diario):
+            return registros, valido_hasta
+
+        with open(self._ruta_diario, "rb") as archivo:
+            datos = archivo.read()
+
+        posicion = 0
+        while posicion + _ENCABEZADO.size <= len(datos):
+            longitud, crc = _ENCABEZADO.unpack_from(datos, posicion)
+            inicio = posicion + _ENCABEZADO.size
+            carga = datos[inicio:inicio + longitud]
+            if len(carga) < longitud or zlib.crc32(carga) != crc:
+                break  # Registro cortado o dañado: se descarta desde aquí
+            registros.append(json.loads(carga.decode("utf-8")))
+            posicion = inicio + longitud
+            valido_hasta = posicion
+        return registros, valido_hasta
+
+    def _reproducir_diario(self, gestor):
+        registros, valido_hasta = self._leer_registros()
+
+        # Si el último registro quedó a medias se recorta el archivo para
+        # que los registros nuevos no queden detrás de basura
+        if os.path.exists(self._ruta_diario) and os.path.getsize(self._ruta_diario) > valido_hasta:
+            with open(self._ruta_diario, "r+b") as archivo:
+                archivo.truncate(valido_hasta)
+
+        reproducidos = 0
+        for registro in registros:
+            self._registros_en_diario += 1
+            if registro["s"] <= self._secuencia:
+                continue  # Ya incluido en la instantánea
+            self._aplicar(gestor, registro)
+            self._secuencia = registro["s"]
+            reproducidos += 1
+        return reproducidos
+
+    def _aplicar(self, gestor, registro):
+        """Aplica un registro directamente a las estructuras, sin pasar por el historial"""
+        operacion = registro["op"]
+        lista = gestor.lista_tareas
+        arbol = gestor.arbol_categorias
+
+        if operacion == "grupo":
+            for subregistro in registro["registros"]:
+                self._aplicar(gestor, subregistro)
+
+        elif operacion == "categoria":
+            arbol.agregar_categoria(registro["ruta"])
+
+        elif operacion == "agregar":
+            tarea = Tarea.desde_diccionario(registro["tarea"])
+            lista.agregar_tarea(tarea)
+            if tarea.categoria:
+                nodo = arbol.agregar_categoria(tarea.categoria)
+                nodo.agregar_tarea(tarea)
+
+        elif operacion == "eliminar":
+            tarea = lista.eliminar_tarea(registro["id"])
+            if tarea and tarea.categoria:
+                nodo = arbol.buscar_categoria(tarea.categoria)
+                if nodo:
+                    nodo.eliminar_tarea(tarea)
+
+        elif operacion == "modificar":
+            tarea = lista.obtener_tarea(registro["id"])
+            if not tarea:
+                return
+            campo, valor = registro["campo"], registro["valor"]
+            if campo == "categoria":
+                if tarea.categoria:
+                    nodo = arbol.buscar_categoria(tarea.categoria)
+                    if nodo:
+                        nodo.eliminar_tarea(tarea)
+                if valor:
+                    arbol.agregar_categoria(valor).agregar_tarea(tarea)
+                tarea.categoria = valor
+            elif campo == "prioridad":
+                tarea.prioridad = Prioridad(valor)
+            elif campo == "fecha_vencimiento":
+                tarea.fecha_vencimiento = entero_a_fecha(valor)
+            else:
+                setattr(tarea, campo, valor)
+
+    def _cambio_en_lista(self, evento, tarea, campo, valor_anterior):
+        if evento == "agregada":
+            self.registrar("agregar", tarea=tarea.a_diccionario())
+        elif evento == "eliminada":
+            self.registrar("eliminar", id=tarea.id)
+        elif evento == "modificada":
+            valor = tarea.a_diccionario()[_CAMPOS_SERIALIZADOS.get(campo, campo)]
+            self.registrar("modificar", id=tarea.id, campo=campo, valor=valor)
+
+    def categoria_agregada(self, ruta):
+        self.registrar("categoria", ruta=ruta)
+
+    @contextmanager
+    def agrupar(self):
+        """
+        Para usar con with: los registros generados dentro del bloque se escriben como un
+        solo registro del diario, que al recuperar se aplica completo o se descarta
+        completo. Los bloques anidados forman parte del exterior.
+        """
+        if self._grupo is not None:
+            yield
+            return
+        self._grupo = []
+        try:
+            yield
+        finally:
+            grupo, self._grupo = self._grupo, None
+            if len(grupo) == 1:
+                self._agregar_registro(grupo[0])
+            elif grupo:
+                self._agregar_registro({"op": "grupo", "registros": grupo})
+
+    def registrar(self, operacion, **datos):
+        """Agrega un registro al lote pendiente; se confirma en grupo"""
+        datos["op"] = operacion
+        if self._grupo is not None:
+            self._grupo.append(datos)  # Se escribe al terminar la operación
+            return
+        self._agregar_registro(datos)
+
+    def _agregar_registro(self, datos):
+        with self._cerrojo:
+            self._secuencia += 1
+            datos["s"] = self._secuencia
+            carga = json.dumps(datos, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            self._pendientes.append(_ENCABEZADO.pack(len(carga), zlib.crc32(carga)) + carga)
+
+            if self._registros_en_diario + len(self._pendientes) >= self.compactar_cada:
+                # La compactación recorre el gestor, así que se hace en el hilo que
+                # lo modifica y nunca desde el temporizador
+                self.compactar()
+            elif len(self._pendientes) >= self.tamano_lote:
+                self.sincronizar()
+            elif self._temporizador is None:
+                # El primer registro del lote programa la confirmación diferida
+                self._temporizador = threading.Timer(self.intervalo, self.sincronizar)
+                self._temporizador.daemon = True
+                self._temporizador.start()
+
+    def sincronizar(self):
+        """Escribe y confirma en disco (fsync) todos los registros pendientes en una sola operación"""
+        with self._cerrojo:
+            if self._temporizador is not None:
+                self._temporizador.cancel()
+                self._temporizador = None
+            if not self._pendientes or self._archivo is None:
+                return
+
+            self._archivo.write(b"".join(self._pendientes))
+            self._archivo.flush()
+            os.fsync(self._archivo.fileno())
+            self._registros_en_diario += len(self._pendientes)
+            self._pendientes.clear()
+
+    def compactar(self):
+        """Guarda una instantánea del estado completo y vacía el diario"""
+        with self._cerrojo:
+            if self._gestor is None:
+                return
+            # Los registros pendientes quedan cubiertos por la instantánea
+            self._pendientes.clear()
+            if self._temporizador is not None:
+                self._temporizador.cancel()
+                self._temporizador = None
+
+            estado = {
+                "version": 1,
+                "secuencia": self._secuencia,
+                "categorias": [ruta for ruta, _, _ in self._gestor.obtener_todas_categorias()],
+                "tareas": [tarea.a_diccionario() for tarea in self._gestor.lista_tareas],
+            }
+
+            # Escritura atómica: archivo temporal + fsync + rename
+            temporal = self._ruta_instantanea + ".tmp"
+            with open(temporal, "w", encoding="utf-8") as archivo:
+                json.dump(estado, archivo, ensure_ascii=False, separators=(",", ":"))
+                archivo.flush()
+                os.fsync(archivo.fileno())
+            os.replace(temporal, self._ruta_instantanea)
+
+            # Solo después de que la instantánea es durable se vacía el diario. Si el
+            # proceso cae entre ambos pasos, los registros sobrantes se ignoran al cargar
+            # porque su número de secuencia ya está incluido en la instantánea.
+            self._archivo.truncate(0)
+            self._archivo.seek(0)
+            self._archivo.flush()
+            os.fsync(self._archivo.fileno())
+            self._registros_en_diario = 0
+
+    def cerrar(self):
+        with self._cerrojo:
+            self.sincronizar()
+            if self._archivo is not None:
+                self._archivo.close()
+                self._archivo = None
+            if self._gestor is not None:
+                self._gestor.lista_tareas.desuscribir(self._cambio_en_lista)
+
+
+# Campos cuyo valor se guarda con otro nombre en a_diccionario()
+_CAMPOS_SERIALIZADOS = {"fecha_vencimiento": "vencimiento"}
@@ -0,0 +1,578 @@
+import asyncio
+import json
+import logging
+import re
+import signal
+import threading
+from contextlib import nullcontext
+from datetime import datetime
+from urllib.parse import urlsplit, parse_qsl
+from .models import Prioridad
+
+"""
+Servidor HTTP/JSON para el gestor de tareas
+-------------------------------------------
+Permite manejar un GestorTareas desde otras herramientas (python main.py --serve). Usa
+solo asyncio: un único hilo atiende todas las conexiones y es el único que toca el
+gestor, así cada solicitud ve y deja el gestor en un estado coherente sin cerrojos.
+1. Las conexiones son persistentes (HTTP/1.1 keep-alive) y admiten pipelining: el
+   cliente puede enviar varias solicitudes sin esperar las respuestas; se atienden en
+   orden y las respuestas de las que llegaron juntas se escriben juntas, en el mismo orden.
+2. /tareas/lote aplica muchas altas, cambios y bajas en una sola transacción del gestor:
+   los índices y los suscriptores se actualizan una vez y el lote se deshace de una vez.
+3. Los listados se envían como un arreglo JSON en bloques (Transfer-Encoding: chunked):
+   se toma la lista de tareas del resultado y se serializa de a TAMANO_BLOQUE, cediendo
+   el hilo entre bloques para que las demás conexiones no esperen a que termine. Cada
+   tarea se envía con los valores que tiene al serializar su bloque.
+
+Rutas (cuerpos y respuestas en JSON; las tareas usan el formato de tarea_a_json):
+    GET    /tareas                  Consulta (parámetros de ConsultaTareas: categoria, prioridad,
+                                    completada, desde, hasta, texto, orden, limite)
+    POST   /tareas                  Crear una tarea
+    GET    /tareas/{id}             Una tarea
+    PATCH  /tareas/{id}             Cambiar campos de una tarea
+    DELETE /tareas/{id}             Eliminar una tarea
+    POST   /tareas/lote             {"crear": [...], "actualizar": [{"id": ..., ...}], "eliminar": [ids]}
+    GET    /categorias              Árbol de categorías en preorden, con sus totales
+    POST   /categorias              {"ruta": "Trabajo/Proyecto"}
+    GET    /estadisticas            Totales (de una categoría con ?categoria=)
+    GET    /urgentes                Próximas tareas de la cola de urgentes (?limite=)
+    POST   /urgentes/procesar       Completar la siguiente tarea urgente
+    POST   /deshacer, /rehacer      Deshacer o rehacer la última acción
+"""
+
+logger = logging.getLogger(__name__)
+
+TAMANO_BLOQUE = 500            # Tareas por bloque de un listado
+MAXIMO_CABECERA = 64 * 1024
+MAXIMO_CUERPO = 16 * 1024 * 1024
+
+_RAZONES = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 431: "Request Header Fields Too Large", 500: "Internal Server Error",
+            501: "Not Implemented"}
+
+
+class ErrorSolicitud(Exception):
+    """Error que se responde al cliente con su código de estado"""
+    def __init__(self, estado, mensaje):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+class Listado:
+    """Respuesta que se envía como arreglo JSON en bloques"""
+    def __init__(self, tareas):
+        self.tareas = tareas
+
+
+def tarea_a_json(tarea):
+    vencimiento = tarea.fecha_vencimiento
+    return {
+        'id': tarea.id,
+        'titulo': tarea.titulo,
+        'descripcion': tarea.descripcion,
+        'prioridad': tarea.prioridad.name,
+        'vencimiento': vencimiento.isoformat() if vencimiento is not None else None,
+        'categoria': tarea.categoria,
+        'completada': tarea.completada,
+    }
+
+
+def _leer_prioridad(valor):
+    """'ALTA', 'alta' o 3 -> Prioridad.ALTA"""
+    try:
+        if isinstance(valor, str) and not valor.isdigit():
+            return Prioridad[valor.upper()]
+        return Prioridad(int(valor))
+    except (KeyError, TypeError, ValueError):
+        raise ErrorSolicitud(400, f"Prioridad inválida: {valor!r}")
+
+
+def _leer_fecha(valor):
+    if valor is None or valor == "":
+        return None
+    try:
+        return datetime.fromisoformat(valor)
+    except (TypeError, ValueError):
+        raise ErrorSolicitud(400, f"Fecha inválida (se espera ISO 8601): {valor!r}")
+
+
+def _leer_texto(valor, nombre, admite_nulo=False):
+    if isinstance(valor, str) or (admite_nulo and valor is None):
+        return valor
+    raise ErrorSolicitud(400, f"'{nombre}' debe ser texto")
+
+
+def _leer_booleano(valor):
+    if isinstance(valor, bool):
+        return valor
+    if str(valor).lower() in ("1", "true", "si", "sí"):
+        return True
+    if str(valor).lower() in ("0", "false", "no"):
+        return False
+    raise ErrorSolicitud(400, f"Valor booleano inválido: {valor!r}")
+
+
+def _leer_entero(valor, nombre):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        raise ErrorSolicitud(400, f"'{nombre}' debe ser un entero")
+
+
+def _codificar(datos):
+    return json.dumps(datos, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class ServidorTareas:
+    def __init__(self, gestor, host="127.0.0.1", puerto=8765):
+        """
+        Args:
+            gestor: GestorTareas compartido por todas las conexiones
+            host, puerto: Dirección de escucha (puerto 0 = elegir uno libre)
+        """
+        self.gestor = gestor
+        self.host = host
+        self.puerto = puerto
+        self._servidor = None
+        self._rutas = [
+            ("GET", re.compile(r"/tareas"), self._listar_tareas),
+            ("POST", re.compile(r"/tareas"), self._crear_tarea),
+            ("POST", re.compile(r"/tareas/lote"), self._lote),
+            ("GET", re.compile(r"/tareas/(\d+)"), self._obtener_tarea),
+            ("PATCH", re.compile(r"/tareas/(\d+)"), self._actualizar_tarea),
+            ("DELETE", re.compile(r"/tareas/(\d+)"), self._eliminar_tarea),
+            ("GET", re.compile(r"/categorias"), self._listar_categorias),
+            ("POST", re.compile(r"/categorias"), self._crear_categoria),
+            ("GET", re.compile(r"/estadisticas"), self._estadisticas),
+            ("GET", re.compile(r"/urgentes"), self._listar_urgentes),
+            ("POST", re.compile(r"/urgentes/procesar"), self._procesar_urgente),
+            ("POST", re.compile(r"/deshacer"), self._deshacer),
+            ("POST", re.compile(r"/rehacer"), self._rehacer),
+        ]
+
+    async def iniciar(self):
+        """Empieza a escuchar; devuelve el puerto (útil con puerto=0)"""
+        bucle = asyncio.get_running_loop()
+        self._servidor = await bucle.create_server(lambda: _ConexionHTTP(self), self.host, self.puerto)
+        self.puerto = self._servidor.sockets[0].getsockname()[1]
+        return self.puerto
+
+    async def detener(self):
+        if self._servidor is not None:
+            self._servidor.close()
+            await self._servidor.wait_closed()
+            self._servidor = None
+
+    async def servir_siempre(self):
+        await self.iniciar()
+        logger.info("Servidor escuchando en http://%s:%s", self.host, self.puerto)
+        tarea = asyncio.current_task()
+        try:
+            # SIGTERM (kill) detiene el servidor igual que Ctrl+C, cerrando el gestor
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, tarea.cancel)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows o fuera del hilo principal
+        async with self._servidor:
+            try:
+                await self._servidor.serve_forever()
+            except asyncio.CancelledError:
+                pass
+
+    def _resolver(self, metodo, objetivo, cuerpo):
+        """Ejecuta una solicitud; devuelve (estado, datos o Listado)"""
+        partes = urlsplit(objetivo)
+        consulta = dict(parse_qsl(partes.query))
+        try:
+            manejador, argumentos = self._buscar_ruta(metodo, partes.path.rstrip("/") or "/")
+            datos = json.loads(cuerpo) if cuerpo else None
+            return manejador(consulta, datos, *argumentos)
+        except ErrorSolicitud as e:
+            return e.estado, {'error': str(e)}
+        except json.JSONDecodeError as e:
+            return 400, {'error': f"JSON inválido: {e}"}
+        except (ValueError, TypeError) as e:
+            # Errores de validación del gestor (campo desconocido, orden inválido, ...)
+            return 400, {'error': str(e)}
+        except Exception:
+            logger.exception("Error al atender %s %s", metodo, objetivo)
+            return 500, {'error': "Error interno"}
+
+    def _buscar_ruta(self, metodo, ruta):
+        encontrada = False
+        for metodo_ruta, patron, manejador in self._rutas:
+            coincidencia = patron.fullmatch(ruta)
+            if coincidencia is None:
+                continue
+            encontrada = True
+            if metodo_ruta == metodo:
+                return manejador, [int(grupo) for grupo in coincidencia.groups()]
+        if encontrada:
+            raise ErrorSolicitud(405, f"Método {metodo} no admitido en {ruta}")
+        raise ErrorSolicitud(404, f"Ruta desconocida: {ruta}")
+
+    # --- Manejadores: manejador(consulta, cuerpo, *argumentos de la ruta) -> (estado, datos) ---
+
+    def _tarea_o_404(self, tarea_id):
+        tarea = self.gestor.lista_tareas.obtener_tarea(tarea_id)
+        if tarea is None:
+            raise ErrorSolicitud(404, f"No existe la tarea {tarea_id}")
+        return tarea
+
+    def _listar_tareas(self, consulta, cuerpo):
+        criterios = {}
+        if consulta.get("categoria"):
+            criterios['ruta_categoria'] = consulta["categoria"]
+        if consulta.get("prioridad"):
+            criterios['prioridades'] = {_leer_prioridad(p) for p in consulta["prioridad"].split(",")}
+        if "completada" in consulta:
+            criterios['completada'] = _leer_booleano(consulta["completada"])
+        for campo in ("desde", "hasta"):
+            if consulta.get(campo):
+                criterios[campo] = _leer_fecha(consulta[campo])
+        if consulta.get("texto"):
+            criterios['texto'] = consulta["texto"]
+        if consulta.get("orden"):
+            criterios['orden'] = consulta["orden"]
+        if consulta.get("limite"):
+            criterios['limite'] = _leer_entero(consulta["limite"], "limite")
+        return 200, Listado(self.gestor.consultar(**criterios))
+
+    def _valores_tarea(self, datos, parcial):
+        """Convierte el JSON de una tarea en argumentos del gestor"""
+        if not isinstance(datos, dict):
+            raise ErrorSolicitud(400, "Se espera un objeto JSON con los campos de la tarea")
+        valores = {}
+        for campo, valor in datos.items():
+            if campo == 'id':
+                continue
+            if campo == 'prioridad':
+                valor = _leer_prioridad(valor)
+            elif campo == 'vencimiento':
+                campo, valor = 'fecha_vencimiento', _leer_fecha(valor)
+            elif campo == 'completada':
+                valor = _leer_booleano(valor)
+            elif campo == 'categoria':
+                valor = _leer_texto(valor, campo, admite_nulo=True)  # null quita la categoría
+            elif campo in ('titulo', 'descripcion'):
+                valor = _leer_texto(valor, campo)
+            else:
+                raise ErrorSolicitud(400, f"Campo de tarea desconocido: '{campo}'")
+            valores[campo] = valor
+        if not parcial and not valores.get('titulo'):
+            raise ErrorSolicitud(400, "La tarea necesita un 'titulo'")
+        return valores
+
+    def _crear(self, datos):
+        valores = self._valores_tarea(datos, parcial=False)
+        categoria = valores.get('categoria')
+        if categoria:
+            self.gestor.agregar_categoria(categoria)
+        tarea = self.gestor.crear_tarea(valores['titulo'], valores.get('descripcion', ""),
+                                        valores.get('prioridad', Prioridad.MEDIA),
+                                        valores.get('fecha_vencimiento'), categoria)
+        if valores.get('completada'):
+            self.gestor.completar_tarea(tarea.id)
+        return tarea
+
+    def _crear_tarea(self, consulta, cuerpo):
+        # Crear una tarea ya completada son dos operaciones: se agrupan para deshacerlas juntas
+        completada = isinstance(cuerpo, dict) and cuerpo.get('completada')
+        with (self.gestor.transaccion(f"Crear '{cuerpo.get('titulo')}'") if completada else nullcontext()):
+            tarea = self._crear(cuerpo)
+        return 201, tarea_a_json(tarea)
+
+    def _obtener_tarea(self, consulta, cuerpo, tarea_id):
+        return 200, tarea_a_json(self._tarea_o_404(tarea_id))
+
+    def _actualizar_tarea(self, consulta, cuerpo, tarea_id):
+        self._tarea_o_404(tarea_id)
+        valores = self._valores_tarea(cuerpo, parcial=True)
+        if valores.get('categoria'):
+            self.gestor.agregar_categoria(valores['categoria'])
+        elif 'categoria' in valores:
+            valores['categoria'] = ""  # null o "" quitan la categoría
+        return 200, tarea_a_json(self.gestor.actualizar_tarea(tarea_id, **valores))
+
+    def _eliminar_tarea(self, consulta, cuerpo, tarea_id):
+        self._tarea_o_404(tarea_id)
+        self.gestor.eliminar_tarea(tarea_id)
+        return 200, {'eliminada': tarea_id}
+
+    def _lote(self, consulta, cuerpo):
+        if not isinstance(cuerpo, dict):
+            raise ErrorSolicitud(400, "Se espera un objeto JSON con 'crear', 'actualizar' y/o 'eliminar'")
+        desconocidas = set(cuerpo) - {'crear', 'actualizar', 'eliminar', 'descripcion'}
+        if desconocidas:
+            raise ErrorSolicitud(400, f"Operaciones de lote desconocidas: {', '.join(sorted(desconocidas))}")
+        crear = cuerpo.get('crear') or []
+        actualizar = cuerpo.get('actualizar') or []
+        eliminar = cuerpo.get('eliminar') or []
+
+        # Validar todo antes de modificar: un lote inválido no deja cambios a medias
+        cambios = []
+        for datos in actualizar:
+            if not isinstance(datos, dict) or 'id' not in datos:
+                raise ErrorSolicitud(400, "Cada elemento de 'actualizar' necesita un 'id'")
+            tarea_id = _leer_entero(datos['id'], "id")
+            self._tarea_o_404(tarea_id)
+            cambios.append((tarea_id, self._valores_tarea(datos, parcial=True)))
+        for datos in crear:
+            self._valores_tarea(datos, parcial=False)
+        ids_eliminar = [_leer_entero(tarea_id, "id") for tarea_id in eliminar]
+
+        descripcion = (_leer_texto(cuerpo.get('descripcion'), 'descripcion', admite_nulo=True)
+                       or f"Lote de la API ({len(crear) + len(actualizar) + len(eliminar)})")
+        with self.gestor.transaccion(descripcion):
+            creadas = [self._crear(datos) for datos in crear]
+            for tarea_id, valores in cambios:
+                if valores.get('categoria'):
+                    self.gestor.agregar_categoria(valores['categoria'])
+                elif 'categoria' in valores:
+                    valores['categoria'] = ""
+                self.gestor.actualizar_tarea(tarea_id, **valores)
+            eliminadas = sum(1 for tarea_id in ids_eliminar if self.gestor.eliminar_tarea(tarea_id) is not None)
+        return 200, {
+            'creadas': [tarea_a_json(tarea) for tarea in creadas],
+            'actualizadas': len(cambios),
+            'eliminadas': eliminadas,
+        }
+
+    def _listar_categorias(self, consulta, cuerpo):
+        categorias = []
+        for ruta, nodo, profundidad in self.gestor.obtener_todas_categorias():
+            estadisticas = self.gestor.obtener_estadisticas_categoria(ruta)
+            categorias.append({'ruta': ruta, 'profundidad': profundidad,
+                               'total': estadisticas['total'], 'pendientes': estadisticas['pendientes']})
+        return 200, categorias
+
+    def _crear_categoria(self, consulta, cuerpo):
+        ruta = cuerpo.get('ruta') if isinstance(cuerpo, dict) else None
+        if not ruta or not isinstance(ruta, str):
+            raise ErrorSolicitud(400, "Se espera {\"ruta\": \"Categoría/Subcategoría\"}")
+        nodo = self.gestor.agregar_categoria(ruta)
+        return 201, {'ruta': nodo.ruta}
+
+    def _estadisticas(self, consulta, cuerpo):
+        estadisticas = self.gestor.obtener_estadisticas_categoria(consulta.get("categoria"))
+        if estadisticas is None:
+            raise ErrorSolicitud(404, f"No existe la categoría {consulta.get('categoria')}")
+        estadisticas = dict(estadisticas)
+        estadisticas['por_prioridad'] = {prioridad.name: cantidad
+                                         for prioridad, cantidad in estadisticas['por_prioridad'].items()}
+        estadisticas.update(self.gestor.resumen_vencimientos(consulta.get("categoria")))
+        return 200, estadisticas
+
+    def _listar_urgentes(self, consulta, cuerpo):
+        limite = _leer_entero(consulta.get("limite", 50), "limite")
+        return 200, Listado(self.gestor.cola_urgentes.primeras(limite))
+
+    def _procesar_urgente(self, consulta, cuerpo):
+        tarea = self.gestor.procesar_siguiente_urgente()
+        if tarea is not None:
+            # Procesar es completar: queda en el historial como cualquier otro cambio
+            self.gestor.completar_tarea(tarea.id)
+        return 200, {'tarea': tarea_a_json(tarea) if tarea is not None else None}
+
+    def _deshacer(self, consulta, cuerpo):
+        return 200, {'hecho': self.gestor.deshacer()}
+
+    def _rehacer(self, consulta, cuerpo):
+        return 200, {'hecho': self.gestor.rehacer()}
+
+
+def _cabecera(estado, mantener, extra):
+    cabecera = (f"HTTP/1.1 {estado} {_RAZONES.get(estado, '')}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n{extra}")
+    if not mantener:
+        cabecera += "Connection: close\r\n"
+    return (cabecera + "\r\n").encode("latin-1")
+
+
+def _respuesta(estado, datos, mantener):
+    cuerpo = _codificar(datos)
+    return _cabecera(estado, mantener, f"Content-Length: {len(cuerpo)}\r\n") + cuerpo
+
+
+class _ConexionHTTP(asyncio.Protocol):
+    """
+    Una conexión con un cliente. Las solicitudes completas que ya están en el búfer se
+    atienden de corrido y sus respuestas se escriben juntas: con pipelining, un paquete
+    con varias solicitudes recibe un solo envío en lugar de uno por respuesta.
+    """
+    def __init__(self, servidor):
+        self.servidor = servidor
+        self.transporte = None
+        self.entrada = bytearray()
+        self.ocupada = False          # Enviando un listado: las solicitudes siguientes esperan
+        self.cerrando = False
+        self.puede_escribir = asyncio.Event()
+        self.puede_escribir.set()
+
+    def connection_made(self, transporte):
+        self.transporte = transporte
+
+    def connection_lost(self, excepcion):
+        self.transporte = None
+        self.puede_escribir.set()     # Despierta a un listado en curso para que termine
+
+    def pause_writing(self):
+        self.puede_escribir.clear()
+
+    def resume_writing(self):
+        self.puede_escribir.set()
+
+    def data_received(self, datos):
+        self.entrada += datos
+        if not self.ocupada:
+            self._atender()
+        elif len(self.entrada) > MAXIMO_CUERPO:
+            # El cliente envía más rápido de lo que se le responde
+            self.transporte.pause_reading()
+
+    def _atender(self):
+        """Atiende las solicitudes completas del búfer, en orden"""
+        salida = []
+        while not self.cerrando:
+            try:
+                solicitud = self._extraer_solicitud()
+            except ErrorSolicitud as e:
+                salida.append(_respuesta(e.estado, {'error': str(e)}, False))
+                self.cerrando = True
+                break
+            if solicitud is None:
+                break
+            metodo, objetivo, cuerpo, mantener = solicitud
+            estado, datos = self.servidor._resolver(metodo, objetivo, cuerpo)
+            self.cerrando = not mantener
+            if isinstance(datos, Listado):
+                self._escribir(salida)
+                self.ocupada = True
+                asyncio.ensure_future(self._enviar_listado(estado, datos.tareas, mantener))
+                return
+            salida.append(_respuesta(estado, datos, mantener))
+        self._escribir(salida)
+        if self.cerrando and self.transporte is not None:
+            self.transporte.close()
+
+    def _escribir(self, salida):
+        if salida and self.transporte is not None:
+            self.transporte.write(b"".join(salida))
+            salida.clear()
+
+    def _extraer_solicitud(self):
+        """
+        Returns:
+            tuple: (metodo, objetivo, cuerpo, mantener) y la quita del búfer, o None si
+            la solicitud todavía no llegó completa
+        """
+        fin = self.entrada.find(b"\r\n\r\n")
+        if fin < 0:
+            if len(self.entrada) > MAXIMO_CABECERA:
+                raise ErrorSolicitud(431, "Cabeceras demasiado grandes")
+            return None
+
+        lineas = self.entrada[:fin].decode("latin-1").split("\r\n")
+        try:
+            metodo, objetivo, version = lineas[0].split(" ", 2)
+        except ValueError:
+            raise ErrorSolicitud(400, "Línea de solicitud inválida")
+        cabeceras = {}
+        for linea in lineas[1:]:
+            nombre, _, valor = linea.partition(":")
+            if nombre:
+                cabeceras[nombre.strip().lower()] = valor.strip()
+        conexion = cabeceras.get("connection", "").lower()
+        mantener = conexion != "close" if version == "HTTP/1.1" else conexion == "keep-alive"
+
+        if "transfer-encoding" in cabeceras:
+            raise ErrorSolicitud(501, "Cuerpos en bloques no admitidos")
+        try:
+            largo = int(cabeceras.get("content-length") or 0)
+        except ValueError:
+            raise ErrorSolicitud(400, "Content-Length inválido")
+        if largo < 0:
+            raise ErrorSolicitud(400, "Content-Length inválido")
+        if largo > MAXIMO_CUERPO:
+            raise ErrorSolicitud(413, "Cuerpo demasiado grande")
+
+        total = fin + 4 + largo
+        if len(self.entrada) < total:
+            return None
+        cuerpo = bytes(self.entrada[fin + 4:total])
+        del self.entrada[:total]
+        return metodo, objetivo, cuerpo, mantener
+
+    async def _enviar_listado(self, estado, tareas, mantener):
+        try:
+            self.transporte.write(_cabecera(estado, mantener, "Transfer-Encoding: chunked\r\n"))
+            separador = b"["
+            for inicio in range(0, len(tareas), TAMANO_BLOQUE):
+                # Ceder el hilo entre bloques y esperar si el cliente no lee
+                await asyncio.sleep(0)
+                await self.puede_escribir.wait()
+                if self.transporte is None:
+                    return
+                bloque = b",".join(_codificar(tarea_a_json(tarea)) for tarea in tareas[inicio:inicio + TAMANO_BLOQUE])
+                datos = separador + bloque
+                separador = b","
+                self.transporte.write(b"%x\r\n%s\r\n" % (len(datos), datos))
+            cierre = b"]" if separador == b"," else b"[]"
+            self.transporte.write(b"%x\r\n%s\r\n0\r\n\r\n" % (len(cierre), cierre))
+        except Exception:
+            logger.exception("Error al enviar un listado")
+            if self.transporte is not None:
+                self.transporte.abort()
+            return
+        finally:
+            self.ocupada = False
+        if self.transporte is None:
+            return
+        self.transporte.resume_reading()
+        if self.cerrando:
+            self.transporte.close()
+        else:
+            self._atender()
+
+
+def servir(gestor, host="127.0.0.1", puerto=8765):
+    """Atiende solicitudes hasta Ctrl+C y luego cierra el gestor (confirma la persistencia)"""
+    servidor = ServidorTareas(gestor, host, puerto)
+    print(f"Servidor de tareas en http://{host}:{puerto} (Ctrl+C para detener)")
+    try:
+        asyncio.run(servidor.servir_siempre())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        gestor.cerrar()
+    print("Servidor detenido")
+
+
+def iniciar_en_hilo(gestor, host="127.0.0.1", puerto=0):
+    """
+    Inicia el servidor en un hilo aparte con su propio bucle de eventos (para pruebas
+    y para el generador de carga). El gestor solo debe usarse desde ese hilo.
+
+    Returns:
+        (servidor, detener): detener() para el servidor y espera a que termine el hilo
+    """
+    servidor = ServidorTareas(gestor, host, puerto)
+    listo = threading.Event()
+    bucle = asyncio.new_event_loop()
+
+    def ejecutar():
+        asyncio.set_event_loop(bucle)
+        bucle.run_until_complete(servidor.iniciar())
+        listo.set()
+        bucle.run_forever()
+        bucle.run_until_complete(servidor.detener())
+        bucle.close()
+
+    hilo = threading.Thread(target=ejecutar, name="servidor-tareas", daemon=True)
+    hilo.start()
+    listo.wait()
+
+    def detener():
+        bucle.call_soon_threadsafe(bucle.stop)
+        hilo.join()
+    return servidor, detener
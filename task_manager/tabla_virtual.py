@@ -0,0 +1,194 @@
+import tkinter as tk
+from tkinter import ttk
+from .metricas import medido
+
+"""
+Tabla virtual sobre un ttk.Treeview
+-----------------------------------
+El Treeview guarda cada fila como un ítem de Tk, así que insertar decenas de miles de
+tareas cuesta segundos y cada repintado completo vuelve a pagar ese precio. La tabla
+virtual mantiene en el Treeview solo las filas que caben en pantalla:
+1. El contenido se pide a una fuente, fuente(inicio, cantidad) -> filas, solo para la
+   ventana visible; la barra de desplazamiento se maneja con el total de filas y la
+   posición de la ventana, no con los ítems del Treeview.
+2. Cada fila es (iid, valores, etiqueta), donde iid es el id de la tarea. Al repintar
+   se comparan las filas nuevas con las que ya están en pantalla y solo se insertan,
+   modifican, mueven o eliminan las que cambiaron: editar una tarea toca una fila.
+3. Las filas usan etiquetas compartidas (una por prioridad) configuradas una vez, en
+   lugar de una etiqueta por tarea.
+"""
+
+
+def diferencias(anteriores, nuevas):
+    """
+    Operaciones que convierten las filas mostradas en las nuevas.
+
+    Args:
+        anteriores: Lista de (iid, valores, etiqueta) en el orden en que se muestran
+        nuevas: Lista de (iid, valores, etiqueta) en el orden deseado
+
+    Returns:
+        Lista de operaciones, a aplicar en orden:
+            ('eliminar', [iid, ...])
+            ('insertar', indice, iid, valores, etiqueta)
+            ('actualizar', iid, valores, etiqueta)
+            ('mover', indice, iid)
+    """
+    nuevas_por_iid = {iid: (valores, etiqueta) for iid, valores, etiqueta in nuevas}
+    anteriores_por_iid = {iid: (valores, etiqueta) for iid, valores, etiqueta in anteriores}
+    operaciones = []
+
+    eliminadas = [iid for iid, _, _ in anteriores if iid not in nuevas_por_iid]
+    if eliminadas:
+        operaciones.append(('eliminar', eliminadas))
+
+    # Las filas que quedan, en su orden actual. Recorriendo las nuevas en orden, las
+    # posiciones 0..i-1 ya están resueltas y el resto conserva el orden actual (sin las
+    # que se movieron), así que una fila está en su lugar si es la siguiente que queda.
+    quedan = [iid for iid, _, _ in anteriores if iid in nuevas_por_iid]
+    movidas = set()
+    j = 0
+    for indice, (iid, valores, etiqueta) in enumerate(nuevas):
+        anterior = anteriores_por_iid.get(iid)
+        if anterior is None:
+            operaciones.append(('insertar', indice, iid, valores, etiqueta))
+            continue
+        while j < len(quedan) and quedan[j] in movidas:
+            j += 1
+        if j < len(quedan) and quedan[j] == iid:
+            j += 1
+        else:
+            operaciones.append(('mover', indice, iid))
+            movidas.add(iid)
+        if anterior != (valores, etiqueta):
+            operaciones.append(('actualizar', iid, valores, etiqueta))
+    return operaciones
+
+
+class TablaVirtual:
+    def __init__(self, contenedor, columnas, etiquetas=None, alto_fila=20):
+        """
+        Args:
+            contenedor: Widget donde se ubican el Treeview y su barra de desplazamiento
+            columnas: Columnas del Treeview
+            etiquetas: {etiqueta: opciones de tag_configure}, p. ej. {"URGENTE": {"foreground": "red"}}
+            alto_fila: Alto de fila en píxeles, para calcular cuántas filas caben
+        """
+        self.tree = ttk.Treeview(contenedor, columns=columnas, show="headings")
+        self.tree.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
+        self.scrollbar = ttk.Scrollbar(contenedor, orient="vertical", command=self._desplazar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        for etiqueta, opciones in (etiquetas or {}).items():
+            self.tree.tag_configure(etiqueta, **opciones)
+
+        self.alto_fila = alto_fila
+        self.visibles = 1
+        self.inicio = 0
+        self.total = 0
+        self._fuente = lambda inicio, cantidad: []
+        self._filas = []           # Lo que hay ahora en el Treeview, en orden
+        self._seleccionado = None  # iid seleccionado, aunque haya salido de la ventana
+
+        self.tree.bind("<Configure>", self._redimensionar)
+        self.tree.bind("<<TreeviewSelect>>", self._recordar_seleccion, add="+")
+        self.tree.bind("<MouseWheel>", lambda event: self._desplazar_filas(-3 if event.delta > 0 else 3))
+        self.tree.bind("<Button-4>", lambda event: self._desplazar_filas(-3))
+        self.tree.bind("<Button-5>", lambda event: self._desplazar_filas(3))
+        self.tree.bind("<Up>", lambda event: self._mover_foco(-1))
+        self.tree.bind("<Down>", lambda event: self._mover_foco(1))
+        self.tree.bind("<Prior>", lambda event: self._desplazar_filas(-self.visibles) or "break")
+        self.tree.bind("<Next>", lambda event: self._desplazar_filas(self.visibles) or "break")
+
+    def mostrar(self, total, fuente, reiniciar=False):
+        """
+        Cambia el contenido de la tabla y repinta solo lo que cambió.
+
+        Args:
+            total: Cantidad total de filas
+            fuente: Función (inicio, cantidad) -> lista de (iid, valores, etiqueta)
+            reiniciar: Volver al principio (al cambiar de vista); si no, se conserva
+                la posición, como corresponde tras editar una tarea
+        """
+        self.total = total
+        self._fuente = fuente
+        if reiniciar:
+            self.inicio = 0
+        self._pintar()
+
+    def refrescar(self):
+        """Repinta la ventana visible con la misma fuente (p. ej. tras editar una tarea)"""
+        self._pintar()
+
+    def seleccion(self):
+        """iid de la fila seleccionada (o None)"""
+        return self._seleccionado
+
+    @medido("gui.pintar_tabla")
+    def _pintar(self):
+        self.inicio = max(0, min(self.inicio, self.total - self.visibles))
+        filas = self._fuente(self.inicio, self.visibles) if self.total else []
+        for operacion in diferencias(self._filas, filas):
+            tipo = operacion[0]
+            if tipo == 'eliminar':
+                self.tree.delete(*operacion[1])
+            elif tipo == 'insertar':
+                _, indice, iid, valores, etiqueta = operacion
+                self.tree.insert("", indice, iid=iid, values=valores, tags=(etiqueta,))
+            elif tipo == 'actualizar':
+                _, iid, valores, etiqueta = operacion
+                self.tree.item(iid, values=valores, tags=(etiqueta,))
+            else:
+                _, indice, iid = operacion
+                self.tree.move(iid, "", indice)
+        self._filas = filas
+
+        # Volver a marcar la selección si su fila entró en la ventana
+        if self._seleccionado is not None and self.tree.exists(self._seleccionado):
+            if self.tree.selection() != (self._seleccionado,):
+                self.tree.selection_set(self._seleccionado)
+
+        if self.total:
+            self.scrollbar.set(self.inicio / self.total, min(1.0, (self.inicio + self.visibles) / self.total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _redimensionar(self, event):
+        # La fila de encabezados ocupa aproximadamente una fila más
+        visibles = max(1, event.height // self.alto_fila - 1)
+        if visibles != self.visibles:
+            self.visibles = visibles
+            self._pintar()
+
+    def _recordar_seleccion(self, event):
+        seleccion = self.tree.selection()
+        if seleccion:
+            self._seleccionado = seleccion[0]
+
+    def _desplazar_filas(self, filas):
+        inicio = max(0, min(self.inicio + filas, self.total - self.visibles))
+        if inicio != self.inicio:
+            self.inicio = inicio
+            self._pintar()
+
+    def _desplazar(self, accion, cantidad, unidad=None):
+        """Comando de la barra de desplazamiento (mismos argumentos que yview)"""
+        if accion == "moveto":
+            self.inicio = int(float(cantidad) * self.total)
+            self._pintar()
+        elif accion == "scroll":
+            paso = self.visibles if unidad == "pages" else 1
+            self._desplazar_filas(int(cantidad) * paso)
+
+    def _mover_foco(self, paso):
+        """Flechas arriba/abajo: en el borde de la ventana, desplazarla y seguir seleccionando"""
+        foco = self.tree.focus()
+        if not foco or not self._filas:
+            return None
+        indice = self.tree.index(foco) + paso
+        if 0 <= indice < len(self._filas):
+            return None  # El Treeview mueve la selección dentro de la ventana
+        self._desplazar_filas(paso)
+        fila = self._filas[0 if paso < 0 else -1][0]
+        self.tree.focus(fila)
+        self.tree.selection_set(fila)
+        return "break"
@@ -0,0 +1,126 @@
+import logging
+import queue
+import threading
+
+"""
+Consultas en segundo plano para la interfaz gráfica
+---------------------------------------------------
+Tk solo atiende eventos cuando el hilo principal está libre, así que una consulta
+larga dentro de un manejador congela la ventana. El trabajador ejecuta las consultas
+en un hilo aparte y entrega los resultados al hilo de Tk:
+1. Las solicitudes se agrupan (debounce): cada una reprograma un temporizador de Tk y
+   solo la última de una ráfaga de teclas o clics llega a ejecutarse.
+2. Cada solicitud recibe un número de generación; la consulta recibe una función
+   vigente() para abandonar el trabajo en cuanto llega una solicitud más nueva, y los
+   resultados de generaciones viejas se descartan sin mostrarlos.
+3. El hilo de trabajo nunca toca Tk: deja el resultado en una cola que el hilo
+   principal revisa con root.after() mientras hay una consulta en curso.
+
+Las modificaciones se siguen haciendo en el hilo principal. La interfaz usa un gestor
+concurrente y cada consulta retiene su cerrojo de lectura, así una modificación espera a
+que termine la consulta en curso; después la interfaz pide otra y el resultado de la
+anterior, ya viejo, se descarta.
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class TrabajadorConsultas:
+    def __init__(self, root, retraso_ms=150, intervalo_ms=15):
+        """
+        Args:
+            root: Ventana de Tk, para programar los temporizadores
+            retraso_ms: Espera predeterminada antes de ejecutar una solicitud
+            intervalo_ms: Cada cuánto se revisa si hay resultados mientras hay consultas en curso
+        """
+        self.root = root
+        self.retraso_ms = retraso_ms
+        self.intervalo_ms = intervalo_ms
+        self._generacion = 0
+        self._temporizador = None   # Solicitud esperando que termine la ráfaga
+        self._revision = None       # Revisión periódica de resultados
+        self._en_curso = 0          # Consultas enviadas al hilo sin resultado recogido
+        self._condicion = threading.Condition()
+        self._siguiente = None      # Última solicitud enviada que el hilo aún no tomó
+        self._resultados = queue.Queue()
+        self._cerrado = False
+        self._hilo = threading.Thread(target=self._trabajar, name="consultas-gui", daemon=True)
+        self._hilo.start()
+
+    def solicitar(self, consulta, al_terminar, retraso_ms=None):
+        """
+        Programa una consulta; cancela la anterior si todavía no empezó o la deja vieja si ya corre.
+
+        Args:
+            consulta: Función consulta(vigente) que se ejecuta en el hilo de trabajo;
+                vigente() es falso en cuanto hay una solicitud más nueva
+            al_terminar: Función al_terminar(resultado), llamada en el hilo de Tk solo si
+                la solicitud sigue siendo la última
+            retraso_ms: Espera antes de ejecutarla (None = la predeterminada, 0 = enseguida)
+        """
+        self._generacion += 1
+        if self._temporizador is not None:
+            self.root.after_cancel(self._temporizador)
+        retraso = self.retraso_ms if retraso_ms is None else retraso_ms
+        self._temporizador = self.root.after(retraso, self._enviar, self._generacion, consulta, al_terminar)
+
+    def vigente(self, generacion):
+        return generacion == self._generacion and not self._cerrado
+
+    def cerrar(self):
+        self._cerrado = True
+        self._generacion += 1
+        for temporizador in (self._temporizador, self._revision):
+            if temporizador is not None:
+                self.root.after_cancel(temporizador)
+        self._temporizador = self._revision = None
+        with self._condicion:
+            self._siguiente = None
+            self._condicion.notify()
+
+    def _enviar(self, generacion, consulta, al_terminar):
+        self._temporizador = None
+        if not self.vigente(generacion):
+            return
+        with self._condicion:
+            if self._siguiente is not None:
+                self._en_curso -= 1  # La que esperaba ya es vieja: nunca se ejecutará
+            self._siguiente = (generacion, consulta, al_terminar)
+            self._condicion.notify()
+        self._en_curso += 1
+        if self._revision is None:
+            self._revision = self.root.after(self.intervalo_ms, self._recoger)
+
+    def _trabajar(self):
+        while True:
+            with self._condicion:
+                while self._siguiente is None and not self._cerrado:
+                    self._condicion.wait()
+                if self._cerrado:
+                    return
+                generacion, consulta, al_terminar = self._siguiente
+                self._siguiente = None
+            try:
+                resultado = consulta(lambda: self.vigente(generacion))
+                error = None
+            except Exception as e:
+                resultado, error = None, e
+            self._resultados.put((generacion, resultado, error, al_terminar))
+
+    def _recoger(self):
+        """En el hilo de Tk: entrega el resultado vigente y descarta los viejos"""
+        self._revision = None
+        while True:
+            try:
+                generacion, resultado, error, al_terminar = self._resultados.get_nowait()
+            except queue.Empty:
+                break
+            self._en_curso -= 1
+            if not self.vigente(generacion):
+                continue
+            if error is not None:
+                logger.warning("Error en consulta en segundo plano: %s", error)
+                continue
+            al_terminar(resultado)
+        if self._en_curso > 0 and not self._cerrado:
+            self._revision = self.root.after(self.intervalo_ms, self._recoger)
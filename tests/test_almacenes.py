@@ -0,0 +1,248 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from task_manager.almacen_sqlite import AlmacenSQLite
+from task_manager.gestor_tareas import GestorTareas
+from task_manager.models import Prioridad
+
+"""
+Misma batería de pruebas para los dos almacenamientos
+-----------------------------------------------------
+PruebasAlmacen se ejecuta una vez con las estructuras en memoria (ListaTareas y
+ArbolCategorias) y otra con AlmacenSQLite, siempre a través de GestorTareas:
+1. Crear, actualizar, mover de categoría, completar y eliminar dejan la lista, el árbol
+   y sus contadores coherentes entre sí.
+2. Deshacer y rehacer devuelven exactamente el estado anterior y el posterior.
+3. Los resultados de obtener_* y de los recorridos ordenados salen en el mismo orden en
+   los dos almacenamientos (las tareas sin fecha se ordenan según la clave de cada
+   lista: SQLite ubica NULL antes que cualquier fecha).
+"""
+
+BASE = datetime(2025, 1, 15)
+
+
+def titulos(tareas):
+    return [tarea.titulo for tarea in tareas]
+
+
+def foto(gestor):
+    """Estado completo comparable entre almacenamientos (sin ids, que son globales)"""
+    tareas = sorted((t.titulo, t.descripcion, t.prioridad, t.fecha_vencimiento, t.categoria, t.completada)
+                    for t in gestor.lista_tareas)
+    categorias = [(ruta, profundidad, sorted(titulos(nodo.tareas)))
+                  for ruta, nodo, profundidad in gestor.obtener_todas_categorias()]
+    estadisticas = [gestor.obtener_estadisticas_categoria(ruta, BASE)
+                    for ruta in [None] + [ruta for ruta, _, _ in gestor.obtener_todas_categorias()]]
+    return tareas, categorias, estadisticas
+
+
+class PruebasAlmacen:
+    """Pruebas comunes; cada subclase indica el almacenamiento en crear_gestor()"""
+
+    def crear_gestor(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.gestor = self.crear_gestor()
+        self.addCleanup(self.gestor.cerrar)
+        g = self.gestor
+        g.agregar_categoria("Trabajo/Proyecto A")
+        g.agregar_categoria("Trabajo/Proyecto B")
+        g.agregar_categoria("Personal/Salud")
+        self.informe = g.crear_tarea("Informe", "Mensual", Prioridad.ALTA, BASE + timedelta(days=3), "Trabajo/Proyecto A")
+        self.revision = g.crear_tarea("Revisión", "", Prioridad.URGENTE, BASE - timedelta(days=1), "Trabajo/Proyecto A")
+        self.medico = g.crear_tarea("Médico", "", Prioridad.MEDIA, BASE + timedelta(days=1), "Personal/Salud")
+        self.compras = g.crear_tarea("Compras", "", Prioridad.BAJA, BASE + timedelta(days=2), "Personal")
+        self.reunion = g.crear_tarea("Reunión", "", Prioridad.ALTA, BASE + timedelta(days=3), "Trabajo")
+        self.libre = g.crear_tarea("Sin categoría", "", Prioridad.MEDIA, BASE + timedelta(days=5))
+
+    def comprobar_coherencia(self):
+        """La lista, el árbol y los contadores dicen lo mismo"""
+        g = self.gestor
+        for ruta, nodo, _ in g.obtener_todas_categorias():
+            for tarea in nodo.tareas:
+                self.assertEqual(tarea.categoria, ruta)
+            esperadas = sorted(t.id for t in g.lista_tareas
+                               if t.categoria and (t.categoria == ruta or t.categoria.startswith(ruta + "/")))
+            self.assertEqual(sorted(t.id for t in g.arbol_categorias.obtener_todas_tareas_categoria(ruta)),
+                             esperadas, ruta)
+            estadisticas = g.obtener_estadisticas_categoria(ruta, BASE)
+            self.assertEqual(estadisticas['total'], len(esperadas), ruta)
+            pendientes = [g.lista_tareas.obtener_tarea(i) for i in esperadas]
+            pendientes = [t for t in pendientes if not t.completada]
+            self.assertEqual(estadisticas['pendientes'], len(pendientes), ruta)
+            self.assertEqual(estadisticas['vencidas'],
+                             sum(t.fecha_vencimiento is not None and t.fecha_vencimiento < BASE for t in pendientes))
+        self.assertEqual(g.obtener_estadisticas_categoria(None)['total'], len(g.lista_tareas))
+
+    def test_crear(self):
+        g = self.gestor
+        self.assertEqual(len(g.lista_tareas), 6)
+        self.assertIs(g.lista_tareas.obtener_tarea(self.informe.id), self.informe)
+        self.assertEqual(self.informe.categoria, "Trabajo/Proyecto A")
+        self.assertIsNone(self.libre.categoria)
+        self.assertEqual(g.obtener_estadisticas_categoria("Trabajo", BASE)['total'], 3)
+        self.assertEqual(g.obtener_estadisticas_categoria("Trabajo", BASE)['vencidas'], 1)
+        self.comprobar_coherencia()
+
+    def test_actualizar(self):
+        g = self.gestor
+        g.actualizar_tarea(self.medico.id, titulo="Dentista", prioridad=Prioridad.URGENTE,
+                           fecha_vencimiento=BASE - timedelta(days=2))
+        tarea = g.lista_tareas.obtener_tarea(self.medico.id)
+        self.assertEqual((tarea.titulo, tarea.prioridad), ("Dentista", Prioridad.URGENTE))
+        self.assertEqual(titulos(g.lista_tareas.ordenar_por_prioridad())[:2], ["Revisión", "Dentista"])
+        self.assertEqual(titulos(g.lista_tareas.ordenar_por_fecha())[0], "Dentista")
+        self.assertEqual(g.obtener_estadisticas_categoria("Personal", BASE)['vencidas'], 1)
+        self.comprobar_coherencia()
+
+    def test_mover(self):
+        g = self.gestor
+        g.actualizar_tarea(self.informe.id, categoria="Trabajo/Proyecto B")
+        self.assertEqual(titulos(g.obtener_tareas_por_categoria("Trabajo/Proyecto A")), ["Revisión"])
+        self.assertEqual(titulos(g.obtener_tareas_por_categoria("Trabajo/Proyecto B")), ["Informe"])
+        g.actualizar_tarea(self.libre.id, categoria="Personal/Salud")
+        g.actualizar_tarea(self.compras.id, categoria="")
+        self.assertIsNone(g.lista_tareas.obtener_tarea(self.compras.id).categoria)
+        self.assertEqual(titulos(g.obtener_tareas_por_categoria("Personal")), ["Médico", "Sin categoría"])
+        # La tarea movida queda última entre las de su nueva categoría
+        g.actualizar_tarea(self.revision.id, categoria="Trabajo")
+        self.assertEqual(titulos(g.obtener_tareas_por_categoria("Trabajo")), ["Reunión", "Revisión", "Informe"])
+        g.deshacer()
+        self.assertEqual(titulos(g.obtener_tareas_por_categoria("Trabajo")), ["Reunión", "Revisión", "Informe"])
+        self.comprobar_coherencia()
+
+    def test_completar(self):
+        g = self.gestor
+        g.completar_tarea(self.revision.id)
+        self.assertTrue(g.lista_tareas.obtener_tarea(self.revision.id).completada)
+        estadisticas = g.obtener_estadisticas_categoria("Trabajo", BASE)
+        self.assertEqual((estadisticas['completadas'], estadisticas['pendientes'], estadisticas['vencidas']), (1, 2, 0))
+        self.assertEqual(g.contar_por_vencimiento(None, BASE), 0)
+        g.completar_tarea(self.revision.id, False)
+        self.assertEqual(g.contar_por_vencimiento(None, BASE), 1)
+        self.comprobar_coherencia()
+
+    def test_eliminar(self):
+        g = self.gestor
+        self.assertIs(g.eliminar_tarea(self.reunion.id), self.reunion)
+        self.assertIsNone(g.lista_tareas.obtener_tarea(self.reunion.id))
+        self.assertIsNone(g.eliminar_tarea(self.reunion.id))
+        self.assertNotIn("Reunión", titulos(g.obtener_tareas_por_categoria("Trabajo")))
+        self.assertEqual(len(g.lista_tareas), 5)
+        self.comprobar_coherencia()
+
+    def test_deshacer_rehacer(self):
+        g = self.gestor
+        estados = [foto(g)]
+        g.actualizar_tarea(self.informe.id, categoria="Personal", prioridad=Prioridad.BAJA)
+        estados.append(foto(g))
+        g.completar_tarea(self.medico.id)
+        estados.append(foto(g))
+        g.eliminar_tarea(self.revision.id)
+        estados.append(foto(g))
+        with g.transaccion("Varias"):
+            g.crear_tarea("Nueva", "", Prioridad.URGENTE, BASE, "Trabajo/Proyecto B")
+            g.actualizar_tarea(self.compras.id, titulo="Supermercado", fecha_vencimiento=BASE - timedelta(days=4))
+            g.eliminar_tarea(self.libre.id)
+        estados.append(foto(g))
+
+        for esperado in reversed(estados[:-1]):
+            self.assertTrue(g.deshacer())
+            self.assertEqual(foto(g), esperado)
+            self.comprobar_coherencia()
+        for esperado in estados[1:]:
+            self.assertTrue(g.rehacer())
+            self.assertEqual(foto(g), esperado)
+            self.comprobar_coherencia()
+        self.assertFalse(g.rehacer())
+
+    def test_orden_de_obtener(self):
+        g = self.gestor
+        lista = g.lista_tareas
+        self.assertEqual(titulos(lista.obtener_todas_tareas()),
+                         ["Informe", "Revisión", "Médico", "Compras", "Reunión", "Sin categoría"])
+        # Prioridad de mayor a menor; a igual prioridad, la fecha más lejana primero y luego la más antigua
+        self.assertEqual(titulos(lista.ordenar_por_prioridad()),
+                         ["Revisión", "Informe", "Reunión", "Sin categoría", "Médico", "Compras"])
+        self.assertEqual(titulos(lista.ordenar_por_fecha()),
+                         ["Revisión", "Médico", "Compras", "Informe", "Reunión", "Sin categoría"])
+        self.assertEqual([(ruta, profundidad) for ruta, _, profundidad in g.obtener_todas_categorias()], [
+            ("Trabajo", 1), ("Trabajo/Proyecto A", 2), ("Trabajo/Proyecto B", 2),
+            ("Personal", 1), ("Personal/Salud", 2), ("Estudios", 1)])
+        self.assertEqual(titulos(g.obtener_tareas_por_categoria("Trabajo")), ["Reunión", "Informe", "Revisión"])
+        self.assertEqual(titulos(g.obtener_tareas_por_categoria(None)), titulos(lista.obtener_todas_tareas()))
+        self.assertEqual(titulos(g.iter_tareas_por_categoria("Trabajo", por_prioridad=True)),
+                         ["Revisión", "Informe", "Reunión"])
+        self.assertEqual(titulos(g.tareas_por_vencimiento(None, BASE + timedelta(days=4))),
+                         ["Revisión", "Médico", "Compras", "Informe", "Reunión"])
+        self.assertEqual(titulos(g.tareas_por_vencimiento(BASE, None, "Trabajo")), ["Informe", "Reunión"])
+
+    def test_orden_sin_fecha(self):
+        g = self.gestor
+        lista = g.lista_tareas
+        for titulo in ("Algún día", "Quizás"):
+            g.crear_tarea(titulo, "", Prioridad.ALTA, None, "Trabajo")
+        # Cada lista declara con sus claves dónde quedan las tareas sin fecha
+        self.assertEqual(lista.ordenar_por_prioridad(),
+                         sorted(lista, key=lista.clave_prioridad, reverse=True))
+        self.assertEqual(lista.ordenar_por_fecha(), sorted(lista, key=lista.clave_fecha))
+        self.assertEqual([t for t in lista.ordenar_por_prioridad() if t.prioridad == Prioridad.ALTA
+                          and t.fecha_vencimiento is None], [g.lista_tareas.obtener_tarea(t.id) for t in lista
+                                                             if t.titulo in ("Algún día", "Quizás")])
+        # Las tareas sin fecha no cuentan como vencidas ni próximas
+        self.assertEqual(g.contar_por_vencimiento(None, None), 6)
+        self.comprobar_coherencia()
+
+    def test_orden_sin_fecha_en_categoria_chica(self):
+        """Las categorías chicas se ordenan aparte, pero con la misma clave que consultar()"""
+        g = self.gestor
+        g.crear_tarea("Plan con fecha", "", Prioridad.ALTA, BASE, "Trabajo/Proyecto B")
+        g.crear_tarea("Plan sin fecha", "", Prioridad.ALTA, None, "Trabajo/Proyecto B")
+        g.crear_tarea("Plan menor", "", Prioridad.BAJA, None, "Trabajo/Proyecto B")
+        for i in range(30):
+            g.crear_tarea(f"Relleno {i}", "", Prioridad.MEDIA, None)
+        esperado = [t.id for t in g.consultar(ruta_categoria="Trabajo/Proyecto B", orden='prioridad')]
+        self.assertEqual([t.id for t in g.iter_tareas_por_categoria("Trabajo/Proyecto B", por_prioridad=True)],
+                         esperado)
+        self.assertEqual([t.id for t in g.buscar_tareas("plan", "Trabajo/Proyecto B")], esperado)
+
+
+class TestAlmacenMemoria(PruebasAlmacen, unittest.TestCase):
+    def crear_gestor(self):
+        return GestorTareas()
+
+
+class TestAlmacenSQLite(PruebasAlmacen, unittest.TestCase):
+    def crear_gestor(self):
+        return GestorTareas(almacen=AlmacenSQLite())
+
+    def test_base_anterior_a_llegada(self):
+        """Una base sin la columna llegada se completa al abrirla, con el orden de creación"""
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, "tareas.db")
+            gestor = GestorTareas(almacen=AlmacenSQLite(ruta))
+            gestor.agregar_categoria("Trabajo/A")
+            for titulo, categoria in (("uno", "Trabajo/A"), ("dos", "Trabajo"), ("tres", "Trabajo/A")):
+                gestor.crear_tarea(titulo, "", Prioridad.MEDIA, BASE, categoria)
+            gestor.cerrar()
+            conexion = sqlite3.connect(ruta)
+            conexion.execute("DROP INDEX idx_tareas_categoria_llegada")
+            conexion.execute("ALTER TABLE tareas DROP COLUMN llegada")
+            conexion.commit()
+            conexion.close()
+
+            gestor = GestorTareas(almacen=AlmacenSQLite(ruta))
+            self.assertEqual(titulos(gestor.obtener_tareas_por_categoria("Trabajo")), ["dos", "uno", "tres"])
+            nueva = gestor.crear_tarea("cuatro", "", Prioridad.MEDIA, BASE, "Trabajo/A")
+            gestor.actualizar_tarea(gestor.obtener_tareas_por_categoria("Trabajo")[1].id, categoria="Trabajo")
+            self.assertEqual(titulos(gestor.obtener_tareas_por_categoria("Trabajo")), ["dos", "uno", "tres", "cuatro"])
+            self.assertEqual(titulos(gestor.lista_tareas.obtener_todas_tareas()), ["uno", "dos", "tres", "cuatro"])
+            self.assertIs(gestor.lista_tareas.obtener_tarea(nueva.id), nueva)
+            gestor.cerrar()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+from datetime import datetime, timedelta
+from task_manager.cola_urgentes import ColaTareasUrgentes
+from task_manager.gestor_tareas import GestorTareas
+from task_manager.models import Prioridad, Tarea
+
+"""
+Cola de tareas urgentes
+-----------------------
+Comprueban que:
+1. Una tarea encolada dos veces (o reubicada al cambiar su fecha) ocupa un solo lugar.
+2. Las tareas completadas o eliminadas quedan como lápidas que se saltan al procesar,
+   y el montículo se reconstruye cuando las lápidas superan a las entradas vivas.
+3. El envejecimiento adelanta a las tareas que esperan desde antes aunque venzan más tarde.
+"""
+
+BASE = datetime(2025, 1, 1)
+
+
+def urgente(titulo, dias):
+    return Tarea(titulo, "", Prioridad.URGENTE, BASE + timedelta(days=dias) if dias is not None else None)
+
+
+class TestColaUrgentes(unittest.TestCase):
+    def setUp(self):
+        self.ahora = BASE
+        self.cola = ColaTareasUrgentes(reloj=lambda: self.ahora)
+
+    def procesar_todas(self):
+        titulos = []
+        while not self.cola.esta_vacia():
+            titulos.append(self.cola.procesar_siguiente().titulo)
+        return titulos
+
+    def test_no_duplica(self):
+        tarea = urgente("Servidor caído", 1)
+        self.cola.agregar_tarea(tarea)
+        self.cola.agregar_tarea(tarea)
+        self.assertEqual(self.cola.tamaño(), 1)
+        tarea.fecha_vencimiento = BASE + timedelta(days=3)
+        self.cola.actualizar_tarea(tarea)
+        self.cola.actualizar_tarea(tarea)
+        self.assertEqual(self.cola.tamaño(), 1)
+        self.assertIs(self.cola.procesar_siguiente(), tarea)
+        self.assertIsNone(self.cola.procesar_siguiente())
+
+    def test_salta_completadas_y_eliminadas(self):
+        tareas = [urgente(f"Tarea {i}", i) for i in range(5)]
+        for tarea in tareas:
+            self.cola.agregar_tarea(tarea)
+        tareas[0].completada = True
+        self.assertTrue(self.cola.eliminar_tarea(tareas[2]))
+        self.assertFalse(self.cola.eliminar_tarea(tareas[2]))
+        tareas[3].prioridad = Prioridad.ALTA
+        self.assertIs(self.cola.ver_siguiente(), tareas[1])
+        self.assertEqual(self.procesar_todas(), ["Tarea 1", "Tarea 4"])
+
+    def test_reconstruye_con_muchas_lapidas(self):
+        tareas = [urgente(f"Tarea {i}", i) for i in range(200)]
+        for tarea in tareas:
+            self.cola.agregar_tarea(tarea)
+        for tarea in tareas[:150]:
+            self.cola.eliminar_tarea(tarea)
+        self.assertEqual(self.cola.tamaño(), 50)
+        self.assertLess(len(self.cola._monticulo), 200)
+        self.assertEqual(self.cola.obtener_todas(), tareas[150:])
+        self.assertEqual(self.cola.primeras(3), tareas[150:153])
+
+    def test_envejecimiento(self):
+        antigua = urgente("Antigua", 10)
+        self.cola.agregar_tarea(antigua)
+        self.ahora = BASE + timedelta(days=8)
+        nueva = urgente("Nueva", 5)
+        self.cola.agregar_tarea(nueva)
+        sin_fecha = urgente("Sin fecha", None)
+        self.cola.agregar_tarea(sin_fecha)
+        # Claves en días: antigua 10 + 0, nueva 5 + 8, sin fecha 8 + 8
+        self.assertEqual(self.procesar_todas(), ["Antigua", "Nueva", "Sin fecha"])
+
+        solo_fecha = ColaTareasUrgentes(envejecimiento=0, reloj=lambda: self.ahora)
+        self.ahora = BASE
+        solo_fecha.agregar_tarea(antigua)
+        self.ahora = BASE + timedelta(days=8)
+        solo_fecha.agregar_tarea(nueva)
+        self.assertEqual([t.titulo for t in solo_fecha.obtener_todas()], ["Nueva", "Antigua"])
+
+    def test_gestor_mantiene_la_cola(self):
+        gestor = GestorTareas()
+        primera = gestor.crear_tarea("Primera", "", Prioridad.URGENTE, BASE + timedelta(days=1))
+        segunda = gestor.crear_tarea("Segunda", "", Prioridad.URGENTE, BASE + timedelta(days=2))
+        tercera = gestor.crear_tarea("Tercera", "", Prioridad.URGENTE, BASE + timedelta(days=3))
+        gestor.actualizar_tarea(tercera.id, prioridad=Prioridad.URGENTE, titulo="Tercera bis")
+        self.assertEqual(gestor.cola_urgentes.tamaño(), 3)
+        gestor.completar_tarea(primera.id)
+        gestor.eliminar_tarea(segunda.id)
+        self.assertEqual(gestor.cola_urgentes.obtener_todas(), [tercera])
+        gestor.deshacer()  # Vuelve la segunda
+        self.assertEqual(gestor.procesar_siguiente_urgente(), segunda)
+        self.assertEqual(gestor.procesar_siguiente_urgente(), tercera)
+        self.assertIsNone(gestor.procesar_siguiente_urgente())
+
+
+if __name__ == "__main__":
+    unittest.main()
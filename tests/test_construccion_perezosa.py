@@ -0,0 +1,122 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from datetime import datetime
+from task_manager.gestor_tareas import GestorTareas
+from task_manager.indice_texto import IndiceTexto
+from task_manager.instantanea_binaria import cargar_instantanea_binaria, guardar_instantanea_binaria
+from task_manager.lista_tareas import ListaTareas
+from task_manager.models import Prioridad, Tarea
+
+"""
+Construcciones perezosas interrumpidas
+--------------------------------------
+El índice de texto y la lista de una instantánea se construyen en la primera consulta.
+Comprueban que:
+1. Si la construcción falla a mitad (p. ej. porque otro hilo modificó la lista), no
+   queda marcada como hecha y la siguiente consulta la completa sin duplicados.
+2. Un gestor concurrente las construye al crearse, y las consultas hechas desde otro
+   hilo con gestor.lectura() ven siempre la lista completa.
+"""
+
+
+class TestConstruccionPerezosa(unittest.TestCase):
+    def test_indice_de_texto_interrumpido(self):
+        lista = ListaTareas()
+        for i in range(5):
+            lista.agregar_tarea(Tarea(f"Informe {i}", "", Prioridad.MEDIA, None))
+        indice = IndiceTexto(lista)
+        agregar = indice.agregar
+        llamadas = []
+
+        def agregar_y_modificar(tarea):
+            agregar(tarea)
+            llamadas.append(tarea)
+            if len(llamadas) == 2:
+                # Un cambio concurrente a mitad del recorrido
+                lista.agregar_tarea(Tarea("Informe nuevo", "", Prioridad.BAJA, None))
+
+        indice.agregar = agregar_y_modificar
+        with self.assertRaises(RuntimeError):
+            indice.construir()
+        self.assertFalse(indice.construido)
+        self.assertEqual(len(indice), 0)
+
+        indice.agregar = agregar
+        self.assertEqual(indice.buscar("informe"), {tarea.id for tarea in lista})
+        self.assertTrue(indice.construido)
+        self.assertEqual(len(indice), len(lista))
+
+    def test_carga_de_instantanea_interrumpida(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, True)
+        ruta = os.path.join(directorio, "tareas.bin")
+        origen = GestorTareas()
+        for i in range(6):
+            origen.crear_tarea(f"Tarea {i}", "", Prioridad.ALTA, datetime(2025, 1, i + 1), "Trabajo")
+        guardar_instantanea_binaria(origen, ruta)
+
+        gestor = cargar_instantanea_binaria(ruta)
+        lista = gestor.lista_tareas
+        indexar = lista._indexar
+        llamadas = []
+
+        def indexar_con_fallo(tarea):
+            llamadas.append(tarea)
+            if len(llamadas) == 3:
+                raise MemoryError("simulado")
+            indexar(tarea)
+
+        lista._indexar = indexar_con_fallo
+        with self.assertRaises(MemoryError):
+            lista.cargar_todo()
+        # A medias sigue leyendo del archivo: ninguna tarea desaparece
+        self.assertFalse(lista.cargada)
+        self.assertEqual(len(lista), 6)
+        for tarea in origen.lista_tareas:
+            self.assertEqual(lista.obtener_tarea(tarea.id).titulo, tarea.titulo)
+
+        lista._indexar = indexar
+        lista.cargar_todo()
+        self.assertTrue(lista.cargada)
+        self.assertEqual(len(lista), 6)
+        self.assertEqual(gestor.obtener_estadisticas_categoria()['total'], 6)
+        self.assertEqual(gestor.obtener_estadisticas_categoria("Trabajo")['total'], 6)
+        self.assertEqual(len(lista.ordenar_por_prioridad()), 6)
+        gestor.cerrar()
+
+    def test_consultas_desde_otro_hilo(self):
+        gestor = GestorTareas(concurrente=True)
+        self.assertTrue(gestor.indice_texto.construido)
+        for i in range(200):
+            gestor.crear_tarea(f"Informe {i}", "", Prioridad.MEDIA, None, "Trabajo")
+        errores = []
+        detener = threading.Event()
+
+        def consultar():
+            try:
+                while not detener.is_set():
+                    with gestor.lectura():
+                        encontradas = list(gestor.buscar_tareas("informe", "Trabajo"))
+                        esperadas = [t for t in gestor.lista_tareas if t.categoria == "Trabajo"]
+                    self.assertEqual(len(encontradas), len(esperadas))
+            except Exception as e:
+                errores.append(e)
+
+        hilo = threading.Thread(target=consultar)
+        hilo.start()
+        try:
+            for i in range(300):
+                tarea = gestor.crear_tarea(f"Informe extra {i}", "", Prioridad.ALTA, None, "Trabajo")
+                if i % 2:
+                    gestor.eliminar_tarea(tarea.id)
+        finally:
+            detener.set()
+            hilo.join()
+        self.assertEqual(errores, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
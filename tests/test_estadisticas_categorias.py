@@ -0,0 +1,116 @@
+import random
+import unittest
+from datetime import datetime
+from task_manager.estadisticas import EstadisticasTareas
+from task_manager.gestor_tareas import GestorTareas
+from task_manager.models import Prioridad
+
+"""
+Contadores de las categorías dentro de transacciones
+----------------------------------------------------
+Comparan los contadores de cada nodo del árbol con un recuento directo de sus tareas:
+1. Una tarea que se mueve dentro de una transacción y después vuelve a su estado
+   original queda contada con su estado final, al confirmar y al revertir.
+2. Una secuencia aleatoria de operaciones, transacciones y deshacer/rehacer nunca
+   deja un nodo con contadores distintos de sus tareas.
+"""
+
+AHORA = datetime(2025, 1, 10)
+CATEGORIAS = ["Trabajo", "Trabajo/Proyecto A", "Trabajo/Proyecto A/Fase 1", "Personal", "Personal/Salud"]
+
+
+class Fallo(Exception):
+    pass
+
+
+class TestEstadisticasCategorias(unittest.TestCase):
+    def setUp(self):
+        self.gestor = GestorTareas()
+        for ruta in CATEGORIAS:
+            self.gestor.agregar_categoria(ruta)
+
+    def comprobar_nodos(self):
+        g = self.gestor
+        for ruta, _, _ in g.obtener_todas_categorias():
+            esperado = EstadisticasTareas()
+            for tarea in g.lista_tareas:
+                if tarea.categoria and (tarea.categoria == ruta or tarea.categoria.startswith(ruta + "/")):
+                    esperado.sumar(EstadisticasTareas.estado(tarea))
+            self.assertEqual(g.obtener_estadisticas_categoria(ruta, AHORA), esperado.como_diccionario(AHORA), ruta)
+            pendientes = [t.id for t in g.lista_tareas
+                          if not t.completada and t.categoria and (t.categoria == ruta or t.categoria.startswith(ruta + "/"))]
+            self.assertEqual(sorted(t.id for t in g.iter_tareas_por_categoria(ruta, solo_pendientes=True)),
+                             sorted(pendientes), ruta)
+
+    def test_mover_y_restaurar_al_confirmar(self):
+        g = self.gestor
+        tarea = g.crear_tarea("Informe", "", Prioridad.ALTA, datetime(2025, 1, 5), "Trabajo")
+        with g.transaccion("Mover"):
+            g.completar_tarea(tarea.id)
+            g.actualizar_tarea(tarea.id, categoria="Personal")
+            g.completar_tarea(tarea.id, False)
+        self.assertEqual(g.obtener_estadisticas_categoria("Personal")['pendientes'], 1)
+        self.assertEqual([t.id for t in g.iter_tareas_por_categoria("Personal", solo_pendientes=True)], [tarea.id])
+        self.comprobar_nodos()
+        g.deshacer()
+        self.comprobar_nodos()
+        g.rehacer()
+        self.comprobar_nodos()
+
+    def test_mover_y_restaurar_al_revertir(self):
+        g = self.gestor
+        tarea = g.crear_tarea("Informe", "", Prioridad.ALTA, datetime(2025, 1, 5), "Trabajo")
+        with self.assertRaises(Fallo):
+            with g.transaccion("Revertida"):
+                g.actualizar_tarea(tarea.id, prioridad=Prioridad.BAJA)
+                g.actualizar_tarea(tarea.id, categoria="Personal/Salud")
+                g.actualizar_tarea(tarea.id, prioridad=Prioridad.ALTA, categoria="Personal")
+                raise Fallo()
+        # Al revertir, la tarea vuelve a Trabajo pasando por los nodos intermedios
+        self.assertEqual(tarea.categoria, "Trabajo")
+        self.comprobar_nodos()
+
+    def test_secuencia_aleatoria(self):
+        g = self.gestor
+        aleatorio = random.Random(4)
+        opciones_categoria = CATEGORIAS + [""]
+
+        def operar():
+            tareas = list(g.lista_tareas)
+            eleccion = aleatorio.random()
+            if not tareas or eleccion < 0.2:
+                g.crear_tarea("Tarea", "", aleatorio.choice(list(Prioridad)),
+                              aleatorio.choice([None, datetime(2025, 1, aleatorio.randint(1, 20))]),
+                              aleatorio.choice(CATEGORIAS + [None]))
+            elif eleccion < 0.4:
+                g.completar_tarea(aleatorio.choice(tareas).id, aleatorio.random() < 0.5)
+            elif eleccion < 0.6:
+                g.actualizar_tarea(aleatorio.choice(tareas).id, categoria=aleatorio.choice(opciones_categoria))
+            elif eleccion < 0.7:
+                g.actualizar_tarea(aleatorio.choice(tareas).id, prioridad=aleatorio.choice(list(Prioridad)))
+            elif eleccion < 0.8:
+                g.eliminar_tarea(aleatorio.choice(tareas).id)
+            elif eleccion < 0.9:
+                g.deshacer()
+            else:
+                g.rehacer()
+
+        for paso in range(300):
+            with self.subTest(paso=paso):
+                if aleatorio.random() < 0.3:
+                    revertir = aleatorio.random() < 0.4
+                    try:
+                        with g.transaccion("Aleatoria"):
+                            for _ in range(aleatorio.randint(1, 6)):
+                                operar()
+                            if revertir:
+                                raise Fallo()
+                    except Fallo:
+                        pass
+                else:
+                    operar()
+                self.comprobar_nodos()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,28 @@
+import unittest
+from task_manager.benchmark import ejecutar_estres
+
+"""
+Prueba de estrés concurrente
+----------------------------
+Una ronda corta (con semilla) de ejecutar_estres: lectores y escritores sobre un mismo
+gestor concurrente, con transacciones confirmadas y revertidas, sin que aparezcan
+inconsistencias entre la lista, los índices, la cola y los contadores de cada categoría.
+"""
+
+
+class TestEstres(unittest.TestCase):
+    def comprobar(self, almacen):
+        resultados = ejecutar_estres(tareas=300, hilos=(2,), segundos=0.5, escritores=2, semilla=7, almacen=almacen)
+        for resultado in resultados:
+            self.assertGreater(resultado['escrituras'], 0)
+            self.assertEqual(resultado['problemas'], [])
+
+    def test_memoria(self):
+        self.comprobar("memoria")
+
+    def test_sqlite(self):
+        self.comprobar("sqlite")
+
+
+if __name__ == "__main__":
+    unittest.main()
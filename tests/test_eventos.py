@@ -0,0 +1,108 @@
+import unittest
+from task_manager.eventos import (BusEventos, Evento, combinar_eventos, CATEGORIA_AGREGADA, COLA_MODIFICADA,
+                                  HISTORIAL_APILADA, HISTORIAL_DESAPILADA, TAREA_AGREGADA, TAREA_ELIMINADA,
+                                  TAREA_MODIFICADA)
+from task_manager.gestor_tareas import GestorTareas
+from task_manager.models import Prioridad, Tarea
+
+"""
+Bus de eventos
+--------------
+Comprueban que una ráfaga de eventos emitida dentro de agrupar() llega como un solo lote
+combinado tal como lo documenta combinar_eventos: modificaciones unidas, campos que
+volvieron a su valor descartados, altas y bajas del mismo lote anuladas, categorías
+primero, un solo aviso de la cola y el historial en orden.
+"""
+
+
+def resumen(eventos):
+    return [(e.tipo, e.tarea.id if e.tarea is not None else e.ruta, e.cambios) for e in eventos]
+
+
+class TestCombinarEventos(unittest.TestCase):
+    def setUp(self):
+        self.bus = BusEventos()
+        self.lotes = []
+        self.bus.suscribir(self.lotes.append)
+        self.a = Tarea("A", "", Prioridad.MEDIA, None)
+        self.b = Tarea("B", "", Prioridad.MEDIA, None)
+        self.c = Tarea("C", "", Prioridad.MEDIA, None)
+
+    def test_rafaga_agrupada(self):
+        a, b, c = self.a, self.b, self.c
+        with self.bus.agrupar():
+            self.bus.emitir(Evento(TAREA_MODIFICADA, a, {'titulo': ("A", "A1"), 'prioridad': (2, 3)}))
+            self.bus.emitir(Evento(COLA_MODIFICADA))
+            self.bus.emitir(Evento(TAREA_AGREGADA, b))
+            self.bus.emitir(Evento(HISTORIAL_APILADA, accion="primera"))
+            self.bus.emitir(Evento(TAREA_MODIFICADA, b, {'titulo': ("B", "B1")}))
+            with self.bus.agrupar():  # Los bloques anidados forman parte del exterior
+                self.bus.emitir(Evento(TAREA_MODIFICADA, a, {'titulo': ("A1", "A2"), 'prioridad': (3, 2)}))
+                self.bus.emitir(Evento(CATEGORIA_AGREGADA, ruta="Trabajo"))
+                self.bus.emitir(Evento(TAREA_AGREGADA, c))
+                self.bus.emitir(Evento(TAREA_ELIMINADA, c))
+                self.bus.emitir(Evento(COLA_MODIFICADA))
+                self.bus.emitir(Evento(CATEGORIA_AGREGADA, ruta="Trabajo"))
+            self.assertEqual(self.lotes, [])
+            self.bus.emitir(Evento(HISTORIAL_DESAPILADA, accion="segunda"))
+        self.assertEqual(len(self.lotes), 1)
+        self.assertEqual(resumen(self.lotes[0]), [
+            (CATEGORIA_AGREGADA, "Trabajo", None),
+            (TAREA_MODIFICADA, a.id, {'titulo': ("A", "A2")}),  # La prioridad volvió a su valor
+            (TAREA_AGREGADA, b.id, None),                       # La modificación va incluida en el alta
+            (COLA_MODIFICADA, None, None),
+            (HISTORIAL_APILADA, None, None),
+            (HISTORIAL_DESAPILADA, None, None),
+        ])
+        self.assertEqual([e.accion for e in self.lotes[0][-2:]], ["primera", "segunda"])
+
+    def test_modificacion_que_se_anula(self):
+        eventos = [Evento(TAREA_MODIFICADA, self.a, {'completada': (False, True)}),
+                   Evento(TAREA_MODIFICADA, self.a, {'completada': (True, False)})]
+        self.assertEqual(combinar_eventos(eventos), [])
+
+    def test_eliminada_sin_alta_en_el_lote(self):
+        eventos = [Evento(TAREA_MODIFICADA, self.a, {'titulo': ("A", "A1")}),
+                   Evento(TAREA_ELIMINADA, self.a)]
+        self.assertEqual(resumen(combinar_eventos(eventos)),
+                         [(TAREA_MODIFICADA, self.a.id, {'titulo': ("A", "A1")}), (TAREA_ELIMINADA, self.a.id, None)])
+
+    def test_filtro_por_tipo_y_sin_suscriptores(self):
+        cola = []
+        self.bus.suscribir(cola.append, tipos=(COLA_MODIFICADA,))
+        with self.bus.agrupar():
+            self.bus.emitir(Evento(TAREA_AGREGADA, self.a))
+            self.bus.emitir(Evento(COLA_MODIFICADA))
+        self.bus.emitir(Evento(TAREA_ELIMINADA, self.b))  # Fuera del bloque: un lote propio
+        self.assertEqual([resumen(lote) for lote in cola], [[(COLA_MODIFICADA, None, None)]])
+        self.assertEqual(len(self.lotes), 2)
+
+        bus = BusEventos()
+        self.assertFalse(bus.activo)
+        with bus.agrupar():
+            bus.emitir(Evento(TAREA_AGREGADA, self.a))
+        self.assertEqual(bus._pendientes, [])
+
+    def test_transaccion_del_gestor(self):
+        gestor = GestorTareas()
+        lotes = []
+        gestor.eventos.suscribir(lotes.append)
+        tarea = gestor.crear_tarea("Informe", "", Prioridad.MEDIA, None, "Trabajo")
+        lotes.clear()
+        with gestor.transaccion("Ráfaga"):
+            gestor.actualizar_tarea(tarea.id, titulo="Informe final")
+            gestor.actualizar_tarea(tarea.id, prioridad=Prioridad.URGENTE)
+            gestor.actualizar_tarea(tarea.id, prioridad=Prioridad.MEDIA)
+            temporal = gestor.crear_tarea("Temporal", "", Prioridad.BAJA, None)
+            gestor.eliminar_tarea(temporal.id)
+        self.assertEqual(len(lotes), 1)
+        tipos = [e.tipo for e in lotes[0]]
+        self.assertEqual(tipos.count(TAREA_MODIFICADA), 1)
+        modificada = next(e for e in lotes[0] if e.tipo == TAREA_MODIFICADA)
+        self.assertEqual(modificada.cambios, {'titulo': ("Informe", "Informe final")})
+        self.assertNotIn(temporal.id, [e.tarea.id for e in lotes[0] if e.tarea is not None])
+        self.assertEqual(tipos[-1], HISTORIAL_APILADA)
+
+
+if __name__ == "__main__":
+    unittest.main()
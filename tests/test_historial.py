@@ -0,0 +1,211 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from task_manager.gestor_tareas import GestorTareas
+from task_manager.historial_acciones import HistorialAcciones, accion_a_registro, registro_a_accion
+from task_manager.models import Prioridad
+
+"""
+Historial de acciones
+---------------------
+Con un maximo_acciones pequeño las acciones más antiguas pasan a disco como segmentos
+comprimidos. Comprueban que:
+1. Deshacer más allá de la parte en memoria vuelve a leer los segmentos y recorre
+   exactamente los estados anteriores, y rehacer vuelve a recorrerlos hacia adelante.
+2. Una tarea eliminada antes del corte vuelve como el mismo objeto que usan las
+   acciones posteriores.
+3. Un segmento dañado se detecta, y sin desborde las acciones antiguas se descartan.
+4. Una actualización de varios campos guarda solo los que cambiaron, y deshacerla y
+   rehacerla deja cada vez todos los campos como corresponde.
+"""
+
+BASE = datetime(2025, 1, 15)
+
+
+def estado(gestor):
+    """Contenido comparable del gestor: tareas por id y tareas de cada categoría"""
+    tareas = {tarea.id: tarea.a_diccionario() for tarea in gestor.lista_tareas}
+    por_categoria = sorted((ruta, tarea.id) for ruta, nodo, _ in gestor.obtener_todas_categorias()
+                           for tarea in nodo.tareas)
+    return tareas, por_categoria
+
+
+class TestHistorialDesbordado(unittest.TestCase):
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directorio, True)
+        self.ruta = os.path.join(self.directorio, "historial.bin")
+        self.historial = HistorialAcciones(maximo_acciones=4, ruta_desborde=self.ruta)
+        self.gestor = GestorTareas(historial=self.historial)
+        self.addCleanup(self.gestor.cerrar)
+
+    def operar(self):
+        """Una secuencia variada de acciones; devuelve el estado previo a cada una"""
+        g = self.gestor
+        g.agregar_categoria("Trabajo/Proyecto A")
+        estados = []
+
+        def registrar(operacion):
+            estados.append(estado(g))
+            operacion()
+
+        tareas = []
+        for i in range(6):
+            registrar(lambda i=i: tareas.append(
+                g.crear_tarea(f"Tarea {i}", "", Prioridad.MEDIA, BASE + timedelta(days=i), "Trabajo")))
+        registrar(lambda: g.actualizar_tarea(tareas[0].id, titulo="Informe", prioridad=Prioridad.URGENTE,
+                                             categoria="Trabajo/Proyecto A"))
+        registrar(lambda: g.eliminar_tarea(tareas[1].id))
+        registrar(lambda: g.completar_tarea(tareas[2].id))
+
+        def transaccion():
+            with g.transaccion("Varias"):
+                g.completar_tarea(tareas[3].id)
+                g.actualizar_tarea(tareas[4].id, fecha_vencimiento=None, categoria="Personal")
+                g.eliminar_tarea(tareas[5].id)
+        registrar(transaccion)
+        for i in range(6, 12):
+            registrar(lambda i=i: g.crear_tarea(f"Tarea {i}", "Extra", Prioridad.BAJA, None, "Personal"))
+        registrar(lambda: g.actualizar_tarea(tareas[0].id, descripcion="Final", completada=True))
+        return estados, tareas
+
+    def test_deshacer_y_rehacer_a_traves_del_disco(self):
+        g = self.gestor
+        estados, _ = self.operar()
+        final = estado(g)
+        estadisticas = self.historial.estadisticas()
+        self.assertLessEqual(estadisticas['en_memoria'], 4)
+        self.assertGreater(estadisticas['en_disco'], 0)
+        self.assertGreater(os.path.getsize(self.ruta), 0)
+        self.assertEqual(self.historial.cantidad_deshacer(), len(estados))
+
+        for anterior in reversed(estados):
+            self.assertTrue(g.deshacer())
+            self.assertEqual(estado(g), anterior)
+        self.assertFalse(g.deshacer())
+        self.assertEqual(self.historial.estadisticas()['en_disco'], 0)
+        self.assertEqual(os.path.getsize(self.ruta), 0)
+
+        for posterior in estados[1:] + [final]:
+            self.assertTrue(g.rehacer())
+            self.assertEqual(estado(g), posterior)
+        self.assertFalse(g.rehacer())
+
+    def test_tarea_eliminada_antes_del_corte(self):
+        g = self.gestor
+        _, tareas = self.operar()
+        eliminada = tareas[1]
+        while g.deshacer():
+            pass
+        # Rehacer vuelve a pasar a disco las acciones antiguas; al leerlas otra vez, su
+        # creación debe apuntar al objeto que devolvió deshacer la eliminación
+        for _ in range(8):
+            g.rehacer()
+        self.assertIsNone(g.lista_tareas.obtener_tarea(eliminada.id))
+        self.assertGreater(self.historial.estadisticas()['en_disco'], 0)
+        self.assertEqual(len(self.historial.pila_deshacer), 2)
+        g.deshacer()  # La eliminación
+        restaurada = g.lista_tareas.obtener_tarea(eliminada.id)
+        self.assertEqual(restaurada.titulo, "Tarea 1")
+        for _ in range(5):  # La actualización y, ya leídas de disco, las creaciones de las tareas 5 a 2
+            g.deshacer()
+        self.assertEqual(self.historial.estadisticas()['en_disco'], 0)
+        self.assertIs(g.lista_tareas.obtener_tarea(eliminada.id), restaurada)
+        self.assertIs(self.historial.pila_deshacer[-1].tarea, restaurada)
+        g.deshacer()  # La creación de la tarea 1
+        self.assertIsNone(g.lista_tareas.obtener_tarea(eliminada.id))
+
+    def test_segmento_danado(self):
+        g = self.gestor
+        self.operar()
+        # Se altera un byte del segmento más reciente, el primero que se vuelve a leer
+        posicion = self.historial._segmentos[-1][0] + 10
+        archivo = self.historial._archivo
+        archivo.seek(posicion)
+        byte = archivo.read(1)
+        archivo.seek(posicion)
+        archivo.write(bytes([byte[0] ^ 0xFF]))
+        for _ in range(len(self.historial.pila_deshacer)):
+            g.deshacer()
+        with self.assertRaises(IOError):
+            g.deshacer()
+
+    def test_sin_desborde_se_descartan(self):
+        historial = HistorialAcciones(maximo_acciones=4, desbordar=False)
+        gestor = GestorTareas(historial=historial)
+        for i in range(10):
+            gestor.crear_tarea(f"Tarea {i}", "", Prioridad.MEDIA, None)
+        self.assertLessEqual(historial.cantidad_deshacer(), 4)
+        self.assertEqual(historial.estadisticas()['descartadas'], 10 - historial.cantidad_deshacer())
+        while gestor.deshacer():
+            pass
+        # Las creaciones descartadas ya no se pueden deshacer
+        self.assertEqual(len(gestor.lista_tareas), historial.estadisticas()['descartadas'])
+
+
+
+class TestActualizacionVariosCampos(unittest.TestCase):
+    def setUp(self):
+        self.gestor = GestorTareas()
+        self.gestor.agregar_categoria("Trabajo/Proyecto A")
+        self.tarea = self.gestor.crear_tarea("Informe", "Borrador", Prioridad.MEDIA, BASE, "Trabajo")
+
+    def campos(self):
+        tarea = self.gestor.lista_tareas.obtener_tarea(self.tarea.id)
+        return (tarea.titulo, tarea.descripcion, tarea.prioridad, tarea.fecha_vencimiento,
+                tarea.categoria, tarea.completada)
+
+    def test_deshacer_y_rehacer(self):
+        g = self.gestor
+        antes = self.campos()
+        g.actualizar_tarea(self.tarea.id, titulo="Informe final", descripcion="Borrador",
+                           prioridad=Prioridad.URGENTE, fecha_vencimiento=BASE + timedelta(days=5),
+                           categoria="Trabajo/Proyecto A", completada=True)
+        despues = ("Informe final", "Borrador", Prioridad.URGENTE, BASE + timedelta(days=5),
+                   "Trabajo/Proyecto A", True)
+        self.assertEqual(self.campos(), despues)
+
+        # Solo se guardan los campos que cambiaron, con su valor anterior y el nuevo
+        accion = g.historial_acciones.pila_deshacer[-1]
+        self.assertEqual(accion.cambios, {
+            'titulo': ("Informe", "Informe final"),
+            'prioridad': (Prioridad.MEDIA, Prioridad.URGENTE),
+            'fecha_vencimiento': (BASE, BASE + timedelta(days=5)),
+            'categoria': ("Trabajo", "Trabajo/Proyecto A"),
+            'completada': (False, True),
+        })
+
+        for _ in range(2):
+            self.assertTrue(g.deshacer())
+            self.assertEqual(self.campos(), antes)
+            self.assertEqual([t.id for t in g.obtener_tareas_por_categoria("Trabajo/Proyecto A")], [])
+            self.assertNotIn(self.tarea, g.cola_urgentes)
+            self.assertTrue(g.rehacer())
+            self.assertEqual(self.campos(), despues)
+            self.assertEqual([t.id for t in g.obtener_tareas_por_categoria("Trabajo/Proyecto A")],
+                             [self.tarea.id])
+        self.assertFalse(g.rehacer())
+
+    def test_deshacer_vuelve_a_sin_fecha(self):
+        g = self.gestor
+        tarea = g.crear_tarea("Algún día", "", Prioridad.BAJA, None, "Trabajo")
+        g.actualizar_tarea(tarea.id, fecha_vencimiento=BASE, prioridad=Prioridad.ALTA)
+        g.deshacer()
+        self.assertIsNone(tarea.fecha_vencimiento)
+        self.assertEqual(tarea.prioridad, Prioridad.BAJA)
+        g.rehacer()
+        self.assertEqual((tarea.fecha_vencimiento, tarea.prioridad), (BASE, Prioridad.ALTA))
+
+    def test_cambios_serializados(self):
+        g = self.gestor
+        g.actualizar_tarea(self.tarea.id, prioridad=Prioridad.ALTA, fecha_vencimiento=BASE + timedelta(days=2))
+        accion = g.historial_acciones.pila_deshacer[-1]
+        leida = registro_a_accion(accion_a_registro(accion), lambda datos: self.tarea)
+        self.assertEqual(leida.cambios, accion.cambios)
+        self.assertEqual(leida.valores_antiguos, {'prioridad': Prioridad.MEDIA, 'fecha_vencimiento': BASE})
+
+
+if __name__ == "__main__":
+    unittest.main()
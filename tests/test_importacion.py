@@ -0,0 +1,63 @@
+import io
+import unittest
+from task_manager.gestor_tareas import GestorTareas
+from task_manager.models import Prioridad
+
+"""
+Importación masiva
+------------------
+Las filas inválidas se omiten y se informan sin detener la importación, y las tareas
+importadas quedan en la categoría tal como está en el árbol.
+"""
+
+
+class TestImportacion(unittest.TestCase):
+    def setUp(self):
+        self.gestor = GestorTareas()
+
+    def importar(self, texto, formato):
+        return self.gestor.importar(io.StringIO(texto), formato=formato)
+
+    def test_jsonl_con_lineas_invalidas(self):
+        resultado = self.importar(
+            '{"titulo": "uno", "prioridad": "ALTA"}\n'
+            '{"titulo": "dos", \n'
+            '[1, 2]\n'
+            '\n'
+            '"texto suelto"\n'
+            '{"titulo": ["lista"]}\n'
+            '{"titulo": "tres", "categoria": 5}\n'
+            '{"titulo": "cuatro", "vencimiento": "2025-02-01"}\n', "jsonl")
+        self.assertEqual(resultado['importadas'], 2)
+        self.assertEqual([numero for numero, _ in resultado['errores']], [2, 3, 4, 5, 6])
+        self.assertIn("JSON inválido", resultado['errores'][0][1])
+        self.assertIn("objeto", resultado['errores'][1][1])
+        self.assertIn("titulo", resultado['errores'][3][1])
+        self.assertIn("categoria", resultado['errores'][4][1])
+        self.assertEqual(sorted(t.titulo for t in self.gestor.lista_tareas), ["cuatro", "uno"])
+        # La importación sigue siendo una sola acción
+        self.assertTrue(self.gestor.deshacer())
+        self.assertEqual(len(self.gestor.lista_tareas), 0)
+
+    def test_ruta_de_categoria_normalizada(self):
+        self.importar("titulo,categoria\nInforme,/Trabajo//Q/\nOtro,Trabajo/Q\nSuelta,//\n", "csv")
+        informe = next(t for t in self.gestor.lista_tareas if t.titulo == "Informe")
+        self.assertEqual(informe.categoria, "Trabajo/Q")
+        self.assertEqual(sorted(t.titulo for t in self.gestor.obtener_tareas_por_categoria("Trabajo")),
+                         ["Informe", "Otro"])
+        self.assertEqual([t.titulo for t in self.gestor.buscar_tareas("informe", "Trabajo")], ["Informe"])
+        self.assertEqual([t.titulo for t in self.gestor.consultar(ruta_categoria="Trabajo/Q", orden='id')],
+                         ["Informe", "Otro"])
+        suelta = next(t for t in self.gestor.lista_tareas if t.titulo == "Suelta")
+        self.assertIsNone(suelta.categoria)
+
+    def test_tarea_sin_fecha_se_muestra(self):
+        self.importar('{"titulo": "Sin vencimiento", "prioridad": 1}\n', "jsonl")
+        tarea = next(iter(self.gestor.lista_tareas))
+        self.assertIsNone(tarea.fecha_vencimiento)
+        self.assertEqual(tarea.prioridad, Prioridad.BAJA)
+        self.assertIn("Sin fecha", str(tarea))
+
+
+if __name__ == "__main__":
+    unittest.main()
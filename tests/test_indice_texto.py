@@ -0,0 +1,133 @@
+import random
+import unittest
+from task_manager.almacen_sqlite import AlmacenSQLite
+from task_manager.gestor_tareas import GestorTareas
+from task_manager.indice_texto import IndiceTexto, normalizar, terminos
+from task_manager.lista_tareas import ListaTareas
+from task_manager.models import Prioridad, Tarea
+
+"""
+Índice invertido de texto
+-------------------------
+Comprueban que:
+1. Los términos se comparan sin mayúsculas ni acentos, en ambos sentidos
+   ("canción" encuentra "cancion" y al revés).
+2. Una consulta de varios prefijos exige todos (AND), tanto cuando se intersectan las
+   publicaciones como cuando se filtran pocos candidatos por sus términos.
+3. El índice sigue las altas, bajas y cambios de título o descripción, también los de
+   deshacer/rehacer, con los dos almacenamientos.
+"""
+
+
+def ids_esperados(tareas, consulta):
+    """Búsqueda por fuerza bruta: cada término de la consulta es prefijo de alguna palabra"""
+    prefijos = terminos(consulta)
+    resultado = set()
+    for tarea in tareas:
+        palabras = terminos(f"{tarea.titulo} {tarea.descripcion}")
+        if prefijos and all(any(palabra.startswith(p) for palabra in palabras) for p in prefijos):
+            resultado.add(tarea.id)
+    return resultado
+
+
+class TestIndiceTexto(unittest.TestCase):
+    def setUp(self):
+        self.lista = ListaTareas()
+        self.indice = IndiceTexto(self.lista)
+
+    def agregar(self, titulo, descripcion=""):
+        return self.lista.agregar_tarea(Tarea(titulo, descripcion, Prioridad.MEDIA, None))
+
+    def test_normalizar(self):
+        self.assertEqual(normalizar("Canción ÑANDÚ Straße"), "cancion nandu strasse")
+        self.assertEqual(terminos("Reunión, reunion; REUNIÓN del equipo"), ["reunion", "del", "equipo"])
+
+    def test_acentos(self):
+        con_acento = self.agregar("Canción de cuna")
+        sin_acento = self.agregar("Letra de la cancion")
+        self.agregar("Cantar")
+        for consulta in ("canción", "cancion", "CANCIÓN", "canci"):
+            self.assertEqual(self.indice.buscar(consulta), {con_acento.id, sin_acento.id}, consulta)
+
+    def test_varios_prefijos(self):
+        informe = self.agregar("Informe trimestral", "Revisar presupuesto")
+        self.agregar("Informe anual", "Presentar al directorio")
+        self.agregar("Presupuesto", "Sin informe")
+        self.assertEqual(self.indice.buscar("inf presu rev"), {informe.id})
+        self.assertEqual(len(self.indice.buscar("inf pres")), 3)
+        self.assertEqual(self.indice.buscar("inf inexistente"), set())
+        self.assertEqual(self.indice.buscar("   ,;"), set())
+
+    def test_coincide_con_fuerza_bruta(self):
+        # Suficientes tareas para que un término raro filtre candidatos y uno común intersecte
+        aleatorio = random.Random(5)
+        palabras = ["reunión", "reunir", "informe", "inflación", "proyecto", "prueba", "cliente",
+                    "código", "codificar", "equipo"]
+        for i in range(400):
+            titulo = " ".join(aleatorio.sample(palabras, 3))
+            self.agregar(titulo, "raro" if i % 50 == 0 else "")
+        tareas = list(self.lista)
+        for consulta in ("reu inf", "raro reu", "raro", "cod pru cli", "infl proyecto",
+                         "reunir codigo", "r", "equipo raro cliente"):
+            self.assertEqual(self.indice.buscar(consulta), ids_esperados(tareas, consulta), consulta)
+
+
+class PruebasIndiceGestor:
+    """Índice del gestor siguiendo los cambios; cada subclase indica el almacenamiento"""
+
+    def crear_gestor(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.gestor = self.crear_gestor()
+        self.addCleanup(self.gestor.cerrar)
+
+    def buscar(self, consulta):
+        return {tarea.id for tarea in self.gestor.buscar_tareas(consulta)}
+
+    def test_ediciones_y_bajas(self):
+        g = self.gestor
+        tarea = g.crear_tarea("Reunión de equipo", "Preparar agenda", Prioridad.ALTA, None)
+        otra = g.crear_tarea("Llamar al cliente", "", Prioridad.MEDIA, None)
+        self.assertEqual(self.buscar("reunion agen"), {tarea.id})
+
+        g.actualizar_tarea(tarea.id, titulo="Presentación", descripcion="Diapositivas")
+        self.assertEqual(self.buscar("reunion"), set())
+        self.assertEqual(self.buscar("agenda"), set())
+        self.assertEqual(self.buscar("present diap"), {tarea.id})
+
+        g.deshacer()
+        self.assertEqual(self.buscar("reunion agen"), {tarea.id})
+        self.assertEqual(self.buscar("present"), set())
+        g.rehacer()
+        self.assertEqual(self.buscar("present"), {tarea.id})
+
+        g.eliminar_tarea(tarea.id)
+        self.assertEqual(self.buscar("present"), set())
+        g.deshacer()
+        self.assertEqual(self.buscar("present"), {tarea.id})
+
+        with g.transaccion("Varias"):
+            g.actualizar_tarea(otra.id, titulo="Llamar al proveedor")
+            g.eliminar_tarea(tarea.id)
+            nueva = g.crear_tarea("Proveedores nuevos", "", Prioridad.BAJA, None)
+        self.assertEqual(self.buscar("provee"), {otra.id, nueva.id})
+        self.assertEqual(self.buscar("cliente"), set())
+        g.deshacer()
+        self.assertEqual(self.buscar("provee"), set())
+        self.assertEqual(self.buscar("cliente"), {otra.id})
+        self.assertEqual(self.buscar("present"), {tarea.id})
+
+
+class TestIndiceGestorMemoria(PruebasIndiceGestor, unittest.TestCase):
+    def crear_gestor(self):
+        return GestorTareas()
+
+
+class TestIndiceGestorSQLite(PruebasIndiceGestor, unittest.TestCase):
+    def crear_gestor(self):
+        return GestorTareas(almacen=AlmacenSQLite())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import random
+import unittest
+from bisect import bisect_left
+from task_manager.lista_ordenada import ListaOrdenada
+
+"""
+Lista ordenada por bloques
+--------------------------
+Con bloques pequeños para forzar divisiones y bloques vacíos, compara cada operación
+contra una lista de Python ordenada:
+1. El contenido y contar_menores coinciden después de cada inserción y eliminación.
+2. iter_desde recorre exactamente los elementos mayores o iguales que el valor.
+"""
+
+
+class TestListaOrdenada(unittest.TestCase):
+    def comprobar(self, lista, esperado, aleatorio):
+        self.assertEqual(list(lista), esperado)
+        self.assertEqual(len(lista), len(esperado))
+        for valor in [aleatorio.randrange(-5, 205) for _ in range(5)] + [-10, 300]:
+            self.assertEqual(lista.contar_menores(valor), bisect_left(esperado, valor))
+            self.assertEqual(list(lista.iter_desde(valor)), esperado[bisect_left(esperado, valor):])
+
+    def test_coincide_con_lista_ordenada(self):
+        aleatorio = random.Random(7)
+        for carga in (1, 2, 5):
+            with self.subTest(carga=carga):
+                iniciales = [aleatorio.randrange(200) for _ in range(40)]
+                lista = ListaOrdenada(iniciales, carga=carga)
+                esperado = sorted(iniciales)
+                for _ in range(600):
+                    if esperado and aleatorio.random() < 0.45:
+                        valor = aleatorio.choice(esperado)
+                        lista.eliminar(valor)
+                        esperado.remove(valor)
+                    else:
+                        valor = aleatorio.randrange(200)
+                        lista.agregar(valor)
+                        esperado.insert(bisect_left(esperado, valor), valor)
+                    self.comprobar(lista, esperado, aleatorio)
+                # Vaciarla por completo y volver a llenarla
+                for valor in list(esperado):
+                    lista.eliminar(valor)
+                self.assertEqual(lista.contar_menores(100), 0)
+                lista.agregar(3)
+                self.assertEqual(lista.contar_menores(4), 1)
+
+    def test_eliminar_inexistente(self):
+        lista = ListaOrdenada([1, 3, 5], carga=2)
+        with self.assertRaises(ValueError):
+            lista.eliminar(4)
+        with self.assertRaises(ValueError):
+            lista.eliminar(9)
+        self.assertEqual(lista.contar_menores(5), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,163 @@
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+from datetime import datetime
+from task_manager.gestor_tareas import GestorTareas
+from task_manager.models import Prioridad
+from task_manager.persistencia import Persistencia
+
+"""
+Recuperación del diario de persistencia
+---------------------------------------
+Simulan una caída cortando diario.log en distintos puntos y comprueban que al volver a
+abrirlo:
+1. Se recupera exactamente el estado anterior a la operación cortada: una tarea nunca
+   vuelve sin su categoría ni con una actualización a medias.
+2. El registro incompleto se descarta y los registros nuevos se agregan detrás de los
+   válidos, de modo que sobreviven a otra reapertura.
+"""
+
+_ENCABEZADO = struct.Struct("<II")
+
+
+def estado(gestor):
+    """Contenido comparable de un gestor: tareas por id y rutas de categorías"""
+    tareas = {tarea.id: tarea.a_diccionario() for tarea in gestor.lista_tareas}
+    categorias = sorted(ruta for ruta, _, _ in gestor.obtener_todas_categorias())
+    en_categorias = sorted((tarea.categoria, tarea.id) for tarea in gestor.lista_tareas if tarea.categoria)
+    por_nodo = sorted((ruta, tarea.id) for ruta, nodo, _ in gestor.obtener_todas_categorias() for tarea in nodo.tareas)
+    return tareas, categorias, en_categorias, por_nodo
+
+
+def limites_de_registros(ruta_diario):
+    """Posición donde termina cada registro del diario"""
+    with open(ruta_diario, "rb") as archivo:
+        datos = archivo.read()
+    limites = []
+    posicion = 0
+    while posicion < len(datos):
+        longitud, _ = _ENCABEZADO.unpack_from(datos, posicion)
+        posicion += _ENCABEZADO.size + longitud
+        limites.append(posicion)
+    return limites
+
+
+class TestRecuperacionDiario(unittest.TestCase):
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.ruta_diario = os.path.join(self.directorio, Persistencia.ARCHIVO_DIARIO)
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+    def abrir(self):
+        return GestorTareas(persistencia=Persistencia(self.directorio, compactar_cada=10**6))
+
+    def poblar(self, gestor):
+        gestor.agregar_categoria("Trabajo/Proyecto")
+        primera = gestor.crear_tarea("Informe", "Mensual", Prioridad.ALTA, datetime(2025, 3, 1), "Trabajo/Proyecto")
+        gestor.crear_tarea("Llamar", "", Prioridad.URGENTE, datetime(2025, 2, 1), "Personal")
+        gestor.actualizar_tarea(primera.id, titulo="Informe final", prioridad=Prioridad.URGENTE, categoria="Trabajo")
+        return primera
+
+    def cortar_ultimo_registro(self, operacion, preparar=None):
+        """
+        Ejecuta operacion(gestor) como última operación (después de preparar(gestor), si
+        se indica) y devuelve el estado previo y dónde empieza y termina su registro
+        """
+        gestor = self.abrir()
+        self.poblar(gestor)
+        gestor.cerrar()
+        gestor = self.abrir()
+        if preparar is not None:
+            preparar(gestor)
+            gestor.persistencia.sincronizar()
+        antes = estado(gestor)
+        inicio = os.path.getsize(self.ruta_diario)
+        operacion(gestor)
+        gestor.cerrar()
+        fin = os.path.getsize(self.ruta_diario)
+        self.assertEqual(limites_de_registros(self.ruta_diario)[-1], fin)
+        self.assertGreater(fin, inicio)
+        return antes, inicio, fin
+
+    def comprobar_cortes(self, operacion, preparar=None):
+        antes, inicio, fin = self.cortar_ultimo_registro(operacion, preparar)
+        with open(self.ruta_diario, "rb") as archivo:
+            completo = archivo.read()
+        for corte in range(inicio + 1, fin):
+            with self.subTest(corte=corte - inicio):
+                with open(self.ruta_diario, "wb") as archivo:
+                    archivo.write(completo[:corte])
+                gestor = self.abrir()
+                self.assertEqual(estado(gestor), antes)
+                gestor.cerrar()
+                # Al recuperar se recorta la basura del final
+                self.assertEqual(os.path.getsize(self.ruta_diario), inicio)
+
+    def test_crear_con_categoria_es_atomico(self):
+        self.comprobar_cortes(lambda g: g.crear_tarea("Nueva", "", Prioridad.MEDIA, datetime(2025, 4, 1),
+                                                      "Trabajo/Proyecto"))
+
+    def test_actualizar_varios_campos_es_atomico(self):
+        def actualizar(gestor):
+            tarea = next(t for t in gestor.lista_tareas if t.titulo == "Llamar")
+            gestor.actualizar_tarea(tarea.id, titulo="Llamar al banco", completada=True, categoria="Trabajo/Proyecto")
+        self.comprobar_cortes(actualizar)
+
+    def test_transaccion_es_atomica(self):
+        def completar_todas(gestor):
+            with gestor.transaccion("Completar todas"):
+                for tarea in list(gestor.lista_tareas):
+                    gestor.completar_tarea(tarea.id)
+                gestor.crear_tarea("Dentro", "", Prioridad.BAJA, None, "Personal")
+        self.comprobar_cortes(completar_todas)
+
+    def test_deshacer_es_atomico(self):
+        def eliminar(gestor):
+            tarea = next(t for t in gestor.lista_tareas if t.categoria == "Trabajo")
+            gestor.eliminar_tarea(tarea.id)
+        # Se corta solo el registro de deshacer: la eliminación ya estaba confirmada
+        self.comprobar_cortes(lambda g: g.deshacer(), preparar=eliminar)
+
+    def test_agregar_despues_de_recuperar(self):
+        _, inicio, fin = self.cortar_ultimo_registro(
+            lambda g: g.crear_tarea("Cortada", "", Prioridad.MEDIA, None, "Personal"))
+        with open(self.ruta_diario, "r+b") as archivo:
+            archivo.truncate((inicio + fin) // 2)
+
+        gestor = self.abrir()
+        self.assertNotIn("Cortada", [t.titulo for t in gestor.lista_tareas])
+        gestor.agregar_categoria("Estudios/Tesis")
+        nueva = gestor.crear_tarea("Después del corte", "", Prioridad.ALTA, datetime(2025, 5, 1), "Estudios/Tesis")
+        gestor.actualizar_tarea(nueva.id, descripcion="Capítulo 1")
+        esperado = estado(gestor)
+        gestor.cerrar()
+
+        gestor = self.abrir()
+        self.assertEqual(estado(gestor), esperado)
+        recuperada = gestor.lista_tareas.obtener_tarea(nueva.id)
+        self.assertEqual(recuperada.categoria, "Estudios/Tesis")
+        self.assertEqual(recuperada.descripcion, "Capítulo 1")
+        gestor.cerrar()
+
+    def test_corte_tras_compactar(self):
+        gestor = GestorTareas(persistencia=Persistencia(self.directorio, compactar_cada=5))
+        for i in range(12):
+            gestor.crear_tarea(f"Tarea {i}", "", Prioridad.MEDIA, None, "Trabajo" if i % 2 else None)
+        esperado = estado(gestor)
+        ultima = gestor.crear_tarea("Última", "", Prioridad.BAJA, None, "Personal")
+        gestor.cerrar()
+        with open(self.ruta_diario, "r+b") as archivo:
+            archivo.truncate(os.path.getsize(self.ruta_diario) - 1)
+
+        gestor = self.abrir()
+        self.assertEqual(estado(gestor), esperado)
+        self.assertIsNone(gestor.lista_tareas.obtener_tarea(ultima.id))
+        gestor.cerrar()
+
+
+if __name__ == "__main__":
+    unittest.main()
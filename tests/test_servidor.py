@@ -0,0 +1,60 @@
+import json
+import unittest
+from task_manager.gestor_tareas import GestorTareas
+from task_manager.servidor import ServidorTareas
+
+"""
+Validación de las tareas del servidor HTTP
+------------------------------------------
+Atienden las solicitudes sin abrir sockets (ServidorTareas._resolver) y comprueban que:
+1. Los campos de texto con otro tipo JSON se rechazan con un 400 que nombra el campo,
+   sin crear ni modificar tareas.
+2. Una categoría null o vacía sigue quitando la categoría al actualizar.
+"""
+
+
+class TestValidacionTareas(unittest.TestCase):
+    def setUp(self):
+        self.gestor = GestorTareas()
+        self.servidor = ServidorTareas(self.gestor, puerto=0)
+
+    def pedir(self, metodo, objetivo, datos=None):
+        cuerpo = json.dumps(datos).encode("utf-8") if datos is not None else b""
+        return self.servidor._resolver(metodo, objetivo, cuerpo)
+
+    def test_texto_con_tipo_invalido(self):
+        tarea = self.pedir("POST", "/tareas", {"titulo": "Base", "categoria": "Trabajo"})[1]
+        casos = [("titulo", ["x"]), ("titulo", None), ("descripcion", {}), ("descripcion", 3),
+                 ("categoria", 5), ("categoria", ["Trabajo"])]
+        for campo, valor in casos:
+            with self.subTest(campo=campo, valor=valor):
+                datos = {"titulo": "Nueva", campo: valor}
+                estado, respuesta = self.pedir("POST", "/tareas", datos)
+                self.assertEqual((estado, respuesta), (400, {'error': f"'{campo}' debe ser texto"}))
+                estado, respuesta = self.pedir("PATCH", f"/tareas/{tarea['id']}", {campo: valor})
+                self.assertEqual(estado, 400)
+                estado, respuesta = self.pedir("POST", "/tareas/lote", {"crear": [datos]})
+                self.assertEqual(estado, 400)
+                self.assertIn(campo, respuesta['error'])
+        estado, _ = self.pedir("POST", "/tareas/lote", {"crear": [{"titulo": "Nueva"}], "descripcion": 7})
+        self.assertEqual(estado, 400)
+        self.assertEqual(len(self.gestor.lista_tareas), 1)
+        self.assertEqual(self.pedir("GET", f"/tareas/{tarea['id']}")[1], tarea)
+
+    def test_prioridad_con_tipo_invalido(self):
+        estado, respuesta = self.pedir("POST", "/tareas", {"titulo": "Nueva", "prioridad": [1]})
+        self.assertEqual(estado, 400)
+        self.assertIn("Prioridad", respuesta['error'])
+
+    def test_categoria_nula_quita_la_categoria(self):
+        tarea = self.pedir("POST", "/tareas", {"titulo": "Base", "categoria": "Trabajo"})[1]
+        for valor in (None, ""):
+            with self.subTest(valor=valor):
+                self.pedir("PATCH", f"/tareas/{tarea['id']}", {"categoria": "Trabajo"})
+                estado, respuesta = self.pedir("PATCH", f"/tareas/{tarea['id']}", {"categoria": valor})
+                self.assertEqual(estado, 200)
+                self.assertIsNone(respuesta['categoria'])
+
+
+if __name__ == "__main__":
+    unittest.main()